@@ -0,0 +1,28 @@
+import { NextRequest, NextResponse } from 'next/server'
+
+export async function GET(request: NextRequest, { params }: { params: { id: string } }) {
+  try {
+    const backendUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8080'
+    const response = await fetch(`${backendUrl}/api/v1/jobs/${encodeURIComponent(params.id)}`, {
+      headers: {
+        'accept': 'application/json'
+      }
+    })
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: 'Job not found' },
+        { status: response.status }
+      )
+    }
+
+    const data = await response.json()
+    return NextResponse.json(data)
+  } catch (error) {
+    console.error('API Error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
@@ -12,7 +12,8 @@ export async function POST(request: NextRequest) {
         'accept': 'application/json',
         'x-include-metadata': 'true'
       },
-      body: JSON.stringify(body)
+      // Compact result cards, the full posting is loaded by /api/jobs/[id] when opened
+      body: JSON.stringify({ view: 'card', ...body })
     })
 
     if (!response.ok) {
@@ -0,0 +1,32 @@
+import { NextRequest, NextResponse } from 'next/server'
+
+export async function GET(request: NextRequest, { params }: { params: { field: string } }) {
+  try {
+    const backendUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8080'
+    const query = new URLSearchParams({
+      prefix: request.nextUrl.searchParams.get('prefix') || '',
+      limit: request.nextUrl.searchParams.get('limit') || '10'
+    })
+    const response = await fetch(`${backendUrl}/api/v1/values/${encodeURIComponent(params.field)}?${query}`, {
+      headers: {
+        'accept': 'application/json'
+      }
+    })
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: 'Unknown filter field' },
+        { status: response.status }
+      )
+    }
+
+    const data = await response.json()
+    return NextResponse.json(data)
+  } catch (error) {
+    console.error('API Error:', error)
+    return NextResponse.json(
+      { error: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
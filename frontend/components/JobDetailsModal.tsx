@@ -33,6 +33,25 @@ interface JobDetailsModalProps {
 
 export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onSeeMore, isTransitioning = false }: JobDetailsModalProps) {
   const [isDescriptionExpanded, setIsDescriptionExpanded] = useState(false)
+  const [details, setDetails] = useState<JobResult['fields'] | null>(null)
+
+  // Search results only carry the card fields, load the full posting when opened
+  useEffect(() => {
+    if (!isOpen) return
+    let cancelled = false
+    setDetails(null)
+    fetch(`/api/jobs/${encodeURIComponent(job.id)}`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(data => {
+        if (!cancelled && data?.fields) setDetails(data.fields)
+      })
+      .catch(error => console.error('Error fetching job details:', error))
+    return () => {
+      cancelled = true
+    }
+  }, [isOpen, job.id])
+
+  const fields = { ...job.fields, ...details }
   
   // ESC key handler
   useEffect(() => {
@@ -58,7 +77,8 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
 
   const formatSkills = (skills: string[]) => {
     if (!skills || skills.length === 0) return []
-    return skills[0].split(',').map(skill => skill.trim()).filter(Boolean)
+    // Every skill of the list; rows ingested before the vocabulary hold one comma separated string
+    return skills.join(',').split(',').map(skill => skill.trim()).filter(Boolean)
   }
 
   const getJobLevelColor = (level: string) => {
@@ -80,11 +100,11 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
   }
 
   const handleApplyNow = () => {
-    if (job.fields.job_link && job.fields.job_link.trim()) {
-      window.open(job.fields.job_link, '_blank')
+    if (fields.job_link && fields.job_link.trim()) {
+      window.open(fields.job_link, '_blank')
     } else {
       // Fallback to Google search if no job_link
-      window.open(`https://www.google.com/search?q=${encodeURIComponent(job.fields.job_title + ' ' + job.fields.company)}`, '_blank')
+      window.open(`https://www.google.com/search?q=${encodeURIComponent(fields.job_title + ' ' + fields.company)}`, '_blank')
     }
   }
 
@@ -104,20 +124,20 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
         <div className="flex justify-between items-start p-6 border-b border-gray-700">
           <div className="flex-1">
             <h2 className="text-2xl font-bold text-gray-100 mb-2">
-              {job.fields.job_title}
+              {fields.job_title}
             </h2>
             <div className="flex items-center space-x-4 text-gray-300">
               <div className="flex items-center space-x-1">
                 <Building className="w-4 h-4" />
-                <span>{job.fields.company}</span>
+                <span>{fields.company}</span>
               </div>
               <div className="flex items-center space-x-1">
                 <MapPin className="w-4 h-4" />
-                <span>{job.fields.job_location}</span>
+                <span>{fields.job_location}</span>
               </div>
               <div className="flex items-center space-x-1">
                 <Globe className="w-4 h-4" />
-                <span>{job.fields.job_type}</span>
+                <span>{fields.job_type}</span>
               </div>
             </div>
           </div>
@@ -135,14 +155,14 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
           <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
             <div className="bg-gray-900 rounded-lg p-4">
               <div className="text-sm text-gray-400 mb-1">Job Level</div>
-              <div className={`inline-block px-3 py-1 rounded-full text-sm font-medium ${getJobLevelColor(job.fields.job_level)}`}>
-                {job.fields.job_level}
+              <div className={`inline-block px-3 py-1 rounded-full text-sm font-medium ${getJobLevelColor(fields.job_level)}`}>
+                {fields.job_level}
               </div>
             </div>
             <div className="bg-gray-900 rounded-lg p-4">
               <div className="text-sm text-gray-400 mb-1">Work Type</div>
-              <div className={`inline-block px-3 py-1 rounded-full text-sm font-medium ${getJobTypeColor(job.fields.job_type)}`}>
-                {job.fields.job_type}
+              <div className={`inline-block px-3 py-1 rounded-full text-sm font-medium ${getJobTypeColor(fields.job_type)}`}>
+                {fields.job_type}
               </div>
             </div>
             <div className="bg-gray-900 rounded-lg p-4">
@@ -157,7 +177,7 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
           <div className="mb-6">
             <h3 className="text-lg font-semibold text-gray-100 mb-3">Category</h3>
             <span className="px-3 py-1 bg-gray-700 text-gray-300 rounded-full text-sm capitalize">
-              {job.fields.job_category.replace('_', ' ')}
+              {fields.job_category.replace('_', ' ')}
             </span>
           </div>
 
@@ -171,11 +191,11 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
                     isDescriptionExpanded ? 'max-h-none' : 'max-h-32'
                   }`}
                 >
-                  {job.fields.job_summary}
+                  {fields.job_summary}
                 </div>
                 
                 {/* Show More/Less Button */}
-                {job.fields.job_summary && job.fields.job_summary.length > 300 && (
+                {fields.job_summary && fields.job_summary.length > 300 && (
                   <button
                     onClick={() => setIsDescriptionExpanded(!isDescriptionExpanded)}
                     className="flex items-center space-x-1 mt-3 text-primary-400 hover:text-primary-300 text-sm font-medium transition-colors duration-200"
@@ -193,11 +213,11 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
           </div>
 
           {/* Required Skills */}
-          {job.fields.job_skills && job.fields.job_skills.length > 0 && (
+          {fields.job_skills && fields.job_skills.length > 0 && (
             <div className="mb-6">
               <h3 className="text-lg font-semibold text-gray-100 mb-3">Required Skills</h3>
               <div className="flex flex-wrap gap-2">
-                {formatSkills(job.fields.job_skills).map((skill, index) => (
+                {formatSkills(fields.job_skills).map((skill, index) => (
                   <span
                     key={index}
                     className="px-3 py-2 bg-primary-900 text-primary-200 rounded-lg text-sm font-medium"
@@ -215,12 +235,12 @@ export default function JobDetailsModal({ job, isOpen, onClose, onJobSelect, onS
             <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
               <div className="bg-gray-900 rounded-lg p-4">
                 <div className="text-sm text-gray-400 mb-1">Full Location</div>
-                <div className="text-gray-100">{job.fields.job_location}</div>
+                <div className="text-gray-100">{fields.job_location}</div>
               </div>
-              {job.fields.state && (
+              {fields.state && (
                 <div className="bg-gray-900 rounded-lg p-4">
                   <div className="text-sm text-gray-400 mb-1">State</div>
-                  <div className="text-gray-100">{job.fields.state}</div>
+                  <div className="text-gray-100">{fields.state}</div>
                 </div>
               )}
             </div>
@@ -93,7 +93,8 @@ export default function SimilarJobsCarousel({ currentJobId, onJobSelect, onSeeMo
 
   const formatSkills = (skills: string[]) => {
     if (!skills || skills.length === 0) return []
-    return skills[0].split(',').map(skill => skill.trim()).filter(Boolean)
+    // Every skill of the list; rows ingested before the vocabulary hold one comma separated string
+    return skills.join(',').split(',').map(skill => skill.trim()).filter(Boolean)
   }
 
   const getJobLevelColor = (level: string) => {
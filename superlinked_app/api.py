@@ -1,25 +1,40 @@
+import logging
+
 from superlinked import framework as sl
 
-from superlinked_app.index import index, job_schema
-from superlinked_app.query import query, query_debug, similar_jobs_query
 from superlinked_app.config import settings
+from superlinked_app.embedding_service import local_engine_keys, use_embedding_service
+
+if settings.embedding_service_socket:
+    # The server workers share the model of the embedding service instead of loading one each.
+    # Swapped before index.py builds the spaces, which already create their engine for the model dimension
+    use_embedding_service()
+
+from superlinked_app.index import build_vector_database, index, job_schema  # noqa: E402
+from superlinked_app.query import query, query_debug, similar_jobs_query  # noqa: E402
+
+if settings.embedding_service_socket and local_engine_keys():
+    logging.getLogger(__name__).warning("Local embedding models loaded despite the service: %s", local_engine_keys())
 
 # Setup the executor
 rest_source = sl.RestSource(job_schema)
 
-vector_database = sl.QdrantVectorDatabase(
-    url=settings.qdrant_url, 
-    api_key=settings.qdrant_api_key,
-    #search_algorithm=sl.SearchAlgorithm.HNSW,
-    prefer_grpc=True
-)
+vector_database = build_vector_database()
 
-config = sl.DataLoaderConfig(
-    path=settings.path_dataset,
-    format=sl.DataFormat.CSV,
-    name="job_postings",
-    pandas_read_kwargs={"chunksize": settings.chunk_size},
-)
+if settings.path_dataset.endswith(".parquet"):
+    # Preprocessed dataset (python -m superlinked_app.preprocess), read in one go
+    config = sl.DataLoaderConfig(
+        path=settings.path_dataset,
+        format=sl.DataFormat.PARQUET,
+        name="job_postings",
+    )
+else:
+    config = sl.DataLoaderConfig(
+        path=settings.path_dataset,
+        format=sl.DataFormat.CSV,
+        name="job_postings",
+        pandas_read_kwargs={"chunksize": settings.chunk_size},
+    )
 loader_source = sl.DataLoaderSource(job_schema, config)
 
 executor = sl.RestExecutor(
@@ -0,0 +1,378 @@
+"""Reproducible load tests of the search endpoints, runnable offline.
+
+    python -m superlinked_app.benchmark generate [--rows 5000] [--queries 500] [--labeled 200] [--seed 0]
+    python -m superlinked_app.benchmark ingest
+    python -m superlinked_app.benchmark run [--url http://localhost:8000] [--concurrency 8] [--rounds 3]
+    python -m superlinked_app.benchmark compare BASELINE.json CANDIDATE.json
+
+`generate` writes a fixed synthetic dataset shaped like `JobPosting` and a query corpus for
+the `job` (natural and structured), `job-debug` and `similar-jobs` endpoints, with the canned
+LLM extraction of every natural query, plus labeled queries with their relevant postings for
+the quality sweeps of superlinked_app.search_profiles. `ingest` times the ingestion of the synthetic dataset,
+`run` replays the corpus at the given concurrency and reports throughput and p50/p95/p99 per
+endpoint. Results are written to `benchmark_results_dir` to compare versions with `compare`.
+
+For a laptop without network, run the Superlinked server with VECTOR_DATABASE=in_memory,
+PATH_DATASET pointing at the synthetic dataset and OPENAI_BASE_URL at the OpenAI stand-in
+(`uvicorn superlinked_app.mock_openai:app --port 8090`, see mock_openai.py).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from superlinked_app.config import get_data_file_path, settings
+
+# Share of each kind of query in the corpus
+QUERY_MIX = {"natural": 0.5, "structured": 0.2, "similar-jobs": 0.25, "job-debug": 0.05}
+
+# Result keys that describe the run rather than measure it
+RUN_INFO_KEYS = ("time", "requests", "errors", "seconds", "concurrency", "rounds", "queries", "total_rows", "workers")
+
+# job_category -> titles and skills of the synthetic postings
+ROLES = {
+    "data_analyst": (
+        ["Data Analyst", "Business Intelligence Analyst", "Reporting Analyst"],
+        ["SQL", "Excel", "Tableau", "Power BI", "Python"],
+    ),
+    "data_engineer": (
+        ["Data Engineer", "ETL Developer", "Big Data Engineer"],
+        ["Python", "Spark", "Airflow", "SQL", "AWS", "Kafka"],
+    ),
+    "data_scientist": (
+        ["Data Scientist", "Machine Learning Engineer", "Research Scientist"],
+        ["Python", "Machine Learning", "TensorFlow", "PyTorch", "Statistics"],
+    ),
+    "software_engineer": (
+        ["Software Engineer", "Backend Developer", "Full Stack Developer"],
+        ["Java", "JavaScript", "React", "Node.js", "Docker", "Kubernetes"],
+    ),
+}
+LEVELS = ["Associate", "Mid Senior"]
+JOB_TYPES = ["Onsite", "Hybrid", "Remote"]
+LOCATIONS = [
+    ("New York", "NY", "United States"),
+    ("San Francisco", "CA", "United States"),
+    ("Austin", "TX", "United States"),
+    ("Seattle", "WA", "United States"),
+    ("London", None, "United Kingdom"),
+    ("Toronto", None, "Canada"),
+]
+COMPANIES = ["Acme Analytics", "Globex", "Initech", "Umbrella Data", "Stark Industries", "Wayne Tech", "Hooli"]
+SUMMARY_SENTENCES = [
+    "You will work with {skills} to build {product}.",
+    "Our {team} team is looking for a {title} to join us in {city}.",
+    "Experience with {skills} is required.",
+    "You will partner with stakeholders to improve {product}.",
+    "We offer a {job_type} position with flexible hours.",
+]
+PRODUCTS = [
+    "reporting pipelines",
+    "customer dashboards",
+    "recommendation systems",
+    "payment services",
+    "forecasting models",
+]
+
+
+def generate_postings(rows: int, seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    postings = []
+    for i in range(rows):
+        category = rng.choice(list(ROLES))
+        titles, skills = ROLES[category]
+        title, level, job_type = rng.choice(titles), rng.choice(LEVELS), rng.choice(JOB_TYPES)
+        city, state, country = rng.choice(LOCATIONS)
+        job_skills = rng.sample(skills, rng.randint(2, len(skills)))
+        values = {
+            "skills": ", ".join(job_skills[:3]),
+            "product": rng.choice(PRODUCTS),
+            "team": category.split("_")[0],
+            "title": title,
+            "city": city,
+            "job_type": job_type.lower(),
+        }
+        summary = " ".join(sentence.format(**values) for sentence in rng.sample(SUMMARY_SENTENCES, 3))
+        postings.append(
+            {
+                "id": str(i),
+                "job_title": f"{'Senior ' if level == 'Mid Senior' else ''}{title}",
+                "job_summary": summary,
+                "company": rng.choice(COMPANIES),
+                "job_skills": ", ".join(job_skills),
+                "job_location": ", ".join(part for part in (city, state, country) if part),
+                "state": state,
+                "search_city": city,
+                "search_country": country,
+                "job_level": level,
+                "job_type": job_type,
+                "job_category": category,
+                "job_link": f"https://jobs.example.com/{i}",
+            }
+        )
+    return pd.DataFrame(postings)
+
+
+def natural_query(rng: random.Random) -> tuple[str, dict]:
+    """A natural query and the params the LLM would extract from it."""
+    category = rng.choice(list(ROLES))
+    titles, skills = ROLES[category]
+    title, level, job_type = rng.choice(titles), rng.choice(LEVELS), rng.choice(JOB_TYPES)
+    city, _, _ = rng.choice(LOCATIONS)
+    skill = rng.choice(skills)
+    text = rng.choice(
+        [
+            f"{title} jobs in {city}",
+            f"{job_type.lower()} {title.lower()} with {skill}",
+            f"{'senior' if level == 'Mid Senior' else 'junior'} {title.lower()} positions in {city}",
+            f"{title} using {skill}, {job_type.lower()}",
+        ]
+    )
+    extraction = {"title": title, "description": f"{title} working with {skill}."}
+    if city in text:
+        extraction["search_cities_include"] = [city]
+    if skill in text:
+        extraction["skills"] = [skill]
+    if job_type.lower() in text:
+        extraction["job_types_include"] = [job_type]
+    if "senior" in text or "junior" in text:
+        extraction["job_levels_include"] = [level]
+    return text, extraction
+
+
+def generate_queries(postings: pd.DataFrame, count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    ids = postings["id"].tolist()
+    queries = []
+    for kind in rng.choices(list(QUERY_MIX), weights=list(QUERY_MIX.values()), k=count):
+        if kind == "natural":
+            text, extraction = natural_query(rng)
+            payload = {"natural_query": text, "limit": 10}
+            queries.append({"query": "job", "kind": kind, "payload": payload, "extraction": extraction})
+        elif kind == "structured":
+            _, extraction = natural_query(rng)
+            queries.append({"query": "job", "kind": kind, "payload": extraction | {"limit": 10}})
+        elif kind == "similar-jobs":
+            queries.append({"query": "similar-jobs", "kind": kind, "payload": {"id": rng.choice(ids), "limit": 10}})
+        else:
+            queries.append({"query": "job-debug", "kind": kind, "payload": {}})
+    return queries
+
+
+def generate_labeled_queries(postings: pd.DataFrame, count: int, seed: int) -> list[dict]:
+    """Structured `job` queries with graded relevant postings, for superlinked_app.search_profiles.
+
+    Within the city and work type filters of a query, a posting of the queried title with the
+    queried skill is graded 2, and another posting of the same category with the skill or the
+    title is graded 1.
+    """
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        category = rng.choice(list(ROLES))
+        titles, skills = ROLES[category]
+        title, skill, job_type = rng.choice(titles), rng.choice(skills), rng.choice(JOB_TYPES)
+        city, _, _ = rng.choice(LOCATIONS)
+        matches = (postings["search_city"] == city) & (postings["job_type"] == job_type)
+        candidates = postings[matches & (postings["job_category"] == category)]
+        has_title = candidates["job_title"].str.endswith(title)
+        has_skill = candidates["job_skills"].str.split(", ").map(lambda job_skills: skill in job_skills)
+        grades = (has_title & has_skill).astype(int) + (has_title | has_skill).astype(int)
+        relevant = {id_: int(grade) for id_, grade in zip(candidates["id"], grades) if grade > 0}
+        if not relevant:
+            continue
+        payload = {
+            "title": title,
+            "description": f"{title} working with {skill}.",
+            "skills": [skill],
+            "search_cities_include": [city],
+            "job_types_include": [job_type],
+        }
+        queries.append({"query": "job", "payload": payload, "relevant": relevant})
+    return queries
+
+
+def generate(rows: int, query_count: int, seed: int, labeled_count: int = 200) -> None:
+    postings = generate_postings(rows, seed)
+    dataset_path = get_data_file_path(settings.benchmark_dataset_path)
+    corpus_path = get_data_file_path(settings.benchmark_corpus_path)
+    labeled_path = get_data_file_path(settings.benchmark_labeled_queries_path)
+    for path in (dataset_path, corpus_path, labeled_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    postings.to_csv(dataset_path, index=False)
+    with open(corpus_path, "w", encoding="utf-8") as f:
+        for query in generate_queries(postings, query_count, seed):
+            f.write(json.dumps(query) + "\n")
+    with open(labeled_path, "w", encoding="utf-8") as f:
+        for query in generate_labeled_queries(postings, labeled_count, seed):
+            f.write(json.dumps(query) + "\n")
+    print(f"Wrote {rows} postings to {dataset_path} and {query_count} queries to {corpus_path}")
+    print(f"Wrote {labeled_count} labeled queries to {labeled_path}")
+
+
+def percentiles(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1)}
+
+
+async def replay(url: str, queries: list[dict], concurrency: int, rounds: int) -> dict:
+    """Send every query `rounds` times from `concurrency` clients, and time each request."""
+    pending = asyncio.Queue()
+    for _ in range(rounds):
+        for query in queries:
+            pending.put_nowait(query)
+    samples: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        while not pending.empty():
+            query = pending.get_nowait()
+            label = query["kind"] if query["query"] == "job" else query["query"]
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{url}/api/v1/search/{query['query']}", json=query["payload"]) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                samples.setdefault(label, []).append(time.perf_counter() - started)
+            else:
+                errors[label] = errors.get(label, 0) + 1
+
+    timeout = aiohttp.ClientTimeout(total=settings.gateway_request_timeout_seconds)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {
+        label: {"requests": len(samples.get(label, [])), "errors": errors.get(label, 0)}
+        | percentiles(samples.get(label, []))
+        for label in sorted(set(samples) | set(errors))
+    }
+    completed = sum(len(latencies) for latencies in samples.values())
+    return {
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "all": {"requests": completed, "errors": sum(errors.values())}
+        | percentiles([latency for latencies in samples.values() for latency in latencies]),
+        "endpoints": endpoints,
+    }
+
+
+def version() -> str:
+    try:
+        command = ["git", "describe", "--always", "--dirty"]
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        return subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_result(kind: str, result: dict) -> str:
+    results_dir = get_data_file_path(settings.benchmark_results_dir)
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "version": version(), "time": time.time()} | result, f, indent=2)
+    return path
+
+
+def run(url: str, concurrency: int, rounds: int, warmup: int) -> None:
+    with open(get_data_file_path(settings.benchmark_corpus_path), encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    if warmup:
+        asyncio.run(replay(url, queries[:warmup], concurrency, 1))
+    result = asyncio.run(replay(url, queries, concurrency, rounds))
+    result |= {"url": url, "concurrency": concurrency, "rounds": rounds, "queries": len(queries)}
+    print(f"{result['all']['requests']} requests in {result['seconds']}s, {result['throughput_rps']} req/s\n")
+    print(f"{'endpoint':14s} {'requests':>9s} {'errors':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for label, stats in (result["endpoints"] | {"all": result["all"]}).items():
+        print(
+            f"{label:14s} {stats['requests']:9d} {stats['errors']:7d}"
+            + "".join(f" {stats[key] if stats[key] is not None else '-':>8}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+        )
+    print(f"\nSaved to {save_result('run', result)}")
+
+
+def ingest_benchmark(workers: int) -> None:
+    # Imported here, it loads the schema and the categories
+    from superlinked_app.ingest import ingest
+
+    # A checkpoint of its own, the one of the real dataset must not be reset
+    dataset_path = get_data_file_path(settings.benchmark_dataset_path)
+    settings.ingest_checkpoint_path = os.path.join(os.path.dirname(dataset_path), "ingest_checkpoint.sqlite3")
+    settings.ingest_progress_path = os.path.join(os.path.dirname(dataset_path), "ingest_progress.json")
+    state = ingest(dataset_path, reset=True, workers=workers)
+    keys = ("total_rows", "ingested_rows", "embedding_seconds", "rows_per_second", "workers")
+    result = {key: state[key] for key in keys}
+    print(f"{result['ingested_rows']} rows, {result['rows_per_second']} rows/s")
+    print(f"Saved to {save_result('ingest', result)}")
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    """Relative change of every metric the two result files have in common."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(candidate_path, encoding="utf-8") as f:
+        candidate = json.load(f)
+    print(f"{baseline['version']} -> {candidate['version']}\n")
+
+    def flatten(result: dict, prefix: str = "") -> dict:
+        metrics = {}
+        for key, value in result.items():
+            if isinstance(value, dict):
+                metrics |= flatten(value, f"{prefix}{key}.")
+            elif isinstance(value, (int, float)) and key not in RUN_INFO_KEYS:
+                metrics[f"{prefix}{key}"] = value
+        return metrics
+
+    before, after = flatten(baseline), flatten(candidate)
+    for name in sorted(set(before) & set(after)):
+        change = (after[name] - before[name]) / before[name] if before[name] else 0.0
+        print(f"{name:36s} {before[name]:>10} {after[name]:>10} {change:+8.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load tests of the search endpoints.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser("generate", help="Write the synthetic dataset and query corpus.")
+    generate_parser.add_argument("--rows", type=int, default=5000, help="Synthetic postings.")
+    generate_parser.add_argument("--queries", type=int, default=500, help="Queries in the corpus.")
+    generate_parser.add_argument("--labeled", type=int, default=200, help="Labeled queries of search profiles.")
+    generate_parser.add_argument("--seed", type=int, default=0, help="Seed of the dataset and the corpus.")
+    ingest_parser = commands.add_parser("ingest", help="Time the ingestion of the synthetic dataset.")
+    ingest_parser.add_argument("--workers", type=int, default=settings.ingest_workers, help="Local embedding processes.")
+    run_parser = commands.add_parser("run", help="Replay the query corpus.")
+    run_parser.add_argument("--url", default="http://localhost:8000", help="Gateway or Superlinked server.")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight.")
+    run_parser.add_argument("--rounds", type=int, default=3, help="Times the corpus is replayed.")
+    run_parser.add_argument("--warmup", type=int, default=50, help="Queries sent before measuring.")
+    compare_parser = commands.add_parser("compare", help="Compare two saved results.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate(args.rows, args.queries, args.seed, args.labeled)
+    elif args.command == "ingest":
+        ingest_benchmark(args.workers)
+    elif args.command == "run":
+        run(args.url.rstrip("/"), args.concurrency, args.rounds, args.warmup)
+    else:
+        compare(args.baseline, args.candidate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Filter-only browsing of the job postings, straight from the Qdrant payload indices.
+
+A `job` search without description, title and skills has nothing to compare by: the
+Superlinked server would still embed and score the (empty) query against every vector, and
+all results score the same. The gateway answers such searches with a filtered scroll over the
+payload indices Superlinked creates for `index.fields`, so no model runs and no vector is read.
+Pages are walked with the `next_cursor` of the previous response.
+"""
+
+from qdrant_client import AsyncQdrantClient, models
+from superlinked.framework.common.storage_manager.storage_naming import StorageNaming
+
+from superlinked_app.config import settings
+from superlinked_app.filter_planner import ENTITY_ID_PAYLOAD_FIELD, payload_key
+from superlinked_app.filters import filters
+from superlinked_app.index import job_schema
+
+# The query params that need an embedding, a search without them is filter-only
+SIMILARITY_PARAMS = ("description", "title", "skills")
+CURSOR_PARAM = "cursor"
+
+payload_fields = {
+    StorageNaming.generate_field_name_from_schema_field(field): field.name for field in job_schema.schema_fields
+}
+
+
+def is_filter_only(params: dict) -> bool:
+    return not any(params.get(name) for name in SIMILARITY_PARAMS)
+
+
+def payload_filter(params: dict) -> models.Filter | None:
+    """The filters.py filters as Qdrant conditions, `_include` params must match, `_exclude` ones must not."""
+    must, must_not = [], []
+    for item in filters:
+        values = params.get(item.param_name)
+        if not values:
+            continue
+        condition = models.FieldCondition(
+            key=payload_key(item.field_name), match=models.MatchAny(any=values if isinstance(values, list) else [values])
+        )
+        (must_not if item.param_name.endswith("_exclude") else must).append(condition)
+    if not must and not must_not:
+        return None
+    return models.Filter(must=must or None, must_not=must_not or None)
+
+
+def to_entry(point) -> dict:
+    payload = point.payload or {}
+    return {
+        "id": payload.get(ENTITY_ID_PAYLOAD_FIELD, "").split(":", 1)[-1],
+        "fields": {name: payload[key] for key, name in payload_fields.items() if payload.get(key) is not None},
+        # Nothing was compared, every result matches the filters equally
+        "metadata": {"score": 0.0, "partial_scores": [], "vector_parts": []},
+    }
+
+
+async def browse(client: AsyncQdrantClient, params: dict, include_metadata: bool) -> dict:
+    """One page of postings matching the filter params, in storage order."""
+    limit = params.get("limit") or 10
+    points, next_cursor = await client.scroll(
+        settings.qdrant_collection,
+        scroll_filter=payload_filter(params),
+        limit=limit,
+        offset=params.get(CURSOR_PARAM),
+        with_payload=True,
+        with_vectors=False,
+    )
+    body = {"entries": [to_entry(point) for point in points], "next_cursor": next_cursor}
+    if include_metadata:
+        body["metadata"] = {"schema_name": job_schema._schema_name, "search_vector": [], "search_params": params}
+    return body
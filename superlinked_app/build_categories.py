@@ -0,0 +1,154 @@
+"""Build data/categories.json from the dataset in a single streaming pass.
+
+Value frequencies are counted for every field filtered on in filters.py and for the skills,
+and kept in a counts file next to the dataset. `--merge` adds the counts of a file with new
+postings to the existing ones, so the artifact can be updated without re-reading everything.
+
+The artifact keeps the shape the app reads (field -> list of values), with the values sorted
+by frequency and capped per field, plus a `version` that is bumped on every build or merge.
+
+Run it with: python -m superlinked_app.build_categories [--dataset PATH] [--merge PATH]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.preprocess import read_chunks, split_skills
+from superlinked_app.skills_vocab import merge_skill_counts
+
+logger = logging.getLogger(__name__)
+
+# Exported values per field, most frequent first (0 = counted, but not exported).
+# company, search_city and job_location are left out of the artifact by default: their options
+# end up in the natural language query prompt.
+CATEGORY_LIMITS = {
+    "job_level": 5,
+    "job_type": 10,
+    "job_category": 10,
+    "search_country": 7,
+    "state": 51,
+    "search_city": 0,
+    "company": 0,
+    "job_location": 0,
+    "skills_list": settings.skills_vocab_size,
+}
+SKILLS_COLUMN = "job_skills"
+# Location values in the raw data carry stray whitespace and case variations. They are counted as
+# stored, so the value resolver can filter on every spelling, and only grouped for the export
+NORMALIZED_FIELDS = {"state", "search_city", "search_country", "job_location"}
+
+
+def count_values(dataset_path: str) -> tuple[dict[str, Counter], int]:
+    counts = {field: Counter() for field in CATEGORY_LIMITS}
+    rows = 0
+    columns = [field for field in CATEGORY_LIMITS if field != "skills_list"] + [SKILLS_COLUMN]
+    for chunk in read_chunks(dataset_path, columns):
+        rows += len(chunk)
+        for field in CATEGORY_LIMITS:
+            if field == "skills_list":
+                if SKILLS_COLUMN in chunk.columns:
+                    skills = chunk[SKILLS_COLUMN].map(lambda v: v if isinstance(v, list) else split_skills(v))
+                    counts[field].update(skills.dropna().explode().dropna())
+            elif field in chunk.columns:
+                values = chunk[field].dropna().astype(str)
+                counts[field].update(values[values.str.strip() != ""].value_counts().to_dict())
+    return counts, rows
+
+
+def top_values(field: str, counts: Counter) -> list[str]:
+    if field in NORMALIZED_FIELDS:
+        # Rank the stripped values by the postings of all their spellings, the gateway expands them again
+        stripped = Counter()
+        for value, count in counts.items():
+            stripped[value.strip()] += count
+        counts = stripped
+    ordered = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    values, seen = [], set()
+    for value, _ in ordered:
+        key = value.lower() if field in NORMALIZED_FIELDS else value
+        if key not in seen:
+            seen.add(key)
+            values.append(value)
+        if len(values) == CATEGORY_LIMITS[field]:
+            break
+    return values
+
+
+def source_id(dataset_path: str) -> dict:
+    stat = os.stat(dataset_path)
+    return {"path": os.path.abspath(dataset_path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def load_counts(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"version": 0, "rows": 0, "sources": [], "counts": {field: {} for field in CATEGORY_LIMITS}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: dict, **kwargs) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def build(dataset_path: str, merge: bool = False) -> dict:
+    counts_path = get_data_file_path(settings.path_category_counts)
+    state = load_counts(counts_path)
+    source = source_id(dataset_path)
+    if merge and source in state["sources"]:
+        logger.info("%s was already merged, nothing to do", dataset_path)
+        return state
+
+    started = time.perf_counter()
+    new_counts, rows = count_values(dataset_path)
+    if merge:
+        for field, counter in new_counts.items():
+            counter.update(state["counts"].get(field, {}))
+        rows += state["rows"]
+        sources = state["sources"] + [source]
+    else:
+        sources = [source]
+
+    state = {
+        "version": state["version"] + 1,
+        "rows": rows,
+        "sources": sources,
+        "counts": {field: dict(counter.most_common()) for field, counter in new_counts.items()},
+    }
+    write_json(counts_path, state)
+
+    categories = {"version": state["version"], "rows": rows}
+    for field, counter in new_counts.items():
+        if field == "skills_list":
+            # Spelling variants and aliases share one skills space dimension
+            counter = merge_skill_counts(counter)
+        if CATEGORY_LIMITS[field]:
+            categories[field] = top_values(field, counter)
+    write_json(get_data_file_path(settings.path_categories), categories, indent=1)
+    logger.info(
+        "categories v%d built from %d rows in %.1fs", state["version"], rows, time.perf_counter() - started
+    )
+    return state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build categories.json from the dataset.")
+    parser.add_argument("--dataset", default=settings.path_dataset, help="CSV or Parquet dataset to count.")
+    parser.add_argument("--merge", metavar="PATH", help="Add the counts of a file with new postings instead.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.merge:
+        build(get_data_file_path(args.merge), merge=True)
+    else:
+        build(get_data_file_path(args.dataset))
+
+
+if __name__ == "__main__":
+    main()
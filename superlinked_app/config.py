@@ -11,20 +11,144 @@ class Settings(BaseSettings):
 
     # Embedding settings
     text_embedder_name: str = "sentence-transformers/all-mpnet-base-v2"
+    # In-memory LRU cache of embeddings per text space, in entries
+    # (~3.5KB each for all-mpnet-base-v2: 768 float32 values plus the key text)
+    title_embedding_cache_size: int = 20000
+    description_embedding_cache_size: int = 20000
     chunk_size: int = 1000
 
+    # Resumable ingestion (python -m superlinked_app.ingest)
+    ingest_checkpoint_path: str = "data/ingest_checkpoint.sqlite3"
+    ingest_progress_path: str = "data/ingest_progress.json"
+    ingest_request_timeout_seconds: float = 1800.0
+    # Local embedding processes for ingestion (0 = let the Superlinked server embed)
+    ingest_workers: int = 0
+    ingest_batch_size: int = 256  # rows per embedding call in a worker
+    ingest_queue_depth: int = 8  # chunks in flight across all workers
+    ingest_threads_per_worker: int = 0  # torch threads, 0 = CPU count / workers
+    # Streaming ingestion of the JSONL/CSV files dropped here (python -m superlinked_app.stream_ingest):
+    # a batch is sent after this many records, or this long after its first record was read
+    stream_ingest_dir: str = "data/incoming"
+    stream_ingest_batch_size: int = 500
+    stream_ingest_batch_wait_seconds: float = 2.0
+    stream_ingest_poll_seconds: float = 1.0
+    stream_ingest_status_path: str = "data/stream_ingest_status.json"
+    # Shared embedding service of the Superlinked server workers (python -m superlinked_app.embedding_service),
+    # reached over this Unix socket (empty = every worker loads its own model copy)
+    embedding_service_socket: str = ""
+    embedding_service_batch_wait_ms: float = 2.0  # wait for more concurrent texts before encoding
+    embedding_service_max_batch: int = 256  # texts per encode call
+    embedding_service_connect_timeout_seconds: float = 600.0  # wait for the service to load the model
+    # Query embeddings kept by the service for all workers, by model and normalized text (0 = off)
+    embedding_service_cache_size: int = 20000
+
     # Path to the dataset
     path_dataset: str = "data/combined_jobs_dataset.csv"
+    # Output of python -m superlinked_app.preprocess, set PATH_DATASET to it to ingest from Parquet
+    path_dataset_parquet: str = "data/combined_jobs_dataset.parquet"
     path_categories: str = "data/categories.json"
+    # Value frequencies behind categories.json, kept for incremental --merge updates
+    path_category_counts: str = "data/category_counts.json"
+    # Skills kept as skills space dimensions, the rest share the 'other' dimension
+    skills_vocab_size: int = 100
     
     # OpenAI for Natural Language Query
     openai_model: str = "gpt-4.1-nano"
     openai_api_key: SecretStr = SecretStr("")
     
+    # "qdrant", or "in_memory" to run the Superlinked server without Qdrant (benchmarks only)
+    vector_database: str = "qdrant"
+
     # Qdrant vector database
     qdrant_url: str = "http://localhost:6333"
     qdrant_api_key: str = ""
+    qdrant_collection: str = "default"  # Superlinked names the collection after its APP_ID
+    # "flat" searches exactly, "hnsw" uses the HNSW graph (see python -m superlinked_app.storage_profile report)
+    qdrant_search_algorithm: str = "flat"
+    # Storage profile applied with python -m superlinked_app.storage_profile apply
+    qdrant_hnsw_m: int = 16
+    qdrant_hnsw_ef_construct: int = 100  # also the search time ef
+    qdrant_quantization: str = "none"  # none, scalar (int8), product or binary
+    qdrant_product_compression: str = "x16"  # x4, x8, x16, x32 or x64
+    qdrant_quantization_always_ram: bool = True
+    qdrant_vectors_on_disk: bool = False  # memory map the original vectors, only read for rescoring
+    # Filters matching at most this many postings are searched exactly over the matches (pre-filtering)
+    qdrant_prefilter_max_matches: int = 10000
+
+    # Search gateway in front of the Superlinked server
+    gateway_upstream_url: str = "http://localhost:8080"
+    gateway_request_timeout_seconds: float = 60.0
+    # Answer job searches without description, title and skills from the Qdrant payload indices
+    browse_enabled: bool = True
+    # Multi-search endpoint (/api/v1/search/<query>/multi), every item is a separate search of the server
+    multi_search_max_items: int = 1000
+    multi_search_concurrency: int = 8  # searches of a request in flight, LLM extractions included
+    # Length of the job summary in the "card" view of the search results
+    card_summary_chars: int = 300
+    # Searches slower than this are logged with their params (empty path = application log only)
+    slow_query_ms: int = 1000
+    slow_query_log_path: str = "data/slow_queries.jsonl"
+
+    # Natural language query cache (normalized query -> extracted params)
+    nlq_cache_enabled: bool = True
+    nlq_cache_path: str = "data/nlq_cache.sqlite3"
+    nlq_cache_max_entries: int = 50000
+    nlq_cache_ttl_seconds: int = 7 * 24 * 3600
+
+    # Local rule-based parser tried before the LLM (share of query words it must explain)
+    nlq_rule_parser_enabled: bool = True
+    nlq_rule_parser_min_confidence: float = 1.0
+
+    # LLM extractions: concurrency, token bucket rate limit, backoff after a 429 and timeout,
+    # after which the search runs with the raw query as description
+    nlq_llm_concurrency: int = 8
+    nlq_llm_rate_per_second: float = 5.0
+    nlq_llm_burst: int = 10
+    nlq_llm_max_retries: int = 3
+    nlq_llm_backoff_seconds: float = 1.0
+    nlq_llm_timeout_seconds: float = 8.0
+    # Filter fields with more values than this are not listed in the LLM prompt, their values
+    # are taken as written and resolved to the dataset spelling by the gateway
+    nlq_max_param_options: int = 60
+    # Trigram similarity above which a misspelled filter value is resolved to a dataset value
+    value_resolver_min_similarity: float = 0.75
+    # Most values a typeahead request (/api/v1/values/<field>) returns
+    value_typeahead_max_limit: int = 50
+
+    # Gateway startup: polling interval while waiting for the server and Qdrant, rounds of warm-up
+    # searches before /ready reports ready, and the phase timings log (empty = application log only)
+    startup_poll_seconds: float = 2.0
+    startup_warmup_rounds: int = 2
+    startup_timings_path: str = "data/startup_timings.jsonl"
+
+    # Most frequent query titles/descriptions, replayed at gateway startup to warm the embedding caches
+    embedding_warmup_enabled: bool = True
+    embedding_warmup_path: str = "data/query_texts.sqlite3"
+    embedding_warmup_top_n: int = 500
+    # Every text is replayed this many times at once, one per worker cache (WORKER_COUNT of the server),
+    # best effort; 1 is enough when the workers share the cache of the embedding service
+    embedding_warmup_worker_count: int = 4
+
+    # Named weight and limit profiles selected by the "profile" search param
+    # (python -m superlinked_app.search_profiles), and the one of requests without it (empty = query.py defaults)
+    search_profiles_path: str = "data/search_profiles.json"
+    search_profile_default: str = ""
+
+    # Similar jobs served by the gateway from a result cache and precomputed neighbor lists
+    similar_jobs_cache_enabled: bool = True
+    similar_jobs_cache_max_entries: int = 10000
+    similar_jobs_cache_ttl_seconds: int = 3600
+    similar_jobs_precomputed_enabled: bool = True
+    similar_jobs_precomputed_path: str = "data/similar_jobs.sqlite3"
+    similar_jobs_precomputed_top_n: int = 20  # python -m superlinked_app.neighbors
     
+    # Offline benchmarks (python -m superlinked_app.benchmark)
+    benchmark_dataset_path: str = "data/benchmark/job_postings.csv"
+    benchmark_corpus_path: str = "data/benchmark/queries.jsonl"
+    benchmark_results_dir: str = "data/benchmark/results"
+    # Queries with graded relevant postings, swept by python -m superlinked_app.search_profiles evaluate
+    benchmark_labeled_queries_path: str = "data/benchmark/labeled_queries.jsonl"
+
     model_config = SettingsConfigDict(
         env_file=DEFAULT_ENV_FILENAME, env_file_encoding="utf-8"
     )
@@ -37,4 +161,12 @@ def get_env_file_path() -> str:
     return abs_path
 
 
+def get_data_file_path(path: str) -> str:
+    """Resolve a settings path relative to the project root, like the categories file."""
+    if os.path.isabs(path):
+        return path
+    dirname = os.path.dirname(__file__)
+    return os.path.abspath(os.path.join(dirname, "..", path))
+
+
 settings = Settings()
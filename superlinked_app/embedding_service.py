@@ -0,0 +1,323 @@
+"""Shared embedding service for a Superlinked server with several workers.
+
+Every worker process of the Superlinked server (WORKER_COUNT) loads its own copy of the text
+embedding model, so N workers take N times the model memory and startup time. With
+EMBEDDING_SERVICE_SOCKET set, the workers send their text embeddings to this single process
+over a local Unix socket instead: it holds the only model copy and encodes the texts of
+concurrent requests, from all workers, together in micro-batches of up to
+EMBEDDING_SERVICE_MAX_BATCH texts, waiting at most EMBEDDING_SERVICE_BATCH_WAIT_MS for more.
+The embeddings are computed by the same Superlinked engine as in-process, so the vectors do
+not change. Query embeddings are also kept in one LRU cache for all workers, by model and
+whitespace-normalized text (EMBEDDING_SERVICE_CACHE_SIZE), so a query text embedded by one
+worker is not encoded again by the next. Start it next to the server, before the workers:
+
+    python -m superlinked_app.embedding_service &
+    python -m superlinked.server
+
+Each message is a 4-byte big-endian length followed by a JSON object; the embeddings of an
+`embed` request come back as a `shape` header and a second frame of float32 values.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import time
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import numpy as np
+from superlinked.framework.common.precision import Precision
+from superlinked.framework.common.space.embedding.model_based import embedding_engine_manager
+from superlinked.framework.common.space.embedding.model_based.engine.embedding_engine import EmbeddingEngine
+from superlinked.framework.common.space.embedding.model_based.engine.embedding_engine_config import (
+    EmbeddingEngineConfig,
+)
+from superlinked.framework.common.space.embedding.model_based.engine.sentence_transformers_engine import (
+    SentenceTransformersEngine,
+)
+from superlinked.framework.common.space.embedding.model_based.model_handler import ModelHandler, TextModelHandler
+from superlinked.framework.common.space.embedding.model_based.singleton_embedding_engine_manager import (
+    SingletonEmbeddingEngineManager,
+)
+from superlinked.framework.common.util.lazy_property import async_lazy_property
+
+from superlinked_app.config import settings
+from superlinked_app.embedding_warmup import normalize_text
+
+logger = logging.getLogger(__name__)
+
+LENGTH = struct.Struct("!I")
+# Handlers whose engine is replaced by the service client
+SERVICE_HANDLERS = (TextModelHandler.SENTENCE_TRANSFORMERS, ModelHandler.SENTENCE_TRANSFORMERS)
+
+# Texts of one embed request waiting for the next batch, answered through `future`
+EmbedRequest = namedtuple("EmbedRequest", ["engine_key", "is_query", "texts", "future"])
+
+
+def frame(payload: bytes) -> bytes:
+    return LENGTH.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    (size,) = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return await reader.readexactly(size)
+
+
+def engine_params(model_name: str, model_cache_dir, config: EmbeddingEngineConfig) -> dict:
+    return {"model": model_name, "cache_dir": str(model_cache_dir or ""), "precision": config.precision.name}
+
+
+class EmbeddingService:
+    """One engine per model, shared by every connected worker, and the micro-batching queue."""
+
+    def __init__(self, batch_wait_ms: float, max_batch: int, cache_size: int = 0) -> None:
+        self.batch_wait = batch_wait_ms / 1000
+        self.max_batch = max_batch
+        self.engines: dict[tuple, EmbeddingEngine] = {}
+        # (engine key, normalized query text) -> embedding, least recently used first
+        self.cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queue: asyncio.Queue[EmbedRequest] = asyncio.Queue()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self.encode_seconds = 0.0
+
+    def engine(self, params: dict) -> tuple[tuple, EmbeddingEngine]:
+        key = (params["model"], params["cache_dir"], params["precision"])
+        if key not in self.engines:
+            started = time.perf_counter()
+            self.engines[key] = SentenceTransformersEngine(
+                params["model"],
+                Path(params["cache_dir"]) if params["cache_dir"] else None,
+                EmbeddingEngineConfig(precision=Precision[params["precision"]]),
+            )
+            logger.info("Loaded %s in %.1fs", params["model"], time.perf_counter() - started)
+        return key, self.engines[key]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one worker connection, one at a time."""
+        try:
+            while True:
+                request = json.loads(await read_frame(reader))
+                try:
+                    response, data = await self.answer(request)
+                except Exception as e:  # reported to the worker, which raises it in the search
+                    logger.exception("Embedding request failed")
+                    response, data = {"error": repr(e)}, None
+                writer.write(frame(json.dumps(response).encode()))
+                if data is not None:
+                    writer.write(frame(data))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, request: dict) -> tuple[dict, bytes | None]:
+        if request["op"] == "stats":
+            return self.stats(), None
+        key, engine = self.engine(request)
+        if request["op"] == "info":
+            return {"query_prompt": engine.is_query_prompt_supported(), "length": await engine.length}, None
+        self.requests += 1
+        if request["query"] and self.cache_size > 0 and request["texts"]:
+            embeddings = await self.cached_queries(key, request["texts"])
+        else:
+            embeddings = await self.embed(key, request["query"], request["texts"])
+        return {"shape": list(embeddings.shape)}, embeddings.tobytes()
+
+    async def embed(self, engine_key: tuple, is_query: bool, texts: list[str]) -> np.ndarray:
+        """Queue the texts for the next batch and wait for their embeddings."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(EmbedRequest(engine_key, is_query, texts, future))
+        return await future
+
+    async def cached_queries(self, engine_key: tuple, texts: list[str]) -> np.ndarray:
+        """Query embeddings from the shared cache, encoding only the texts no worker asked for yet."""
+        keys = [(engine_key, normalize_text(text)) for text in texts]
+        found = {key: self.cache[key] for key in keys if key in self.cache}
+        for key in found:
+            self.cache.move_to_end(key)
+        # The first spelling of every missing key, a repeated text is encoded once
+        missing: dict[tuple, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.cache_hits += len(keys) - len(missing)
+        self.cache_misses += len(missing)
+        if missing:
+            embeddings = await self.embed(engine_key, True, list(missing.values()))
+            for key, embedding in zip(missing, embeddings):
+                found[key] = self.cache[key] = embedding
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return np.stack([found[key] for key in keys])
+
+    async def run_batches(self) -> None:
+        """Collect the queued requests into batches and encode each model and context in one call."""
+        while True:
+            batch = [await self.queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.batch_wait
+            while size < self.max_batch:
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            groups: dict[tuple, list[EmbedRequest]] = {}
+            for request in batch:
+                groups.setdefault((request.engine_key, request.is_query), []).append(request)
+            for (engine_key, is_query), requests in groups.items():
+                await self.encode(self.engines[engine_key], is_query, requests)
+
+    async def encode(self, engine: EmbeddingEngine, is_query: bool, requests: list[EmbedRequest]) -> None:
+        texts = [text for request in requests for text in request.texts]
+        started = time.perf_counter()
+        try:
+            embeddings = np.asarray(await engine.embed(texts, is_query), dtype=np.float32)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        self.encode_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.texts += len(texts)
+        offset = 0
+        for request in requests:
+            request.future.set_result(embeddings[offset : offset + len(request.texts)])
+            offset += len(request.texts)
+
+    def stats(self) -> dict:
+        return {
+            "models": [key[0] for key in self.engines],
+            "requests": self.requests,
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_texts": self.texts / self.batches if self.batches else 0.0,
+            "encode_seconds": round(self.encode_seconds, 3),
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+async def serve(socket_path: str, preload: str | None) -> None:
+    service = EmbeddingService(
+        settings.embedding_service_batch_wait_ms,
+        settings.embedding_service_max_batch,
+        settings.embedding_service_cache_size,
+    )
+    if preload:
+        # Load the model before the workers ask for it
+        service.engine(engine_params(preload, None, EmbeddingEngineConfig()))
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(service.handle, path=socket_path)
+    logger.info("Embedding service listening on %s", socket_path)
+    async with server:
+        await asyncio.gather(server.serve_forever(), service.run_batches())
+
+
+class ServiceEmbeddingEngine(EmbeddingEngine[EmbeddingEngineConfig]):
+    """Engine of a server worker that embeds through the embedding service instead of a local model."""
+
+    def __init__(self, model_name: str, model_cache_dir, config: EmbeddingEngineConfig) -> None:
+        super().__init__(self._get_clean_model_name(model_name), model_cache_dir, config)
+        self._params = engine_params(self._model_name, model_cache_dir, config)
+        # Open connections per event loop, the spaces are built in a loop of their own at import time
+        self._connections: dict[asyncio.AbstractEventLoop, list[tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        # Blocks until the service has loaded the model, only once per worker and model
+        info = self._info()
+        self._query_prompt = info["query_prompt"]
+        self._length = info["length"]
+
+    def _info(self) -> dict:
+        deadline = time.monotonic() + settings.embedding_service_connect_timeout_seconds
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                    client.connect(settings.embedding_service_socket)
+                    client.sendall(frame(json.dumps(self._params | {"op": "info"}).encode()))
+                    stream = client.makefile("rb")
+                    (size,) = LENGTH.unpack(stream.read(LENGTH.size))
+                    return json.loads(stream.read(size))
+            except (FileNotFoundError, ConnectionError):
+                if time.monotonic() > deadline:
+                    raise
+                logger.info("Waiting for the embedding service on %s", settings.embedding_service_socket)
+                time.sleep(1)
+
+    async def embed(self, inputs, is_query_context: bool) -> list[list[float]]:
+        if any(not isinstance(input_, str) for input_ in inputs):
+            raise ValueError("The embedding service only embeds texts")
+        # The loop of a space build is closed afterwards, its connections are dropped with it
+        for loop in [loop for loop in self._connections if loop.is_closed()]:
+            del self._connections[loop]
+        connections = self._connections.setdefault(asyncio.get_running_loop(), [])
+        if connections:
+            reader, writer = connections.pop()
+        else:
+            reader, writer = await asyncio.open_unix_connection(settings.embedding_service_socket)
+        try:
+            request = self._params | {"op": "embed", "query": is_query_context, "texts": list(inputs)}
+            writer.write(frame(json.dumps(request).encode()))
+            await writer.drain()
+            response = json.loads(await read_frame(reader))
+            if "error" in response:
+                connections.append((reader, writer))
+                raise RuntimeError(f"Embedding service error: {response['error']}")
+            embeddings = np.frombuffer(await read_frame(reader), dtype=np.float32).reshape(response["shape"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            raise
+        connections.append((reader, writer))
+        return embeddings.tolist()
+
+    @async_lazy_property
+    async def length(self) -> int:
+        # Answered by the info request, instead of embedding an empty text when a space is built
+        return self._length
+
+    def is_query_prompt_supported(self) -> bool:
+        return self._query_prompt
+
+    @classmethod
+    def _get_clean_model_name(cls, model_name: str) -> str:
+        # The model name the service loads with the sentence-transformers engine. The engine keys still
+        # differ (calculate_key prefixes the class name), so the model dimension comes from the service
+        return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def use_embedding_service() -> None:
+    """Embed the sentence-transformers spaces of this process through the embedding service."""
+    for handler in SERVICE_HANDLERS:
+        embedding_engine_manager.ENGINE_BY_HANDLER[handler] = ServiceEmbeddingEngine
+
+
+def local_engine_keys() -> list[str]:
+    """Engines of this process that hold a model copy, empty when every space embeds through the service."""
+    # The manager keeps no public list of its engines
+    engines = SingletonEmbeddingEngineManager()._key_to_engine
+    return [key for key, engine in engines.items() if not isinstance(engine, ServiceEmbeddingEngine)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared embedding service for the Superlinked server workers.")
+    parser.add_argument("--socket", default=settings.embedding_service_socket or "/tmp/roleradar_embeddings.sock")
+    parser.add_argument("--preload", default=settings.text_embedder_name, help="Model to load at startup.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(serve(args.socket, args.preload))
+
+
+if __name__ == "__main__":
+    main()
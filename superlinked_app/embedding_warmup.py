@@ -0,0 +1,82 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# Query params that are embedded by a TextSimilaritySpace (see query.py)
+EMBEDDED_TEXT_PARAMS = ("title", "description")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so that trivially different query texts share one embedding cache entry.
+
+    Case is kept on purpose: whether it matters depends on the tokenizer of the configured model.
+    """
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def normalize_text_params(params: dict) -> dict:
+    return {
+        name: normalize_text(value) if name in EMBEDDED_TEXT_PARAMS and isinstance(value, str) else value
+        for name, value in params.items()
+    }
+
+
+class QueryTextLog:
+    """Persistent counter of the title and description texts that queries embed.
+
+    The Superlinked server keeps query embeddings in an in-memory LRU cache per text space,
+    which is empty after every restart. The most frequent texts are stored here, so that the
+    gateway can replay them at startup and the cache is warm before the first user query.
+    """
+
+    def __init__(self, path: str, flush_every: int = 100) -> None:
+        self.flush_every = flush_every
+        self._pending: Counter[tuple[str, str]] = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_texts ("
+            " param TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " hits INTEGER NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " PRIMARY KEY (param, text))"
+        )
+        self._conn.commit()
+
+    def record(self, params: dict) -> None:
+        with self._lock:
+            for name in EMBEDDED_TEXT_PARAMS:
+                value = params.get(name)
+                if isinstance(value, str) and value:
+                    self._pending[(name, value)] += 1
+            should_flush = sum(self._pending.values()) >= self.flush_every
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        now = time.time()
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._conn.executemany(
+                "INSERT INTO query_texts (param, text, hits, last_seen) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (param, text) DO UPDATE SET hits = hits + excluded.hits, last_seen = excluded.last_seen",
+                [(param, text, hits, now) for (param, text), hits in pending.items()],
+            )
+            self._conn.commit()
+
+    def top(self, limit: int) -> list[tuple[str, str]]:
+        """Most frequent (param, text) pairs, most frequent first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT param, text FROM query_texts ORDER BY hits DESC, last_seen DESC LIMIT ?", (limit,)
+            ).fetchall()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
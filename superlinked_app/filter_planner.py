@@ -0,0 +1,124 @@
+"""Payload indexes and selectivity diagnostics of the category filters.
+
+Qdrant plans every filtered search on its own: when the payload index estimates fewer
+matching points than the HNSW `full_scan_threshold`, it scores just those points
+(pre-filtering), otherwise it walks the HNSW graph and checks the filter on the way.
+`python -m superlinked_app.storage_profile apply` sets that threshold from
+QDRANT_PREFILTER_MAX_MATCHES, so a single company or city is answered from its few
+postings instead of an exhaustive scan. All of this only applies with
+QDRANT_SEARCH_ALGORITHM=hnsw: with the default `flat` every search is an exact scan, and the
+plan is `exact`. The gateway makes sure the filter fields have keyword indexes and reports the
+plan it expects in the `x-filter-diagnostics` header, estimated from the value counts of
+`build_categories` without asking Qdrant. It is a diagnostic only: the search algorithm is fixed
+in the Superlinked server for every request, so Qdrant makes its own choice and the gateway
+cannot act on the estimate.
+
+    python -m superlinked_app.filter_planner   # selectivity of every counted filter value
+"""
+
+import json
+import logging
+import os
+from collections import namedtuple
+
+from qdrant_client import AsyncQdrantClient, models
+from superlinked.framework.common.storage_manager.storage_naming import StorageNaming
+
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.filters import filters
+from superlinked_app.index import job_schema
+
+logger = logging.getLogger(__name__)
+
+# Estimated number of matching postings, their share and the search Qdrant is expected to pick
+FilterPlan = namedtuple("FilterPlan", ["matches", "selectivity", "strategy"])
+
+FILTER_FIELDS = list(dict.fromkeys(item.field_name for item in filters))
+# Payload field of the "<schema>:<id>" entity id, see QdrantVDBConnector
+ENTITY_ID_PAYLOAD_FIELD = "__original_entity_id__"
+
+
+def payload_key(field_name: str) -> str:
+    return StorageNaming.generate_field_name_from_schema_field(getattr(job_schema, field_name))
+
+
+async def ensure_payload_indexes(client: AsyncQdrantClient) -> list[str]:
+    """Create the keyword indexes missing on the filter fields, Superlinked creates them with the collection.
+
+    The entity id is indexed too: the job details (`fetch_job`), the deletions of the streaming
+    ingestion (`delete_postings`) and the search profiles look postings up by it, which is a
+    scan of the whole collection per lookup without an index.
+    """
+    try:
+        existing = (await client.get_collection(settings.qdrant_collection)).payload_schema
+    except Exception as e:  # the collection is created by the Superlinked server on its first start
+        logger.warning("Could not check the payload indexes: %s", e)
+        return []
+    created = []
+    for key in [payload_key(field_name) for field_name in FILTER_FIELDS] + [ENTITY_ID_PAYLOAD_FIELD]:
+        if key not in existing:
+            await client.create_payload_index(settings.qdrant_collection, key, models.PayloadSchemaType.KEYWORD)
+            created.append(key)
+    if created:
+        logger.info("Created payload indexes for %s", ", ".join(created))
+    return created
+
+
+class SelectivityEstimator:
+    """Matches of a filter combination, assuming the filter fields are independent."""
+
+    def __init__(self, counts_path: str) -> None:
+        self.rows = 0
+        self.counts: dict[str, dict[str, int]] = {}
+        if os.path.exists(counts_path):
+            with open(counts_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.rows = state["rows"]
+            self.counts = state["counts"]
+
+    def plan(self, params: dict) -> FilterPlan | None:
+        if not self.rows:
+            return None
+        selectivity, filtered = 1.0, False
+        for item in filters:
+            values = params.get(item.param_name)
+            if not values or item.field_name not in self.counts:
+                continue
+            values = values if isinstance(values, list) else [values]
+            share = sum(self.counts[item.field_name].get(value, 0) for value in set(values)) / self.rows
+            selectivity *= 1.0 - share if item.param_name.endswith("_exclude") else share
+            filtered = True
+        if not filtered:
+            return FilterPlan(self.rows, 1.0, "none")
+        matches = round(selectivity * self.rows)
+        if settings.qdrant_search_algorithm.lower() != "hnsw":
+            strategy = "exact"
+        elif matches <= settings.qdrant_prefilter_max_matches:
+            strategy = "prefilter"
+        else:
+            strategy = "hnsw"
+        return FilterPlan(matches, selectivity, strategy)
+
+
+def report() -> None:
+    estimator = SelectivityEstimator(get_data_file_path(settings.path_category_counts))
+    if not estimator.rows:
+        print("No value counts yet, run python -m superlinked_app.build_categories first")
+        return
+    print(f"{estimator.rows} postings, pre-filtering up to {settings.qdrant_prefilter_max_matches} matches")
+    if settings.qdrant_search_algorithm.lower() != "hnsw":
+        print(f"QDRANT_SEARCH_ALGORITHM={settings.qdrant_search_algorithm}: every search is exact, no HNSW plan")
+    print()
+    print(f"{'field':16s} {'values':>7s} {'prefilter':>10s} {'hnsw':>6s} {'largest value':>30s}")
+    for field_name in FILTER_FIELDS:
+        counts = estimator.counts.get(field_name, {})
+        prefiltered = sum(1 for count in counts.values() if count <= settings.qdrant_prefilter_max_matches)
+        largest = max(counts.items(), key=lambda item: item[1], default=("-", 0))
+        print(
+            f"{field_name:16s} {len(counts):7d} {prefiltered:10d} {len(counts) - prefiltered:6d}"
+            f" {f'{largest[0][:20]} ({largest[1]})':>30s}"
+        )
+
+
+if __name__ == "__main__":
+    report()
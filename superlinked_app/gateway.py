@@ -0,0 +1,620 @@
+"""Search gateway in front of the Superlinked server.
+
+The gateway exposes the same `/api/v1/search/<query>` endpoints as the Superlinked
+server and forwards every request to it, answering what it can locally first: the natural
+language parameter extraction of the `job` query (rule-based parser and persistent cache),
+similar jobs (neighbors.py) and filter-only searches (browse.py). The headers and routes
+of every path are described in the README.
+
+Run it with: uvicorn superlinked_app.gateway:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import aiohttp
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from qdrant_client import AsyncQdrantClient
+
+from superlinked_app import nlq
+from superlinked_app.browse import browse, is_filter_only
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.embedding_warmup import QueryTextLog, normalize_text_params
+from superlinked_app.filter_planner import ENTITY_ID_PAYLOAD_FIELD, SelectivityEstimator, ensure_payload_indexes
+from superlinked_app.filters import drop_unset_filters, filters, prompt_options
+from superlinked_app.index import skills_vocabulary
+from superlinked_app.ingest import IngestCheckpoint, read_progress
+from superlinked_app.metrics import (
+    SERVER_TIMING_HEADER,
+    TIMING_HEADER,
+    SearchTimer,
+    current_timer,
+    estimate_tokens,
+    nlq_prompt_tokens,
+    record_params,
+    span,
+)
+from superlinked_app.neighbors import (
+    SIMILAR_JOBS_QUERY_NAME,
+    NeighborCache,
+    NeighborStore,
+    cache_key,
+    is_precomputed_request,
+    sliced_body,
+)
+from superlinked_app.nlq_cache import NLQCache, compute_fingerprint, normalize_query
+from superlinked_app.nlq_limiter import ExtractionLimiter
+from superlinked_app.projection import CARD_FIELDS, SELECT_PARAM, VIEW_PARAM, VIEWS, fetch_job, project
+from superlinked_app.query_parser import RuleBasedParser
+from superlinked_app.search_profiles import PROFILE_HEADER, SearchProfiles
+from superlinked_app.startup import StartupTimer
+from superlinked_app.stream_ingest import export_gauges, read_stream_status
+from superlinked_app.value_resolver import ValueResolver
+
+SEARCH_PATH = "/api/v1/search/{query_name}"
+MULTI_SEARCH_PATH = "/api/v1/search/{query_name}/multi"
+MULTI_ITEMS_PARAM = "items"
+NLQ_QUERY_NAME = "job"
+NATURAL_QUERY_PARAM = "natural_query"
+METADATA_HEADER = "x-include-metadata"
+NLQ_PATH_HEADER = "x-nlq-path"
+NLQ_PATHS = ("rule", "cache", "llm", "coalesced", "fallback")
+SIMILAR_JOBS_PATH_HEADER = "x-similar-jobs-path"
+SEARCH_MODE_HEADER = "x-search-mode"
+FILTER_DIAGNOSTICS_HEADER = "x-filter-diagnostics"
+PROMPT_TOKENS_HEADER = "x-nlq-prompt-tokens"
+
+logger = logging.getLogger(__name__)
+
+# Params that are never produced by the LLM extraction, so they must not be cached
+NON_EXTRACTED_PARAMS = {NATURAL_QUERY_PARAM, "limit"}
+
+
+def nlq_prompt_parts() -> list[str]:
+    """The static part of the extraction prompt: system prompt, param descriptions and options."""
+    return [
+        nlq.system_prompt,
+        nlq.description_description,
+        nlq.title_description,
+        nlq.skills_description,
+        *[f"{item.param_name}: {item.description} {prompt_options(item) or ''}" for item in filters],
+    ]
+
+
+def nlq_fingerprint() -> str:
+    """Fingerprint of everything the LLM sees, so prompt or category changes invalidate the cache."""
+    with open(get_data_file_path(settings.path_categories), "rb") as f:
+        categories_bytes = f.read()
+    return compute_fingerprint(settings.openai_model, *nlq_prompt_parts(), categories_bytes)
+
+
+def extracted_params(search_params: dict, request_params: dict) -> dict:
+    """Keep only the params the LLM filled in, dropping the ones the client sent explicitly."""
+    return {
+        name: value
+        for name, value in search_params.items()
+        if name not in request_params and name not in NON_EXTRACTED_PARAMS and not name.endswith("__")
+    }
+
+
+def normalize_params(params: dict) -> dict:
+    """Normalized texts, vocabulary skill spellings and dataset filter values.
+
+    Equal queries share embeddings and skill dimensions, and free-text companies and cities match the postings.
+    """
+    params = normalize_text_params(app.state.value_resolver.resolve(drop_unset_filters(params)))
+    if isinstance(params.get("skills"), (str, list)):
+        params["skills"] = skills_vocabulary.canonicalize(params["skills"])
+    return params
+
+
+def without_natural_query(payload: dict) -> dict:
+    return {name: value for name, value in payload.items() if name != NATURAL_QUERY_PARAM}
+
+
+def record_path(path: str, started: float) -> dict:
+    stats = app.state.nlq_paths[path]
+    stats["requests"] += 1
+    stats["total_ms"] += (time.perf_counter() - started) * 1000
+    return {NLQ_PATH_HEADER: path}
+
+
+async def forward(query_name: str, payload: dict, include_metadata: bool) -> tuple[int, dict]:
+    """POST a search to the Superlinked server and return its status and JSON body."""
+    url = f"{settings.gateway_upstream_url}/api/v1/search/{query_name}"
+    headers = {METADATA_HEADER: "true" if include_metadata else "false"}
+    with span("upstream"):
+        async with app.state.http.post(url, json=payload, headers=headers) as response:
+            status, raw = response.status, await response.read()
+    with span("decode"):
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            body = {"detail": raw.decode(errors="replace")}
+    return status, body
+
+
+async def structured_search(params: dict, include_metadata: bool) -> tuple[int, dict, dict]:
+    """Run a `job` search with structured params, by payload scan when there is nothing to embed."""
+    record_params(params)
+    if settings.browse_enabled and is_filter_only(params):
+        with span("browse"):
+            body = await browse(app.state.qdrant, params, include_metadata)
+        return 200, body, {SEARCH_MODE_HEADER: "browse"}
+    status, body = await forward(NLQ_QUERY_NAME, params, include_metadata)
+    headers = {SEARCH_MODE_HEADER: "vector"}
+    plan = app.state.selectivity.plan(params) if app.state.selectivity is not None else None
+    if plan is not None:
+        headers[FILTER_DIAGNOSTICS_HEADER] = f"expected={plan.strategy}; matches={plan.matches}"
+    return status, body, headers
+
+
+async def run_blocking(function, *args):
+    """Run a blocking call (the SQLite stores) in the default executor, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+async def similar_jobs(payload: dict, include_metadata: bool) -> tuple[int, dict, dict]:
+    """Serve a similar-jobs request from the precomputed lists or the cache, else search and cache it."""
+    record_params(payload)
+    id_ = str(payload.get("id"))
+    store, cache = app.state.neighbor_store, app.state.neighbor_cache
+    key = cache_key(payload, include_metadata)
+    limit = payload.get("limit", 10)
+    with span("neighbors"):
+        posting_hash = await run_blocking(app.state.checkpoint.row_hash, id_)
+        store_version = await run_blocking(store.version) if store is not None else None
+        if store is not None and is_precomputed_request(payload):
+            body = await run_blocking(store.get, id_, posting_hash, limit)
+            if body is not None:
+                body = sliced_body(body, limit, include_metadata)
+                return 200, body, {SIMILAR_JOBS_PATH_HEADER: "precomputed"}
+        if cache is not None:
+            body = cache.get(key, posting_hash, store_version)
+            if body is not None:
+                return 200, body, {SIMILAR_JOBS_PATH_HEADER: "cache"}
+
+    status, body = await forward(SIMILAR_JOBS_QUERY_NAME, payload, include_metadata)
+    if status == 200 and cache is not None:
+        cache.put(key, posting_hash, body, store_version)
+    return status, body, {SIMILAR_JOBS_PATH_HEADER: "search"}
+
+
+def search_path(headers: dict) -> str:
+    """The path a search was answered by, for the metrics."""
+    path = headers.get(NLQ_PATH_HEADER) or headers.get(SIMILAR_JOBS_PATH_HEADER) or headers.get(SEARCH_MODE_HEADER)
+    return path or "search"
+
+
+async def view_search(query_name: str, payload: dict, include_metadata: bool) -> tuple[int, dict, dict]:
+    """Run a search with the params of its profile and return its results in the view the request asks for."""
+    view = payload.pop(VIEW_PARAM, "full")
+    if view not in VIEWS:
+        return 422, {"detail": f"Unknown view {view!r}, expected one of {VIEWS}"}, {}
+    try:
+        payload, profile = app.state.search_profiles.apply(query_name, payload)
+    except KeyError as e:
+        return 422, {"detail": f"Unknown profile {e.args[0]!r}"}, {}
+    if view == "card" and query_name == NLQ_QUERY_NAME:
+        # Let the server select the card fields, similar-jobs keeps its precomputed full results
+        payload.setdefault(SELECT_PARAM, CARD_FIELDS)
+    status, body, headers = await run_search(query_name, payload, include_metadata)
+    if status == 200:
+        with span("serialize"):
+            body = project(body, view)
+    if profile is not None:
+        headers = headers | {PROFILE_HEADER: profile}
+    return status, body, headers
+
+
+async def run_search(query_name: str, payload: dict, include_metadata: bool) -> tuple[int, dict, dict]:
+    """Answer a search from the fastest path that applies, as status, body and response headers."""
+    started = time.perf_counter()
+    natural_query = payload.get(NATURAL_QUERY_PARAM)
+    cache = app.state.nlq_cache
+    parser = app.state.rule_parser
+
+    if query_name == SIMILAR_JOBS_QUERY_NAME:
+        return await similar_jobs(payload, include_metadata)
+    if query_name != NLQ_QUERY_NAME:
+        record_params(payload)
+        status, body = await forward(query_name, payload, include_metadata)
+        return status, body, {}
+    if not natural_query:
+        params = normalize_params(payload)
+        await record_query_texts(params)
+        return await structured_search(params, include_metadata)
+
+    # Explicit request params always win over the locally parsed or cached extraction
+    request_params = without_natural_query(payload)
+    local_params, path = None, None
+    with span("parse"):
+        if parser is not None:
+            parsed = parser.parse(natural_query)
+            if parsed.params and parsed.confidence >= settings.nlq_rule_parser_min_confidence:
+                local_params, path = parsed.params, "rule"
+        if local_params is None and cache is not None:
+            local_params, path = await run_blocking(cache.get, natural_query), "cache"
+
+    if local_params is not None:
+        params = normalize_params(local_params | request_params)
+        await record_query_texts(params)
+        status, body, headers = await structured_search(params, include_metadata)
+        if status == 200 and include_metadata:
+            body["metadata"]["search_params"][NATURAL_QUERY_PARAM] = natural_query
+        return status, body, record_path(path, started) | headers
+
+    # Let the Superlinked server run the LLM extraction, identical queries in flight share one
+    record_params(payload)
+    limiter = app.state.nlq_limiter
+    task, started_here = limiter.run(
+        normalize_query(natural_query), lambda: extract_and_search(query_name, payload, natural_query)
+    )
+    try:
+        # Shielded: a timed out extraction keeps running and still fills the cache
+        result = await asyncio.wait_for(asyncio.shield(task), settings.nlq_llm_timeout_seconds)
+    except asyncio.TimeoutError:
+        limiter.timeouts += 1
+        result = None
+    if result is None:
+        # Timed out or failed, search with the raw query
+        status, body, extraction, path = 200, None, {"description": natural_query}, "fallback"
+    else:
+        status, body, extraction = result
+        path = "llm" if started_here else "coalesced"
+    if status != 200:
+        return status, body, record_path(path, started)
+    if started_here and body is not None:
+        record_params(body["metadata"]["search_params"])
+        if not include_metadata:
+            body = {name: value for name, value in body.items() if name != "metadata"}
+        tokens = app.state.nlq_prompt["static_tokens"] + estimate_tokens(natural_query)
+        return status, body, record_path(path, started) | {PROMPT_TOKENS_HEADER: str(tokens)}
+
+    # Search with the params extracted for another request, or with the raw query
+    params = normalize_params(extraction | request_params)
+    status, body, headers = await structured_search(params, include_metadata)
+    if status == 200 and include_metadata:
+        body["metadata"]["search_params"][NATURAL_QUERY_PARAM] = natural_query
+    return status, body, record_path(path, started) | headers
+
+
+async def record_query_texts(params: dict) -> None:
+    """Count the embedded texts of a search, in a thread since the count is flushed to SQLite."""
+    if app.state.query_texts is not None:
+        await run_blocking(app.state.query_texts.record, params)
+
+
+async def extract_and_search(query_name: str, payload: dict, natural_query: str) -> tuple[int, dict, dict | None]:
+    """Search with the LLM extraction on the Superlinked server, and read the extracted params back."""
+    tokens = app.state.nlq_prompt["static_tokens"] + estimate_tokens(natural_query)
+    app.state.nlq_prompt["extractions"] += 1
+    app.state.nlq_prompt["tokens_total"] += tokens
+    nlq_prompt_tokens.inc(tokens)
+    status, body = await forward(query_name, payload, include_metadata=True)
+    if status != 200:
+        return status, body, None
+    search_params = body["metadata"]["search_params"]
+    extracted = extracted_params(search_params, payload)
+    extraction = normalize_params(extracted)
+    if app.state.nlq_cache is not None:
+        await run_blocking(app.state.nlq_cache.put, natural_query, extraction)
+    await record_query_texts(normalize_text_params(search_params))
+    if app.state.value_resolver.resolve(extracted) != extracted:
+        # The server filtered on the company or city as the LLM wrote it, search again with the dataset spelling
+        status, body, _ = await structured_search(
+            normalize_params(extraction | without_natural_query(payload)), include_metadata=True
+        )
+        if status == 200:
+            body["metadata"]["search_params"][NATURAL_QUERY_PARAM] = natural_query
+    return status, body, extraction
+
+
+async def wait_for_upstream() -> None:
+    health_url = f"{settings.gateway_upstream_url}/health"
+    while True:
+        try:
+            async with app.state.http.get(health_url) as response:
+                if response.status == 200:
+                    return
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        await asyncio.sleep(settings.startup_poll_seconds)
+
+
+async def wait_for_collection() -> None:
+    """Wait for the collection the Superlinked server creates, then for the filter payload indexes."""
+    while True:
+        try:
+            if await app.state.qdrant.collection_exists(settings.qdrant_collection):
+                break
+        except Exception as e:  # Qdrant still starting
+            logger.info("Waiting for Qdrant: %s", e)
+        await asyncio.sleep(settings.startup_poll_seconds)
+    await ensure_payload_indexes(app.state.qdrant)
+
+
+async def warmup_searches() -> list[tuple[str, dict]]:
+    """A synthetic search for every query of the Superlinked server, without the LLM extraction.
+
+    `similar-jobs` needs an ingested posting and is left out while the collection is empty.
+    """
+    search = {"title": "Data Analyst", "description": "SQL and Python data analysis", "skills": ["SQL"], "limit": 1}
+    searches = [(NLQ_QUERY_NAME, search), ("job-debug", {})]
+    points, _ = await app.state.qdrant.scroll(
+        settings.qdrant_collection, limit=1, with_payload=[ENTITY_ID_PAYLOAD_FIELD], with_vectors=False
+    )
+    if points:
+        id_ = str(points[0].payload[ENTITY_ID_PAYLOAD_FIELD]).split(":", 1)[-1]
+        searches.append((SIMILAR_JOBS_QUERY_NAME, {"id": id_, "limit": 1}))
+    return searches
+
+
+async def warm_up_queries() -> None:
+    """Run the warm-up searches, so the first user query finds the model loaded and its kernels warm."""
+    searches = await warmup_searches()
+    for _ in range(settings.startup_warmup_rounds):
+        for query_name, payload in searches:
+            try:
+                status, body = await forward(query_name, payload, include_metadata=True)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, body = 502, {"detail": repr(e)}
+            if status != 200:
+                logger.warning("Warm-up search of %s failed with %d: %s", query_name, status, body)
+
+
+async def warm_up_embeddings(query_texts: QueryTextLog) -> None:
+    """Replay the most frequent query texts, once the Superlinked server is up.
+
+    Each text is searched on its own with limit=1, which is enough to put its embedding
+    into the LRU cache of the corresponding text space. With the embedding service, one
+    replay fills its cache, shared by every worker. Otherwise every worker has its own caches
+    and the text is sent EMBEDDING_WARMUP_WORKER_COUNT times at once, best effort: the workers
+    accept the concurrent connections in turn, usually but not always one each.
+    """
+
+    async def replay(param: str, text: str) -> bool:
+        try:
+            await forward(NLQ_QUERY_NAME, {param: text, "limit": 1}, include_metadata=False)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+        return True
+
+    texts = await run_blocking(query_texts.top, settings.embedding_warmup_top_n)
+    for param, text in texts:
+        replays = [replay(param, text) for _ in range(settings.embedding_warmup_worker_count)]
+        if not all(await asyncio.gather(*replays)):
+            logger.warning("Embedding warm-up request failed for %s", param)
+    logger.info("Warmed up %d query embeddings", len(texts))
+
+
+async def start_up(startup: StartupTimer) -> None:
+    """Go through the startup phases in the background, `/ready` reports the gateway ready after the warm-up."""
+    with startup.phase("upstream"):
+        await wait_for_upstream()
+    with startup.phase("collection"):
+        await wait_for_collection()
+    with startup.phase("warmup"):
+        await warm_up_queries()
+    startup.mark_ready()
+    if app.state.query_texts is not None:
+        with startup.phase("embedding_cache"):
+            await warm_up_embeddings(app.state.query_texts)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.startup = startup = StartupTimer()
+    with startup.phase("load"):
+        timeout = aiohttp.ClientTimeout(total=settings.gateway_request_timeout_seconds)
+        app.state.http = aiohttp.ClientSession(timeout=timeout)
+        app.state.nlq_cache = None
+        app.state.nlq_paths = {path: {"requests": 0, "total_ms": 0.0} for path in NLQ_PATHS}
+        app.state.nlq_limiter = ExtractionLimiter(
+            concurrency=settings.nlq_llm_concurrency,
+            rate=settings.nlq_llm_rate_per_second,
+            burst=settings.nlq_llm_burst,
+            max_retries=settings.nlq_llm_max_retries,
+            backoff_seconds=settings.nlq_llm_backoff_seconds,
+        )
+        if settings.nlq_cache_enabled:
+            app.state.nlq_cache = NLQCache(
+                get_data_file_path(settings.nlq_cache_path),
+                fingerprint=nlq_fingerprint(),
+                max_entries=settings.nlq_cache_max_entries,
+                ttl_seconds=settings.nlq_cache_ttl_seconds,
+            )
+        app.state.selectivity = SelectivityEstimator(get_data_file_path(settings.path_category_counts))
+        app.state.value_resolver = ValueResolver(get_data_file_path(settings.path_category_counts))
+        app.state.rule_parser = RuleBasedParser(app.state.value_resolver) if settings.nlq_rule_parser_enabled else None
+        app.state.search_profiles = SearchProfiles(get_data_file_path(settings.search_profiles_path))
+        app.state.nlq_prompt = {
+            "static_tokens": estimate_tokens("\n".join(nlq_prompt_parts())),
+            "extractions": 0,
+            "tokens_total": 0,
+        }
+        app.state.qdrant = AsyncQdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key or None)
+        app.state.checkpoint = IngestCheckpoint(get_data_file_path(settings.ingest_checkpoint_path))
+        export_gauges()
+        app.state.neighbor_cache = None
+        app.state.neighbor_store = None
+        if settings.similar_jobs_cache_enabled:
+            app.state.neighbor_cache = NeighborCache(
+                settings.similar_jobs_cache_max_entries, settings.similar_jobs_cache_ttl_seconds
+            )
+        if settings.similar_jobs_precomputed_enabled:
+            app.state.neighbor_store = NeighborStore(get_data_file_path(settings.similar_jobs_precomputed_path))
+        app.state.query_texts = None
+        if settings.embedding_warmup_enabled:
+            app.state.query_texts = QueryTextLog(get_data_file_path(settings.embedding_warmup_path))
+    starting = asyncio.create_task(start_up(startup))
+    yield
+    starting.cancel()
+    if app.state.query_texts is not None:
+        await run_blocking(app.state.query_texts.close)
+    if app.state.neighbor_store is not None:
+        app.state.neighbor_store.close()
+    app.state.checkpoint.close()
+    await app.state.qdrant.close()
+    await app.state.http.close()
+
+
+app = FastAPI(title="RoleRadar search gateway", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {"message": "OK"}
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness: 200 once the gateway is warm, 503 with the current startup phase before."""
+    report = app.state.startup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/ingest/progress")
+async def ingest_progress() -> dict:
+    return read_progress()
+
+
+@app.get("/ingest/stream")
+async def stream_ingest_status() -> dict:
+    """Lag and totals of the streaming ingestion process (python -m superlinked_app.stream_ingest)."""
+    return read_stream_status()
+
+
+@app.get("/nlq/stats")
+async def nlq_stats() -> dict:
+    cache = app.state.nlq_cache
+    total = sum(stats["requests"] for stats in app.state.nlq_paths.values())
+    paths = {
+        path: {
+            "requests": stats["requests"],
+            "share": stats["requests"] / total if total else 0.0,
+            "avg_ms": stats["total_ms"] / stats["requests"] if stats["requests"] else 0.0,
+        }
+        for path, stats in app.state.nlq_paths.items()
+    }
+    return {
+        "paths": paths,
+        "cache": await run_blocking(cache.stats) if cache is not None else None,
+        "limiter": app.state.nlq_limiter.stats(),
+        "prompt": app.state.nlq_prompt,
+    }
+
+
+@app.get("/similar-jobs/stats")
+async def similar_jobs_stats() -> dict:
+    cache, store = app.state.neighbor_cache, app.state.neighbor_store
+    return {
+        "cache": cache.stats() if cache is not None else None,
+        "precomputed": await run_blocking(store.stats) if store is not None else None,
+    }
+
+
+@app.post("/api/v1/browse")
+async def browse_jobs(request: Request) -> JSONResponse:
+    """Filter-only listing with cursor pagination, the similarity params are ignored."""
+    payload = await request.json()
+    include_metadata = request.headers.get(METADATA_HEADER, "false").lower() == "true"
+    if not settings.browse_enabled:
+        return JSONResponse({"detail": "Browsing is disabled"}, status_code=404)
+    return JSONResponse(await browse(app.state.qdrant, payload, include_metadata))
+
+
+@app.get("/api/v1/jobs/{job_id}")
+async def job_details(job_id: str) -> JSONResponse:
+    """Every field of one posting, for the details of a result card."""
+    entry = await fetch_job(app.state.qdrant, job_id)
+    if entry is None:
+        return JSONResponse({"detail": f"Job {job_id} not found"}, status_code=404)
+    return JSONResponse(entry)
+
+
+@app.get("/api/v1/values/{field_name}")
+async def filter_values(field_name: str, prefix: str = "", limit: int = 10) -> JSONResponse:
+    """Typeahead of the dataset values of a filter field, answered from the local value index."""
+    limit = max(1, min(limit, settings.value_typeahead_max_limit))
+    values = app.state.value_resolver.complete(field_name, prefix, limit)
+    if values is None:
+        return JSONResponse({"detail": f"No values indexed for {field_name!r}"}, status_code=404)
+    return JSONResponse({"field": field_name, "values": values})
+
+
+@app.get("/api/v1/profiles")
+async def search_profiles() -> dict:
+    """The registered search profiles, with the quality and latency they were measured with."""
+    return {"default": settings.search_profile_default or None, "profiles": app.state.search_profiles.profiles}
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.post(SEARCH_PATH)
+async def search(query_name: str, request: Request) -> JSONResponse:
+    payload = await request.json()
+    include_metadata = request.headers.get(METADATA_HEADER, "false").lower() == "true"
+    timer = SearchTimer(query_name)
+    token = current_timer.set(timer)
+    try:
+        status, body, headers = await view_search(query_name, payload, include_metadata)
+        with timer.span("serialize"):
+            response = JSONResponse(body, status_code=status, headers=headers)
+    finally:
+        current_timer.reset(token)
+    if request.headers.get(TIMING_HEADER, "false").lower() == "true":
+        response.headers[SERVER_TIMING_HEADER] = timer.server_timing()
+    timer.observe(search_path(headers), status)
+    return response
+
+
+@app.post(MULTI_SEARCH_PATH)
+async def multi_search(query_name: str, request: Request) -> JSONResponse:
+    """Fan the searches of `items` out concurrently, params outside of `items` apply to every item.
+
+    Results come back in input order, each with its own status and either a body or an error;
+    an item that fails does not fail the others. Identical items are searched once. This is not
+    a batched search: the Superlinked server has no batch API for its queries, so every item is
+    embedded and searched by its own request. It saves the round trips of the client, not the
+    embedding or Qdrant work.
+    """
+    payload = await request.json()
+    include_metadata = request.headers.get(METADATA_HEADER, "false").lower() == "true"
+    items = payload.get(MULTI_ITEMS_PARAM)
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return JSONResponse({"detail": f"{MULTI_ITEMS_PARAM!r} must be a list of param objects"}, status_code=422)
+    if len(items) > settings.multi_search_max_items:
+        return JSONResponse({"detail": f"At most {settings.multi_search_max_items} items per request"}, status_code=422)
+    shared = {name: value for name, value in payload.items() if name != MULTI_ITEMS_PARAM}
+    semaphore = asyncio.Semaphore(settings.multi_search_concurrency)
+
+    async def search_item(params: dict) -> dict:
+        # Runs in a task of its own, so the timer does not leak into the other items
+        async with semaphore:
+            timer = SearchTimer(query_name)
+            current_timer.set(timer)
+            try:
+                status, body, headers = await view_search(query_name, params, include_metadata)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, body, headers = 502, {"detail": f"Search failed: {e!r}"}, {}
+            except Exception as e:
+                # A bad item (params the gateway cannot handle) only fails its own result
+                logger.exception("Search of a multi-search item failed")
+                status, body, headers = 500, {"detail": f"Search failed: {e!r}"}, {}
+            timer.observe(search_path(headers), status)
+        result = {"status": status, "path": search_path(headers)}
+        return result | ({"body": body} if status == 200 else {"error": body})
+
+    keys = [json.dumps(shared | item, sort_keys=True, default=str) for item in items]
+    unique = {key: shared | item for key, item in zip(keys, items)}
+    results = dict(zip(unique, await asyncio.gather(*(search_item(params) for params in unique.values()))))
+    return JSONResponse({"results": [results[key] for key in keys]})
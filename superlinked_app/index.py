@@ -1,10 +1,14 @@
 from superlinked import framework as sl
 import json
 import os
+from functools import lru_cache
 
 from superlinked_app.config import settings
+from superlinked_app.skills_vocab import SkillVocabulary
 
-# Load categories from JSON file
+# Load categories from JSON file (built by python -m superlinked_app.build_categories),
+# parsed once and shared with filters.py
+@lru_cache(maxsize=1)
 def load_categories():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     # Use settings.path_categories for the path
@@ -13,6 +17,8 @@ def load_categories():
         return json.load(f)
 
 categories = load_categories()
+# Skill spellings merged into one dimension each, see skills_vocab.py
+skills_vocabulary = SkillVocabulary(categories['skills_list'])
 
 
 class JobPosting(sl.Schema):
@@ -46,18 +52,20 @@ job_schema = JobPosting()
 description_space = sl.TextSimilaritySpace(
     text=job_schema.job_summary,
     model=settings.text_embedder_name,
+    cache_size=settings.description_embedding_cache_size,
 )
 
 # Job title - also contains important semantic information
 title_space = sl.TextSimilaritySpace(
     text=job_schema.job_title,
     model=settings.text_embedder_name,
+    cache_size=settings.title_embedding_cache_size,
 )
 
 # Job skills - important for matching requirements
 skills_space = sl.CategoricalSimilaritySpace(
     category_input=job_schema.job_skills,
-    categories=categories['skills_list']
+    categories=skills_vocabulary.skills
 )
 
 # Index - composition of spaces and filtering fields
@@ -81,4 +89,17 @@ index = sl.Index(
         job_schema.company,             # Company name
         job_schema.job_link,            # Job link
     ],
-)
\ No newline at end of file
+)
+
+
+def build_vector_database():
+    """Vector database of the index, for the server (api.py) and the ingestion workers."""
+    if settings.vector_database == "in_memory":
+        # Stand-in without Qdrant for offline benchmarks (python -m superlinked_app.benchmark)
+        return sl.InMemoryVectorDatabase()
+    return sl.QdrantVectorDatabase(
+        url=settings.qdrant_url,
+        api_key=settings.qdrant_api_key,
+        search_algorithm=sl.SearchAlgorithm[settings.qdrant_search_algorithm.upper()],
+        prefer_grpc=True,
+    )
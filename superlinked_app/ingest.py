@@ -0,0 +1,465 @@
+"""Resumable, checkpointed ingestion of the job postings dataset.
+
+Reads the dataset in `chunk_size` chunks like the `job_postings` DataLoaderSource, but
+sends each chunk to the REST ingest endpoint of the Superlinked server and records it in
+a SQLite checkpoint once the server has accepted it. Re-running the command resumes after
+the last committed chunk, and rows whose id was already ingested with the same content
+are skipped, so re-runs over an updated dataset are incremental.
+
+Run it with: python -m superlinked_app.ingest [--reset] [--workers N]
+With `--workers N` (or INGEST_WORKERS) the chunks are embedded by N local processes,
+each with its own model, which write to Qdrant directly instead of going through the server.
+The workers only load the index (not api.py, so no embedding service and no REST executor)
+and upsert their own batches in parallel. The vectors are not sent back to this process for
+a single upsert: that would pickle every vector across processes and serialize the writes,
+and only a Superlinked executor knows the payload layout of the points. The price is a Qdrant
+connection and a model copy per worker, where the server path has one of each.
+Progress and ETA are written to `ingest_progress_path` and served by the gateway at /ingest/progress.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import pandas as pd
+import requests
+
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.index import job_schema, skills_vocabulary
+from superlinked_app.neighbors import NeighborStore
+from superlinked_app.preprocess import count_rows, read_chunks
+
+INGEST_PATH = "/api/v1/ingest/job_posting"
+# Dataset columns embedded by description_space and title_space
+EMBEDDED_TEXT_COLUMNS = ("job_summary", "job_title")
+
+logger = logging.getLogger(__name__)
+
+# A dataset chunk that is not committed yet; `rows` are the new or changed rows to embed
+PendingChunk = namedtuple(
+    "PendingChunk", ["chunk_index", "row_offset", "content_hash", "ids", "hashes", "rows"]
+)
+
+
+def schema_columns() -> list[str]:
+    """Dataset columns that end up in the index: the id and every JobPosting field."""
+    return [job_schema.id.name] + [field.name for field in job_schema.schema_fields]
+
+
+def row_hashes(chunk: pd.DataFrame) -> pd.Series:
+    """Content hash of every row, computed over the schema columns only."""
+    hashable = chunk.apply(lambda column: column.map(lambda v: "\x1f".join(v) if isinstance(v, list) else v))
+    return pd.util.hash_pandas_object(hashable, index=False).astype("uint64").astype(str)
+
+
+def to_records(chunk: pd.DataFrame) -> list[dict]:
+    """JSON records for the ingest endpoint, with missing values as null."""
+    chunk = chunk.astype(object).where(chunk.notna(), None)
+    chunk[job_schema.id.name] = chunk[job_schema.id.name].astype(str)
+    return chunk.to_dict(orient="records")
+
+
+class IngestCheckpoint:
+    """SQLite record of the committed chunks and of the content hash of every ingested row."""
+
+    def __init__(self, path: str) -> None:
+        # The gateway looks up row hashes from executor threads, every access takes the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_index INTEGER PRIMARY KEY,"
+            " row_offset INTEGER NOT NULL,"
+            " row_count INTEGER NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " ingested_rows INTEGER NOT NULL,"
+            " committed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rows (id TEXT PRIMARY KEY, content_hash TEXT NOT NULL)")
+        # Bytes of every drop directory file already applied by superlinked_app.stream_ingest
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stream_files ("
+            " path TEXT PRIMARY KEY,"
+            " offset INTEGER NOT NULL,"
+            " records INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def is_committed(self, chunk_index: int, row_offset: int, row_count: int, content_hash: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT row_offset, row_count, content_hash FROM chunks WHERE chunk_index = ?", (chunk_index,)
+            ).fetchone()
+        return row == (row_offset, row_count, content_hash)
+
+    def changed_rows(self, ids: list[str], hashes: list[str]) -> list[bool]:
+        """For each row, whether it is new or its content changed since it was ingested."""
+        known: dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                known.update(
+                    self._conn.execute(
+                        f"SELECT id, content_hash FROM rows WHERE id IN ({placeholders})", batch
+                    ).fetchall()
+                )
+        return [known.get(id_) != content_hash for id_, content_hash in zip(ids, hashes)]
+
+    def commit(
+        self,
+        chunk_index: int,
+        row_offset: int,
+        content_hash: str,
+        ids: list[str],
+        hashes: list[str],
+        ingested_rows: int,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (id, content_hash) VALUES (?, ?)", list(zip(ids, hashes))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)",
+                (chunk_index, row_offset, len(ids), content_hash, ingested_rows, time.time()),
+            )
+
+    def stream_offsets(self) -> dict[str, tuple[int, int]]:
+        """Offset and record count applied so far, per drop directory file."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, offset, records FROM stream_files").fetchall()
+        return {path: (offset, records) for path, offset, records in rows}
+
+    def commit_stream(
+        self, offsets: dict[str, tuple[int, int]], ids: list[str], hashes: list[str], deleted_ids: list[str]
+    ) -> None:
+        """Record a streamed batch: the upserted and deleted rows together with the file offsets."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (id, content_hash) VALUES (?, ?)", list(zip(ids, hashes))
+            )
+            self._conn.executemany("DELETE FROM rows WHERE id = ?", [(id_,) for id_ in deleted_ids])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO stream_files VALUES (?, ?, ?, ?)",
+                [(path, offset, records, now) for path, (offset, records) in offsets.items()],
+            )
+
+    def row_hash(self, id_: str) -> str | None:
+        """Content hash the posting was last ingested with, None if it never was."""
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM rows WHERE id = ?", (id_,)).fetchone()
+        return row[0] if row else None
+
+    def ingested_rows(self) -> list[tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute("SELECT id, content_hash FROM rows").fetchall()
+
+    def reset(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM rows")
+            self._conn.execute("DELETE FROM stream_files")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class DuplicateTextStats:
+    """Counts the texts per embedded column that repeat a text of the same chunk.
+
+    Only a diagnostic: the rows are still sent as they are, and whether a repeat costs a
+    transformer forward pass depends on the LRU embedding cache of the text space
+    (TITLE/DESCRIPTION_EMBEDDING_CACHE_SIZE). Counting per chunk keeps the memory bounded
+    by the chunk size, and the counts cover the rows sent by this run, not resumed ones.
+    """
+
+    def __init__(self) -> None:
+        self.texts = {column: 0 for column in EMBEDDED_TEXT_COLUMNS}
+        self.duplicates = {column: 0 for column in EMBEDDED_TEXT_COLUMNS}
+
+    def add(self, rows: pd.DataFrame) -> None:
+        for column in EMBEDDED_TEXT_COLUMNS:
+            if column in rows.columns:
+                texts = rows[column].dropna()
+                self.texts[column] += len(texts)
+                self.duplicates[column] += int(texts.duplicated().sum())
+
+    def report(self) -> dict:
+        return {
+            column: {
+                "texts": texts,
+                "duplicates": self.duplicates[column],
+                "duplicate_ratio": round(self.duplicates[column] / texts, 4) if texts else 0.0,
+            }
+            for column, texts in self.texts.items()
+        }
+
+
+class IngestProgress:
+    """Progress of the current run, written atomically to a JSON file after every chunk."""
+
+    def __init__(self, path: str, dataset: str, total_rows: int) -> None:
+        self.path = path
+        self.started_at = time.time()
+        self.state = {
+            "status": "running",
+            "dataset": dataset,
+            "total_rows": total_rows,
+            "processed_rows": 0,
+            "ingested_rows": 0,
+            "unchanged_rows": 0,
+            "resumed_rows": 0,
+            "chunks_done": 0,
+            "embedding_seconds": 0.0,
+            "rows_per_second": 0.0,
+            "eta_seconds": None,
+            "started_at": self.started_at,
+            "updated_at": self.started_at,
+            "error": None,
+            "duplicate_texts": None,
+        }
+        self.duplicate_texts = DuplicateTextStats()
+
+    def update(self, **counters: float) -> None:
+        for name, value in counters.items():
+            self.state[name] += value
+        now = time.time()
+        # Rate and ETA only count rows that were actually sent, resumed chunks are almost free
+        sent = self.state["ingested_rows"] + self.state["unchanged_rows"]
+        elapsed = now - self.started_at
+        rate = sent / elapsed if elapsed > 0 else 0.0
+        remaining = self.state["total_rows"] - self.state["processed_rows"]
+        self.state.update(
+            rows_per_second=round(rate, 2),
+            eta_seconds=round(remaining / rate) if rate > 0 else None,
+            updated_at=now,
+        )
+        self.write()
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        self.state.update(
+            status=status, error=error, eta_seconds=0 if status == "done" else None, updated_at=time.time()
+        )
+        self.write()
+
+    def write(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_progress() -> dict:
+    path = get_data_file_path(settings.ingest_progress_path)
+    if not os.path.exists(path):
+        return {"status": "idle"}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_pending_chunks(dataset_path: str, checkpoint: IngestCheckpoint, progress: IngestProgress):
+    """Yield the chunks that are not committed yet, with the rows that are new or changed."""
+    row_offset = 0
+    for chunk_index, chunk in enumerate(read_chunks(dataset_path, schema_columns())):
+        if job_schema.job_skills.name in chunk.columns:
+            # Split CSV cells and use the vocabulary spelling, so the skills hit their space dimension
+            chunk[job_schema.job_skills.name] = chunk[job_schema.job_skills.name].map(skills_vocabulary.canonicalize)
+        hashes = row_hashes(chunk).tolist()
+        ids = chunk[job_schema.id.name].astype(str).tolist()
+        content_hash = hashlib.sha256("\n".join(hashes).encode()).hexdigest()
+
+        if checkpoint.is_committed(chunk_index, row_offset, len(chunk), content_hash):
+            progress.update(processed_rows=len(chunk), resumed_rows=len(chunk), chunks_done=1)
+        else:
+            changed = checkpoint.changed_rows(ids, hashes)
+            yield PendingChunk(chunk_index, row_offset, content_hash, ids, hashes, chunk[changed])
+        row_offset += len(chunk)
+
+
+def commit_chunk(
+    checkpoint: IngestCheckpoint,
+    neighbor_store: NeighborStore | None,
+    progress: IngestProgress,
+    pending: PendingChunk,
+    embedding_seconds: float = 0.0,
+) -> None:
+    ingested, unchanged = len(pending.rows), len(pending.ids) - len(pending.rows)
+    if neighbor_store is not None and ingested:
+        # The similar jobs precomputed for or with the re-ingested postings are stale now
+        neighbor_store.invalidate(pending.rows[job_schema.id.name].astype(str).tolist())
+    checkpoint.commit(
+        pending.chunk_index, pending.row_offset, pending.content_hash, pending.ids, pending.hashes, ingested
+    )
+    progress.duplicate_texts.add(pending.rows)
+    progress.state["duplicate_texts"] = progress.duplicate_texts.report()
+    progress.update(
+        processed_rows=len(pending.ids),
+        ingested_rows=ingested,
+        unchanged_rows=unchanged,
+        chunks_done=1,
+        embedding_seconds=embedding_seconds,
+    )
+    logger.info(
+        "chunk %d committed: %d rows ingested, %d unchanged (%d/%d, %.1f rows/s)",
+        pending.chunk_index,
+        ingested,
+        unchanged,
+        progress.state["processed_rows"],
+        progress.state["total_rows"],
+        progress.state["rows_per_second"],
+    )
+
+
+def ingest_with_server(
+    pending_chunks, checkpoint: IngestCheckpoint, neighbor_store: NeighborStore | None, progress: IngestProgress
+) -> None:
+    """Send every chunk to the ingest endpoint of the Superlinked server, which embeds and stores it."""
+    url = f"{settings.gateway_upstream_url}{INGEST_PATH}"
+    for pending in pending_chunks:
+        started = time.perf_counter()
+        if len(pending.rows):
+            response = requests.post(
+                url, json=to_records(pending.rows), timeout=settings.ingest_request_timeout_seconds
+            )
+            response.raise_for_status()
+        commit_chunk(checkpoint, neighbor_store, progress, pending, time.perf_counter() - started)
+
+
+# Each worker process holds its own executor, and so its own copy of the embedding model
+_worker_source = None
+
+
+def init_worker(torch_threads: int) -> None:
+    global _worker_source
+    import torch
+    from superlinked import framework as sl
+
+    # Only the index: the spaces embed with a local model copy, api.py would swap in the embedding service
+    from superlinked_app.index import build_vector_database, index
+
+    torch.set_num_threads(torch_threads)
+    _worker_source = sl.InteractiveSource(job_schema, parser=sl.DataFrameParser(job_schema))
+    sl.InteractiveExecutor(sources=[_worker_source], indices=[index], vector_database=build_vector_database()).run()
+
+
+def embed_rows(rows: pd.DataFrame) -> float:
+    """Embed and store rows in the worker, returning the seconds it took."""
+    started = time.perf_counter()
+    # Similar lengths in one batch mean less padding in the transformer forward pass,
+    # and identical descriptions end up next to each other, so in the same embedding call
+    if "job_summary" in rows.columns:
+        summaries = rows["job_summary"].fillna("")
+        order = pd.DataFrame({"length": summaries.str.len(), "text": summaries}).sort_values(["length", "text"])
+        rows = rows.loc[order.index]
+    for start in range(0, len(rows), settings.ingest_batch_size):
+        _worker_source.put(rows.iloc[start : start + settings.ingest_batch_size])
+    return time.perf_counter() - started
+
+
+def ingest_with_workers(
+    pending_chunks,
+    checkpoint: IngestCheckpoint,
+    neighbor_store: NeighborStore | None,
+    progress: IngestProgress,
+    workers: int,
+) -> None:
+    """Fan chunks out to a pool of embedding processes that write to Qdrant directly.
+
+    At most `ingest_queue_depth` chunks are in flight, and the checkpoint is only written
+    by this process, once a worker has finished a chunk.
+    """
+    torch_threads = settings.ingest_threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context("spawn")
+    queue_depth = max(settings.ingest_queue_depth, workers)
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker, initargs=(torch_threads,)) as pool:
+        in_flight: dict = {}
+        for pending in pending_chunks:
+            if not len(pending.rows):
+                commit_chunk(checkpoint, neighbor_store, progress, pending)
+                continue
+            in_flight[pool.submit(embed_rows, pending.rows)] = pending
+            while len(in_flight) >= queue_depth:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    commit_chunk(checkpoint, neighbor_store, progress, in_flight.pop(future), future.result())
+        for future in as_completed(list(in_flight)):
+            commit_chunk(checkpoint, neighbor_store, progress, in_flight.pop(future), future.result())
+    if progress.state["embedding_seconds"]:
+        # Summed over workers, so this is the throughput of a single worker
+        progress.state["worker_rows_per_second"] = round(
+            progress.state["ingested_rows"] / progress.state["embedding_seconds"], 2
+        )
+
+
+def ingest(dataset_path: str, reset: bool = False, workers: int = settings.ingest_workers) -> dict:
+    checkpoint = IngestCheckpoint(get_data_file_path(settings.ingest_checkpoint_path))
+    neighbor_store = None
+    if settings.similar_jobs_precomputed_enabled:
+        neighbor_store = NeighborStore(get_data_file_path(settings.similar_jobs_precomputed_path))
+    if reset:
+        checkpoint.reset()
+    total_rows = count_rows(dataset_path)
+    progress = IngestProgress(get_data_file_path(settings.ingest_progress_path), dataset_path, total_rows)
+    progress.state["workers"] = workers
+    progress.write()
+
+    try:
+        pending_chunks = read_pending_chunks(dataset_path, checkpoint, progress)
+        if workers > 0:
+            ingest_with_workers(pending_chunks, checkpoint, neighbor_store, progress, workers)
+        else:
+            ingest_with_server(pending_chunks, checkpoint, neighbor_store, progress)
+    except BaseException as e:
+        progress.finish("failed", error=repr(e))
+        raise
+    finally:
+        checkpoint.close()
+        if neighbor_store is not None:
+            neighbor_store.close()
+    progress.finish("done")
+    return progress.state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resumable ingestion of the job postings dataset.")
+    parser.add_argument(
+        "--dataset", default=settings.path_dataset, help="CSV dataset, or Parquet file from superlinked_app.preprocess."
+    )
+    parser.add_argument("--reset", action="store_true", help="Forget the checkpoint and ingest everything again.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.ingest_workers,
+        help="Local embedding processes; 0 sends the data to the Superlinked server instead.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    state = ingest(get_data_file_path(args.dataset), reset=args.reset, workers=args.workers)
+    logger.info(
+        "ingestion done: %d rows ingested, %d unchanged, %d resumed, %.1f rows/s",
+        state["ingested_rows"],
+        state["unchanged_rows"],
+        state["resumed_rows"],
+        state["rows_per_second"],
+    )
+    if state["duplicate_texts"]:
+        logger.info(
+            "duplicate texts within chunks: %.1f%% of descriptions, %.1f%% of titles",
+            state["duplicate_texts"]["job_summary"]["duplicate_ratio"] * 100,
+            state["duplicate_texts"]["job_title"]["duplicate_ratio"] * 100,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Per-stage latency of the gateway searches, as Prometheus metrics and a slow query log.
+
+Every `/api/v1/search/<query>` request is timed in stages:
+- `parse`: rule-based parser and NLQ cache lookup,
+- `upstream`: the Superlinked server search, until its response body is read. For the `llm`
+  NLQ path this is the OpenAI extraction plus the search, for the other paths the query
+  embedding plus the Qdrant search,
+- `decode`: parsing the JSON body of the server, which grows with `select_all()` and the
+  vectors of `include_metadata()`,
+- `browse`: the Qdrant payload scan of filter-only searches,
+- `neighbors`: the precomputed similar jobs lookup and the result cache,
+- `serialize`: encoding the response of the gateway.
+The metrics are served on `GET /metrics`. A request with `x-include-timing: true` gets the
+stages back in a `Server-Timing` header, and searches slower than SLOW_QUERY_MS are logged
+with their params to SLOW_QUERY_LOG_PATH (one JSON object per line). The estimated prompt
+tokens of the LLM extractions are counted in `roleradar_nlq_prompt_tokens_total`.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram
+
+from superlinked_app.config import get_data_file_path, settings
+
+TIMING_HEADER = "x-include-timing"
+SERVER_TIMING_HEADER = "server-timing"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger(__name__)
+
+search_seconds = Histogram(
+    "roleradar_search_seconds", "Gateway search latency.", ["query", "path"], buckets=LATENCY_BUCKETS
+)
+stage_seconds = Histogram(
+    "roleradar_search_stage_seconds", "Gateway search latency per stage.", ["query", "stage"], buckets=LATENCY_BUCKETS
+)
+search_requests = Counter("roleradar_search_requests_total", "Gateway searches.", ["query", "path", "status"])
+slow_searches = Counter("roleradar_slow_searches_total", "Gateway searches slower than SLOW_QUERY_MS.", ["query"])
+nlq_prompt_tokens = Counter("roleradar_nlq_prompt_tokens_total", "Estimated prompt tokens of the LLM extractions.")
+
+
+class SearchTimer:
+    """Stage durations of one search request, shared by the helpers through `current_timer`."""
+
+    def __init__(self, query_name: str) -> None:
+        self.query_name = query_name
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        # The structured params the search ran with, for the slow query log
+        self.params: dict | None = None
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - started
+
+    def server_timing(self) -> str:
+        stages = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        return ", ".join(stages + [f"total;dur={self.elapsed() * 1000:.1f}"])
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def observe(self, path: str, status: int) -> None:
+        """Export the request to the metrics and log it if it was slow."""
+        total = self.elapsed()
+        for stage, seconds in self.stages.items():
+            stage_seconds.labels(self.query_name, stage).observe(seconds)
+        search_seconds.labels(self.query_name, path).observe(total)
+        search_requests.labels(self.query_name, path, str(status)).inc()
+        if total * 1000 >= settings.slow_query_ms:
+            slow_searches.labels(self.query_name).inc()
+            log_slow_search(
+                {
+                    "time": time.time(),
+                    "query": self.query_name,
+                    "path": path,
+                    "status": status,
+                    "total_ms": round(total * 1000, 1),
+                    "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()},
+                    "params": self.params,
+                }
+            )
+
+
+current_timer: ContextVar[SearchTimer | None] = ContextVar("current_timer", default=None)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of the current search request, a no-op outside of one."""
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.span(stage):
+        yield
+
+
+def record_params(params: dict) -> None:
+    timer = current_timer.get()
+    if timer is not None:
+        timer.params = params
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt text, about four characters per token for English."""
+    return (len(text) + 3) // 4
+
+
+def log_slow_search(record: dict) -> None:
+    logger.warning("Slow %s search: %.0fms %s", record["query"], record["total_ms"], record["stages_ms"])
+    if not settings.slow_query_log_path:
+        return
+    try:
+        with open(get_data_file_path(settings.slow_query_log_path), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        logger.warning("Could not write the slow query log: %s", e)
@@ -0,0 +1,76 @@
+"""Stand-in for the OpenAI chat completions API, for offline benchmarks.
+
+Answers the natural query parameter extraction of the `job` query with the canned
+extraction of the benchmark corpus (see benchmark.py), so the `llm` path can be measured
+without network access or API costs. Point the Superlinked server at it with
+OPENAI_BASE_URL=http://localhost:8090/v1 and any OPENAI_API_KEY.
+
+Run it with: uvicorn superlinked_app.mock_openai:app --port 8090
+"""
+
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.nlq_cache import normalize_query
+
+app = FastAPI(title="Mock OpenAI")
+# Normalized natural query -> extracted params, loaded on the first request
+extractions: dict[str, dict] = {}
+
+
+def load_extractions() -> dict[str, dict]:
+    with open(get_data_file_path(settings.benchmark_corpus_path), encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    return {
+        normalize_query(query["payload"]["natural_query"]): query["extraction"]
+        for query in queries
+        if "extraction" in query
+    }
+
+
+def find_extraction(messages: list[dict]) -> dict:
+    """The extraction of the corpus query the user message contains, else the message as a description."""
+    text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    if not isinstance(text, str):
+        text = " ".join(part.get("text", "") for part in text)
+    normalized = normalize_query(text)
+    if normalized in extractions:
+        return extractions[normalized]
+    for query, extraction in extractions.items():
+        if query in normalized:
+            return extraction
+    return {"description": text}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> dict:
+    if not extractions:
+        extractions.update(load_extractions())
+    body = await request.json()
+    arguments = json.dumps(find_extraction(body.get("messages", [])))
+    message = {"role": "assistant", "content": arguments}
+    finish_reason = "stop"
+    tools = body.get("tools") or []
+    if tools:
+        # Function calling, the way structured outputs are requested by the client library
+        message["content"] = None
+        message["tool_calls"] = [
+            {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": tools[0]["function"]["name"], "arguments": arguments},
+            }
+        ]
+        finish_reason = "tool_calls"
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", settings.openai_model),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
@@ -0,0 +1,258 @@
+"""Cached and precomputed results of the `similar-jobs` query.
+
+The frontend opens the similar jobs carousel with the same hot job ids over and over, and
+every time the Superlinked server runs a full kNN search from the stored vector of the job.
+The gateway answers these requests from:
+- a precomputed neighbor list per posting (the default request: `id` and a `limit` up to
+  SIMILAR_JOBS_PRECOMPUTED_TOP_N), built offline with
+  `python -m superlinked_app.neighbors [--top-n 20] [--concurrency 8]`,
+- an in-memory LRU cache keyed by the whole request (id, weights, filters, limit).
+Both remember the content hash the posting had in the ingestion checkpoint, and an entry
+is dropped once the posting was re-ingested with a different content. The batch and streaming
+ingestion also delete the precomputed lists a deleted or changed posting appears in, and the
+next precompute run computes them again. Every such invalidation bumps the version of the store,
+and the cache drops the entries it cached under an older version, since they may list the posting.
+"""
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from superlinked_app.config import get_data_file_path, settings
+
+SIMILAR_JOBS_QUERY_NAME = "similar-jobs"
+# Params of the request the frontend sends, everything else is served from the LRU cache
+PRECOMPUTED_PARAMS = {"id", "limit"}
+# Space weights of similar_jobs_query (query.py), the precomputed lists are searched with them
+DEFAULT_WEIGHTS = {"description_weight": 0.8, "title_weight": 1.0, "skills_weight": 0.9}
+
+logger = logging.getLogger(__name__)
+
+
+def is_precomputed_request(payload: dict) -> bool:
+    """Whether the precomputed lists answer the request: only an id and a limit, or the default weights."""
+    params = {name for name, value in payload.items() if DEFAULT_WEIGHTS.get(name) != value}
+    return params <= PRECOMPUTED_PARAMS and isinstance(payload.get("limit", 10), int)
+
+
+def cache_key(payload: dict, include_metadata: bool) -> str:
+    return json.dumps([payload, include_metadata], sort_keys=True, default=str)
+
+
+def compact_body(body: dict) -> dict:
+    """Drop the vectors from the result metadata, they are most of its size and not used by the frontend."""
+    metadata = body.get("metadata") or {}
+    if "search_vector" in metadata:
+        metadata["search_vector"] = []
+    for entry in body.get("entries", []):
+        if "vector_parts" in (entry.get("metadata") or {}):
+            entry["metadata"]["vector_parts"] = []
+    return body
+
+
+def sliced_body(body: dict, limit: int, include_metadata: bool) -> dict:
+    """The first `limit` neighbors of a precomputed result, as the server would return them."""
+    result = {"entries": body["entries"][:limit]}
+    if include_metadata and body.get("metadata"):
+        result["metadata"] = body["metadata"] | {
+            "search_params": body["metadata"].get("search_params", {}) | {"limit": limit}
+        }
+    return result
+
+
+class NeighborCache:
+    """Size-bounded in-memory LRU cache of similar-jobs responses, with a TTL per entry."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # key -> (posting hash, body, cached at, store version)
+        self._entries: OrderedDict[str, tuple[str | None, dict, float, int | None]] = OrderedDict()
+
+    def get(self, key: str, posting_hash: str | None, store_version: int | None = None) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is not None and (entry[0] != posting_hash or entry[3] != store_version):
+            # The posting was re-ingested, or postings of the result may have changed, since it was cached
+            del self._entries[key]
+            self.invalidations += 1
+            entry = None
+        elif entry is not None and time.time() - entry[2] > self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, posting_hash: str | None, body: dict, store_version: int | None = None) -> None:
+        self._entries[key] = (posting_hash, body, time.time(), store_version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class NeighborStore:
+    """SQLite table of the precomputed top-N similar jobs of every posting."""
+
+    def __init__(self, path: str) -> None:
+        self.hits = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS neighbors ("
+            " id TEXT PRIMARY KEY,"
+            " content_hash TEXT,"
+            " top_n INTEGER NOT NULL,"
+            " body TEXT NOT NULL,"
+            " computed_at REAL NOT NULL)"
+        )
+        # The neighbors of every list, to find the lists a deleted or changed posting appears in
+        backfill = not self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'neighbor_entries'"
+        ).fetchone()
+        self._conn.execute("CREATE TABLE IF NOT EXISTS neighbor_entries (id TEXT NOT NULL, neighbor_id TEXT NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS neighbor_entries_neighbor ON neighbor_entries (neighbor_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS neighbor_entries_id ON neighbor_entries (id)")
+        # Bumped by every invalidation that deleted lists, read by the gateway cache
+        self._conn.execute("CREATE TABLE IF NOT EXISTS store_version (version INTEGER NOT NULL)")
+        if not self._conn.execute("SELECT 1 FROM store_version").fetchone():
+            self._conn.execute("INSERT INTO store_version VALUES (0)")
+        if backfill:
+            self._conn.execute(
+                "INSERT INTO neighbor_entries SELECT n.id, json_extract(e.value, '$.id')"
+                " FROM neighbors n, json_each(n.body, '$.entries') e"
+            )
+        self._conn.commit()
+
+    def get(self, id_: str, posting_hash: str | None, limit: int) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash, top_n, body FROM neighbors WHERE id = ?", (id_,)).fetchone()
+        if row is None or row[1] < limit:
+            return None
+        if row[0] != posting_hash:
+            self.stale += 1
+            return None
+        self.hits += 1
+        return json.loads(row[2])
+
+    def put(self, id_: str, posting_hash: str | None, top_n: int, body: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO neighbors VALUES (?, ?, ?, ?, ?)",
+                (id_, posting_hash, top_n, json.dumps(compact_body(body)), time.time()),
+            )
+            self._conn.execute("DELETE FROM neighbor_entries WHERE id = ?", (id_,))
+            self._conn.executemany(
+                "INSERT INTO neighbor_entries VALUES (?, ?)", [(id_, entry["id"]) for entry in body.get("entries", [])]
+            )
+            self._conn.commit()
+
+    def computed_hashes(self) -> dict[str, str | None]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT id, content_hash FROM neighbors").fetchall())
+
+    def version(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT version FROM store_version").fetchone()[0]
+
+    def delete(self, ids: list[str]) -> int:
+        with self._lock:
+            deleted = self._conn.executemany("DELETE FROM neighbors WHERE id = ?", [(id_,) for id_ in ids]).rowcount
+            self._conn.executemany("DELETE FROM neighbor_entries WHERE id = ?", [(id_,) for id_ in ids])
+            if deleted:
+                self._conn.execute("UPDATE store_version SET version = version + 1")
+            self._conn.commit()
+        return deleted
+
+    def invalidate(self, ids: list[str]) -> int:
+        """Delete the lists of the postings and the lists they are a neighbor in, the next precompute
+        run computes them again (the gateway searches them live until then). Returns the deleted lists."""
+        with self._lock:
+            sources = set(ids)
+            for id_ in ids:
+                rows = self._conn.execute("SELECT id FROM neighbor_entries WHERE neighbor_id = ?", (id_,))
+                sources.update(source for (source,) in rows.fetchall())
+        return self.delete(list(sources))
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM neighbors").fetchone()
+        return {"size": size, "hits": self.hits, "stale": self.stale, "version": self.version()}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def precompute(top_n: int, concurrency: int) -> int:
+    """Search the neighbors of every ingested posting that is new or changed since the last run."""
+    # ingest.py invalidates the lists of this module, and imports the Superlinked index
+    from superlinked_app.ingest import IngestCheckpoint
+
+    checkpoint = IngestCheckpoint(get_data_file_path(settings.ingest_checkpoint_path))
+    store = NeighborStore(get_data_file_path(settings.similar_jobs_precomputed_path))
+    postings = dict(checkpoint.ingested_rows())
+    checkpoint.close()
+    computed = store.computed_hashes()
+    store.invalidate([id_ for id_ in computed if id_ not in postings])
+    computed = store.computed_hashes()
+    pending = [id_ for id_, content_hash in postings.items() if computed.get(id_) != content_hash]
+    logger.info("%d postings, %d neighbor lists to compute", len(postings), len(pending))
+
+    url = f"{settings.gateway_upstream_url}/api/v1/search/{SIMILAR_JOBS_QUERY_NAME}"
+    session = requests.Session()
+
+    def search(id_: str) -> None:
+        response = session.post(url, json={"id": id_, "limit": top_n}, headers={"x-include-metadata": "true"})
+        response.raise_for_status()
+        store.put(id_, postings[id_], top_n, response.json())
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for done, _ in enumerate(pool.map(search, pending), start=1):
+            if done % 1000 == 0:
+                logger.info("%d/%d neighbor lists, %.1f/s", done, len(pending), done / (time.perf_counter() - started))
+    store.close()
+    logger.info("computed %d neighbor lists in %.1fs", len(pending), time.perf_counter() - started)
+    return len(pending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute the similar jobs of every ingested posting.")
+    parser.add_argument("--top-n", type=int, default=settings.similar_jobs_precomputed_top_n, help="Neighbors kept.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Searches in flight.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    precompute(args.top_n, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,50 @@ openai_config = sl.OpenAIClientConfig(
     model=settings.openai_model,
 )
 
+# Value mappings used in the prompts below.
+# They are also used by the local rule-based parser (query_parser.py),
+# so keep the canonical values in line with categories.json.
+title_aliases = {
+    "Data Analyst": ["data analyst", "analyst"],
+    "Software Engineer": ["software engineer", "developer", "programmer"],
+    "Data Scientist": ["data scientist", "ml engineer"],
+    "Data Engineer": ["data engineer", "etl developer"],
+}
+
+country_aliases = {
+    "United Kingdom": ["UK", "United Kingdom", "Britain"],
+    "United States": ["US", "USA", "America"],
+}
+
+experience_level_aliases = {
+    "Associate": ["1-3 years experience", "associate level", "junior", "entry level"],
+    "Mid Senior": ["experienced", "senior", "3+ years", "mid level", "mid-senior", "5+ years"],
+}
+
+work_type_aliases = {
+    "Onsite": ["on-site", "in-office", "in-person", "office-based"],
+    "Hybrid": ["hybrid", "flexible", "mixed", "part remote"],
+    "Remote": ["remote", "work from home", "WFH", "telecommute", "fully remote"],
+}
+
+skills_examples = [
+    "SQL", "Python", "AWS", "Java", "Data Analysis", "Communication",
+    "Tableau", "Agile", "JavaScript", "Power BI", "Data Visualization", "Machine Learning", "Azure",
+    "Excel", "Git", "Kubernetes", "Docker", "C#", "Project Management", "ETL", "C++", "Spark",
+    "Linux", "Data Science", "Reporting", "Data Analytics", "Snowflake", "Problem Solving", "Statistics",
+    "Data Engineering", "Teamwork", "React", "Kafka", "DevOps", "Collaboration", "Software Development",
+    "Software Engineering", "Scrum", "Business Intelligence", "Data Modeling", "Scala", "GCP",
+    "Business Analysis", "Computer Science", "NoSQL", "HTML", "Data Warehousing",
+]
+
+
+def format_aliases(aliases: dict[str, list[str]]) -> str:
+    """Render a mapping as "'a', 'b' -> 'A'; 'c' -> 'C'" for the prompt."""
+    return "; ".join(
+        ", ".join(f"'{alias}'" for alias in variations) + f" -> '{value}'"
+        for value, variations in aliases.items()
+    )
+
 
 description_description = (
     "'description' should be one or two normalized sentences that describe the desired job position.\n"
@@ -32,154 +76,69 @@ title_description = (
     "'title' should capture the specific job title or role mentioned in the query.\n"
     "Examples from dataset: 'Data Analyst', 'Software Engineer', 'Data Scientist', 'Data Engineer', "
     "'Senior Data Analyst', 'Junior Software Engineer', 'Machine Learning Engineer', 'DevOps Engineer'.\n"
-    "Map common variations: "
-    "'data analyst', 'analyst' -> 'Data Analyst'; "
-    "'software engineer', 'developer', 'programmer' -> 'Software Engineer'; "
-    "'data scientist', 'ml engineer' -> 'Data Scientist'; "
-    "'data engineer', 'etl developer' -> 'Data Engineer'.\n"
+    "Map common variations: " + format_aliases(title_aliases) + ".\n"
     "If no specific title is mentioned, use empty string.\n"
 )
 
 location_description = (
-    "Name of the city and state like 'San Francisco, CA', 'New York, NY', 'Austin, TX', 'Seattle, WA'.\n"
-    "For international locations, include country name like 'London, UK', 'Toronto, Canada'.\n"
-    "Common locations from dataset: California, Texas, Florida, New York, Illinois, Virginia, Pennsylvania.\n"
-    "Handle variations: 'California' -> 'CA', 'Texas' -> 'TX', 'Florida' -> 'FL', 'New York' -> 'NY'.\n"
-    "Country variations: 'UK', 'United Kingdom', 'Britain' -> 'United Kingdom'; 'US', 'USA', 'America' -> 'United States'.\n"
-    "If remote work is mentioned, use 'Remote'.\n"
-    "If location can't be determined, use None for 'location'.\n"
-)
-
-salary_description = (
-    "Weight of the salary preference. "
-    "Higher value means preference for higher salaries, "
-    "lower value means preference for lower salaries. "
-    "Pay periods available in dataset: HOURLY, YEARLY, MONTHLY, WEEKLY, BIWEEKLY. "
-    "Currency options: USD, CAD, BBD, EUR, AUD, GBP. "
-    "Compensation type: BASE_SALARY. "
-    "Weight depends on salary-related terms: "
-    "positive weight: 'high salary', 'well-paid', 'competitive pay', '$50+ hour', '$70K+', 'top salary'; "
-    "negative weight: 'entry level pay', 'starting salary', '$15-20 hour', '$30K-40K', 'budget position'; "
-    "0 should be used if no salary preference is mentioned."
+    "Full locations mentioned in the query: city and state like 'San Francisco, CA' or 'Austin, TX', "
+    "city and country like 'London, UK'. Plain city names go to 'search_cities_include' instead. "
+    "If no such location is mentioned, use None."
 )
 
 experience_level_description = (
     "Experience level requirement mentioned in the query. "
-    "Map to available dataset values: 'Mid Senior', 'Associate'. "
-    "Common mappings from job descriptions: "
-    "'1-3 years experience', 'associate level', 'junior', 'entry level' -> 'Associate'; "
-    "'experienced', 'senior', '3+ years', 'mid level', 'mid-senior', '5+ years' -> 'Mid Senior'. "
+    "Map variations: " + format_aliases(experience_level_aliases) + ". "
     "If no experience level is specified, use None."
 )
 
 work_type_description = (
     "Type of work arrangement mentioned in the query. "
-    "Options from dataset: 'Onsite', 'Hybrid', 'Remote'. "
-    "Map variations: 'on-site', 'in-office', 'in-person', 'office-based' -> 'Onsite'; "
-    "'hybrid', 'flexible', 'mixed', 'part remote' -> 'Hybrid'; "
-    "'remote', 'work from home', 'WFH', 'telecommute', 'fully remote' -> 'Remote'. "
+    "Map variations: " + format_aliases(work_type_aliases) + ". "
     "If no work type is specified, use None."
 )
 
-remote_preference_description = (
-    "Remote work preference mentioned in the query. "
-    "Options: 'Remote', 'Hybrid', 'Onsite'. "
-    "Map common terms: "
-    "'remote', 'work from home', 'WFH', 'telecommute' -> 'Remote'; "
-    "'hybrid', 'flexible schedule', 'mixed' -> 'Hybrid'; "
-    "'on-site', 'in-office', 'in person', 'onsite' -> 'Onsite'. "
-    "If no preference is mentioned, use None."
-)
-
 company_description = (
-    "Specific company name mentioned in the query. "
-    "Examples could include: 'Google', 'Microsoft', 'Amazon', 'Apple', 'Facebook', 'Netflix', "
-    "'Tesla', 'Uber', 'Airbnb', or any specific company name mentioned. "
-    "Include company types: 'tech company', 'startup', 'consulting firm', 'financial services'. "
-    "If no specific company is mentioned, use None."
+    "Specific company names mentioned in the query, such as 'Google', 'Microsoft' or 'Amazon', "
+    "as written in the query. If no specific company is mentioned, use None."
 )
 
 skills_description = (
     "Technical skills or technologies mentioned in the query. "
-    "Available skills from dataset include: 'SQL', 'Python', 'AWS', 'Java', 'Data Analysis', 'Communication', "
-    "'Tableau', 'Agile', 'JavaScript', 'Power BI', 'Data Visualization', 'Machine Learning', 'Azure', "
-    "'Excel', 'Git', 'Kubernetes', 'Docker', 'C#', 'Project Management', 'ETL', 'C++', 'Spark', "
-    "'Linux', 'Data Science', 'Reporting', 'Data Analytics', 'Snowflake', 'Problem Solving', 'Statistics', "
-    "'Data Engineering', 'Teamwork', 'React', 'Kafka', 'DevOps', 'Collaboration', 'Software Development', "
-    "'Software Engineering', 'Scrum', 'Business Intelligence', 'Data Modeling', 'Scala', 'GCP', "
-    "'Business Analysis', 'Computer Science', 'NoSQL', 'HTML', 'Data Warehousing', 'Machine learning'. "
+    "Available skills from dataset include: " + ", ".join(f"'{skill}'" for skill in skills_examples) + ". "
     "Extract all relevant technical and soft skills mentioned in the query that match the available skills."
 )
 
+# Kept free of per-request content and of the per-param guidance above (sent with the
+# param descriptions already), so it is a short, stable prefix the provider can cache
 system_prompt = (
-    "Extract the job search parameters from the user query based on real job posting data.\n"
-    "Guidelines based on actual dataset patterns:\n\n"
-    "**FILTERING LOGIC PRINCIPLES**\n"
-    "- Use 'include' filters only when specific items are explicitly mentioned for inclusion\n"
-    "- Use 'exclude' filters when items should be specifically excluded\n"
-    "- When query says 'in [country] but not [state/city]', use country_include + state/city_exclude\n"
-    "- Do NOT populate include filters with assumptions - only with explicitly mentioned items\n"
-    "- Let broader filters (country) handle inclusion, use specific filters (state/city) for exclusion\n\n"
-    "**IMPORTANT: Country/Location Filtering**\n"
-    "When a country is mentioned (UK, United Kingdom, US, United States, Canada, Australia), "
-    "ALWAYS set the 'search_countries_include' parameter with the proper country name.\n"
-    "Available countries: 'United States', 'United Kingdom', 'Canada', 'Australia'.\n"
-    "Map variations: 'UK', 'Britain' -> 'United Kingdom'; 'US', 'USA', 'America' -> 'United States'.\n\n"
-    "**'description' field**\n"
-    "Focus on specific job responsibilities and required skills. "
-    "Examples: 'data analysis and SQL programming', 'software development with Python and AWS', "
-    "'machine learning and statistical analysis'.\n\n"
-    "**'title' field**\n"
-    "Extract specific job titles. Common dataset examples: "
-    "'Data Analyst', 'Software Engineer', 'Data Scientist', 'Data Engineer', "
-    "'Senior Data Analyst', 'Machine Learning Engineer'.\n\n"
-    "**'location' field**\n"
-    "Include city and state format like 'San Francisco, CA' or 'New York, NY'. "
-    "For international locations, include country like 'London, UK'. "
-    "Use 'Remote' for remote positions.\n\n"
-    "**'search_countries_include' field**\n"
-    "When a country is mentioned (UK, United Kingdom, US, United States, Canada, Australia), "
-    "add it to this filter. Available countries: 'United States', 'United Kingdom', 'Canada', 'Australia'. "
-    "Map variations: 'UK', 'Britain' -> 'United Kingdom'; 'US', 'USA', 'America' -> 'United States'.\n\n"
-    "**'cities_include' / 'search_cities_include' fields**\n"
-    "When specific cities are mentioned (San Francisco, New York, London, Toronto, etc.), "
-    "add them to the appropriate city filter.\n\n"
-    "**'states_include' field**\n"
-    "When specific US states are explicitly mentioned for inclusion, use standard abbreviations: CA, TX, FL, NY, IL, etc.\n"
-    "IMPORTANT: If the query says 'in USA but not in [state]' or 'except [state]', do NOT populate states_include.\n"
-    "Only use states_exclude for the excluded states. Let the country filter handle the rest.\n"
-    "Examples:\n"
+    "Extract the job search parameters from the user query based on real job posting data.\n\n"
+    "**Filtering logic**\n"
+    "- Use 'include' filters only for items the query explicitly asks for, never for assumptions\n"
+    "- Use 'exclude' filters for items the query explicitly rules out\n"
+    "- When the query says 'in [country] but not [state/city]', use search_countries_include together with "
+    "states_exclude or search_cities_exclude, and leave states_include empty\n"
+    "- Leave every parameter the query does not mention empty\n\n"
+    "**Countries**\n"
+    "When a country is mentioned, ALWAYS set 'search_countries_include'. "
+    "Map variations: " + format_aliases(country_aliases) + ".\n\n"
+    "**Cities, states and companies**\n"
+    "Put mentioned cities into 'search_cities_include' and company names into 'companies_include', "
+    "as written in the query. Use US state abbreviations for the states, for example:\n"
     "- 'jobs in California and Texas' -> states_include: ['CA', 'TX']\n"
     "- 'jobs in USA but not California' -> states_include: None, states_exclude: ['CA']\n"
     "- 'jobs in USA except NY and CA' -> states_include: None, states_exclude: ['NY', 'CA']\n\n"
-    "**'companies_include' field**\n"
-    "When specific company names are mentioned, add them to this filter.\n\n"
-    "**'job_levels_include' field**\n"
-    "Map experience level requirements to available values: 'Associate' (junior to mid level, 1-3 years), 'Mid Senior' (experienced, 3+ years). "
-    "If not specified, use None.\n\n"
-    "**'job_types_include' field**\n"
-    "Options: 'Onsite', 'Hybrid', 'Remote'. "
-    "Map variations appropriately.\n\n"
-    "**'salary' field**\n"
-    "Consider pay periods: HOURLY, YEARLY, MONTHLY, WEEKLY, BIWEEKLY. "
-    "Currencies: USD, CAD, EUR, AUD, GBP. Compensation type: BASE_SALARY. "
-    "Positive weight for 'competitive', 'high salary'. Negative for 'entry level pay'.\n\n"
-    "**'skills' field**\n"
-    "Include technical and soft skills from available list. Key skills include: 'SQL', 'Python', 'AWS', 'Java', "
-    "'Data Analysis', 'Machine Learning', 'Tableau', 'JavaScript', 'Docker', 'React', 'Azure', 'GCP', "
-    "'Data Science', 'Data Engineering', 'Software Development', 'DevOps', 'Business Intelligence', etc. "
-    "Match skills exactly as they appear in the dataset.\n\n"
-    "**'company' field**\n"
-    "Include specific company names or types: 'Google', 'Microsoft', 'tech startup', "
-    "'consulting firm', 'financial services'.\n\n"
-    "**'remote_preference' field**\n"
-    "Options: 'Remote', 'Hybrid', 'Onsite'. "
-    "Many tech jobs offer remote/hybrid options.\n\n"
-    "**'job_categories_include' field**\n"
-    "Available categories from dataset: 'data_analyst', 'software_engineer', 'data_engineer', 'data_scientist'. "
-    "Map job titles to appropriate categories based on role type.\n\n"
+    "**Locations, remote preference and salary**\n"
+    "- Full locations like 'San Francisco, CA' or 'London, UK' go to 'job_locations_include', plain city names "
+    "to 'search_cities_include'\n"
+    "- Remote, hybrid or on-site preferences ('work from home', 'in-office') go to 'job_types_include', "
+    "never to a location\n"
+    "- There is no salary parameter: keep pay terms ('high salary', '$70K+', 'entry level pay') out of "
+    "'description' and every filter\n\n"
+    "**Job categories**\n"
+    "Map job titles to the category of their role type.\n\n"
     "**Weight Parameters**\n"
     "- title_weight: Default 1.0 (highest priority for job title matching)\n"
     "- skills_weight: Default 0.9 (high priority for skills matching)\n"
     "- description_weight: Default 0.8 (good priority for job description matching)\n"
-)
\ No newline at end of file
+)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+# Characters that never change the meaning of a search query
+_EDGE_PUNCTUATION = " \t\n\r.,;:!?\"'`"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(natural_query: str) -> str:
+    """Normalize a natural query so that trivially different spellings share one cache entry."""
+    text = unicodedata.normalize("NFKC", natural_query).casefold()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def compute_fingerprint(*parts) -> str:
+    """Hash everything the LLM extraction depends on (prompt, param descriptions, options, model)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(part)
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class NLQCache:
+    """Persistent, size-bounded cache from normalized natural query to extracted query params.
+
+    Entries expire after `ttl_seconds` and the least recently used entries are evicted once
+    `max_entries` is exceeded. Entries created under a different prompt fingerprint are
+    dropped when the cache is opened, so editing the prompt or categories.json invalidates it.
+    """
+
+    def __init__(self, path: str, fingerprint: str, max_entries: int, ttl_seconds: int) -> None:
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS nlq_cache ("
+            " query TEXT PRIMARY KEY,"
+            " fingerprint TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS nlq_cache_accessed ON nlq_cache (accessed_at)")
+        invalidated = self._conn.execute(
+            "DELETE FROM nlq_cache WHERE fingerprint != ?", (fingerprint,)
+        ).rowcount
+        self._conn.commit()
+        self.invalidated = invalidated
+
+    def get(self, natural_query: str) -> dict | None:
+        key = normalize_query(natural_query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT params, created_at FROM nlq_cache WHERE query = ? AND fingerprint = ?",
+                (key, self.fingerprint),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            params, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM nlq_cache WHERE query = ?", (key,))
+                self._conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE nlq_cache SET accessed_at = ? WHERE query = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(params)
+
+    def put(self, natural_query: str, params: dict) -> None:
+        key = normalize_query(natural_query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO nlq_cache (query, fingerprint, params, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, self.fingerprint, json.dumps(params), now, now),
+            )
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM nlq_cache").fetchone()
+            if size > self.max_entries:
+                self.evictions += self._conn.execute(
+                    "DELETE FROM nlq_cache WHERE query IN"
+                    " (SELECT query FROM nlq_cache ORDER BY accessed_at LIMIT ?)",
+                    (size - self.max_entries,),
+                ).rowcount
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM nlq_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM nlq_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidated_on_open": self.invalidated,
+            "fingerprint": self.fingerprint[:12],
+        }
@@ -0,0 +1,124 @@
+"""Concurrency, rate limit and coalescing of the LLM extractions of the gateway.
+
+During a traffic spike many users send the same natural query at once, and every one of
+them used to start its own OpenAI call on the Superlinked server until OpenAI answered 429.
+The gateway now starts at most one extraction per normalized query: identical queries
+arriving while it runs wait for its result instead. Extractions run at most
+NLQ_LLM_CONCURRENCY at a time and NLQ_LLM_RATE_PER_SECOND on average (token bucket with
+NLQ_LLM_BURST tokens). A rate limited call pauses the bucket and is retried with exponential
+backoff. A request that waited NLQ_LLM_TIMEOUT_SECONDS for an extraction is answered with the
+raw query as `description` (the `fallback` NLQ path), while the extraction keeps running and
+still fills the NLQ cache for the next request. An extraction that raised (the server
+connection failed, for instance) takes the same fallback for every request waiting for it.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def is_rate_limited(status: int, body: dict) -> bool:
+    """OpenAI 429s surface as a 429, or as a server error mentioning the rate limit."""
+    if status == 429:
+        return True
+    detail = str(body.get("detail", "")).lower() if isinstance(body, dict) else ""
+    return status >= 500 and ("rate limit" in detail or "429" in detail)
+
+
+class TokenBucket:
+    """`rate` calls per second on average, with bursts of up to `burst` calls."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold every call back for `seconds`, after the LLM answered with a rate limit."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        # Refill from the end of the pause, not from the last call before it
+        self.updated = self.paused_until
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ExtractionLimiter:
+    """Runs one extraction per key at a time, under a concurrency limit and a token bucket."""
+
+    def __init__(self, concurrency: int, rate: float, burst: int, max_retries: int, backoff_seconds: float) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.calls = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def run(self, key: str, call: Callable[[], Awaitable[tuple]]) -> tuple[asyncio.Task, bool]:
+        """The task of the running extraction for `key`, and whether this request started it.
+
+        The task results in None when the extraction raised, the requests fall back as on a timeout.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task, False
+        task = asyncio.create_task(self._call(call))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._done(key, done))
+        return task, True
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Retrieve whatever escaped _call, a timed out request no longer awaits the task
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("LLM extraction task failed", exc_info=task.exception())
+
+    async def _call(self, call: Callable[[], Awaitable[tuple]]) -> tuple | None:
+        """`call` returns the status and body of the upstream response first."""
+        try:
+            async with self._semaphore:
+                for attempt in range(self.max_retries + 1):
+                    await self.bucket.acquire()
+                    self.calls += 1
+                    result = await call()
+                    if not is_rate_limited(result[0], result[1]) or attempt == self.max_retries:
+                        return result
+                    self.rate_limited += 1
+                    self.bucket.pause(self.backoff_seconds * 2**attempt)
+        except Exception:
+            self.errors += 1
+            logger.exception("LLM extraction failed")
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
@@ -0,0 +1,123 @@
+"""Convert the CSV dataset once into a typed, columnar Parquet file.
+
+The CSV is streamed in `chunk_size` chunks and written as one Parquet row group per chunk:
+- the categorical filter columns are dictionary encoded,
+- `job_skills` is stored pre-split as a list of strings,
+- text columns are plain strings, the id is a string like the DataFrameParser makes it.
+
+Run it with: python -m superlinked_app.preprocess [--input CSV] [--output PARQUET]
+then point PATH_DATASET at the Parquet file; `python -m superlinked_app.ingest` reads it
+through memory-mapped record batches instead of re-parsing the CSV.
+"""
+
+import argparse
+import logging
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from superlinked_app.config import get_data_file_path, settings
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality columns used for hard filtering (see index.fields)
+CATEGORICAL_COLUMNS = ["state", "search_city", "search_country", "job_level", "job_type", "job_category", "company"]
+TEXT_COLUMNS = ["job_title", "job_summary", "job_location", "job_link"]
+SKILLS_COLUMN = "job_skills"
+
+DATASET_SCHEMA = pa.schema(
+    [pa.field("id", pa.string(), nullable=False)]
+    + [pa.field(column, pa.string()) for column in TEXT_COLUMNS]
+    + [pa.field(column, pa.dictionary(pa.int32(), pa.string())) for column in CATEGORICAL_COLUMNS]
+    + [pa.field(SKILLS_COLUMN, pa.list_(pa.string()))]
+)
+
+
+def split_skills(skills) -> list[str] | None:
+    """Split a comma separated skills cell like the EDA notebook does."""
+    if not isinstance(skills, str):
+        return None
+    return [skill.strip() for skill in skills.split(",") if len(skill.strip()) > 1]
+
+
+def to_table(chunk: pd.DataFrame) -> pa.Table:
+    arrays = []
+    for field in DATASET_SCHEMA:
+        if field.name not in chunk.columns:
+            arrays.append(pa.nulls(len(chunk), type=field.type))
+        elif field.name == SKILLS_COLUMN:
+            arrays.append(pa.array(chunk[field.name].map(split_skills), type=field.type))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(chunk[field.name], type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(chunk[field.name], type=field.type))
+    return pa.Table.from_arrays(arrays, schema=DATASET_SCHEMA)
+
+
+def count_rows(dataset_path: str, block_size: int = 1 << 24) -> int:
+    """Rows of the dataset, from the Parquet metadata or the line breaks of the CSV outside quoted fields.
+
+    The CSV is only scanned for quotes and line breaks in blocks, without parsing any value; the
+    job descriptions span several lines, so line breaks inside quotes are not counted.
+    """
+    if dataset_path.endswith(".parquet"):
+        return pq.ParquetFile(dataset_path).metadata.num_rows
+    line_breaks, quoted, last = 0, False, b"\n"
+    with open(dataset_path, "rb") as f:
+        while block := f.read(block_size):
+            parts = block.split(b'"')
+            # Every quote (an escaped "" is two) switches between the outside and the inside of a field
+            line_breaks += b"".join(parts[1 if quoted else 0 :: 2]).count(b"\n")
+            quoted ^= len(parts) % 2 == 0
+            last = block[-1:]
+    # Minus the header line, plus a last line without a line break
+    return max(line_breaks - 1 + (last != b"\n"), 0)
+
+
+def read_chunks(dataset_path: str, columns: list[str]):
+    """Yield `chunk_size` DataFrames of the given columns from the CSV or the preprocessed Parquet file."""
+    if not dataset_path.endswith(".parquet"):
+        reader = pd.read_csv(dataset_path, chunksize=settings.chunk_size, usecols=lambda c: c in columns)
+        for chunk in reader:
+            yield chunk[[column for column in columns if column in chunk.columns]]
+        return
+
+    parquet_file = pq.ParquetFile(dataset_path, memory_map=True)
+    schema = parquet_file.schema_arrow
+    names = [column for column in columns if column in schema.names]
+    list_columns = [column for column in names if pa.types.is_list(schema.field(column).type)]
+    categorical_columns = [column for column in names if pa.types.is_dictionary(schema.field(column).type)]
+    for batch in parquet_file.iter_batches(batch_size=settings.chunk_size, columns=names):
+        chunk = batch.to_pandas()
+        # Plain Python values, as the parsers and the JSON encoder expect them
+        chunk[categorical_columns] = chunk[categorical_columns].astype(object)
+        for column in list_columns:
+            chunk[column] = chunk[column].map(lambda v: list(v) if v is not None else None)
+        yield chunk
+
+
+def preprocess(input_path: str, output_path: str) -> int:
+    started = time.perf_counter()
+    rows = 0
+    with pq.ParquetWriter(output_path, DATASET_SCHEMA, compression="zstd") as writer:
+        for chunk in pd.read_csv(input_path, chunksize=settings.chunk_size, dtype=str):
+            writer.write_table(to_table(chunk), row_group_size=len(chunk))
+            rows += len(chunk)
+            logger.info("converted %d rows", rows)
+    logger.info("wrote %d rows to %s in %.1fs", rows, output_path, time.perf_counter() - started)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert the CSV dataset into a typed Parquet file.")
+    parser.add_argument("--input", default=settings.path_dataset, help="CSV dataset.")
+    parser.add_argument("--output", default=settings.path_dataset_parquet, help="Parquet file to write.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    preprocess(get_data_file_path(args.input), get_data_file_path(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Result views of the search endpoints: compact cards for result lists, full postings by id.
+
+Both `job` and `similar-jobs` select every field and include the metadata, so a result list
+carries the whole `job_summary` of every hit plus the vectors and partial scores, while the
+job cards only show a few fields and the first lines of the summary. A search request with
+`"view": "card"` gets the card fields only, with the summary cut to CARD_SUMMARY_CHARS and the
+metadata of the entries reduced to the score. For `job` searches the fields are selected on
+the Superlinked server already (the `select_param__` param of `select_all()`), so Qdrant does
+not return the others. The full posting is fetched by id when it is opened:
+
+    GET /api/v1/jobs/<id>
+"""
+
+from qdrant_client import AsyncQdrantClient, models
+
+from superlinked_app.browse import to_entry
+from superlinked_app.config import settings
+from superlinked_app.filter_planner import ENTITY_ID_PAYLOAD_FIELD
+from superlinked_app.index import job_schema
+
+VIEW_PARAM = "view"
+VIEWS = ("full", "card")
+# Param of the fields returned by a query with `select_all()`
+SELECT_PARAM = "select_param__"
+# Fields shown by JobCard and SimilarJobsCarousel
+CARD_FIELDS = [
+    "job_title",
+    "company",
+    "job_location",
+    "job_level",
+    "job_type",
+    "job_category",
+    "job_skills",
+    "job_summary",
+]
+
+
+def card_entry(entry: dict) -> dict:
+    fields = {name: value for name, value in (entry.get("fields") or {}).items() if name in CARD_FIELDS}
+    summary = fields.get("job_summary")
+    if isinstance(summary, str) and len(summary) > settings.card_summary_chars:
+        fields["job_summary"] = summary[: settings.card_summary_chars] + "…"
+    return {
+        "id": entry.get("id"),
+        "fields": fields,
+        "metadata": {"score": (entry.get("metadata") or {}).get("score", 0.0)},
+    }
+
+
+def project(body: dict, view: str) -> dict:
+    """The response body in the requested view, the full view is returned as is."""
+    if view != "card" or "entries" not in body:
+        return body
+    projected = body | {"entries": [card_entry(entry) for entry in body["entries"]]}
+    if body.get("metadata"):
+        projected["metadata"] = body["metadata"] | {"search_vector": []}
+    return projected
+
+
+async def fetch_job(client: AsyncQdrantClient, id_: str) -> dict | None:
+    """Every field of one posting, read from the Qdrant payload by its entity id."""
+    points, _ = await client.scroll(
+        settings.qdrant_collection,
+        scroll_filter=models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=ENTITY_ID_PAYLOAD_FIELD, match=models.MatchValue(value=f"{job_schema._schema_name}:{id_}")
+                )
+            ]
+        ),
+        limit=1,
+        with_payload=True,
+        with_vectors=False,
+    )
+    return to_entry(points[0]) if points else None
@@ -0,0 +1,204 @@
+"""Deterministic fast path for natural language job queries.
+
+Simple queries like "remote junior data analyst jobs in the UK with SQL" only need
+the value mappings that are already written out in nlq.py and the options of the
+filters in filters.py. Cities are not exported to categories.json (see CATEGORY_LIMITS in
+build_categories.py), they come from the value index of the gateway instead. The RuleBasedParser resolves them locally and reports a
+confidence; the gateway only falls back to the LLM when the confidence is low.
+"""
+
+import re
+from collections import namedtuple
+
+from superlinked_app.filters import filters, job_categories
+from superlinked_app.nlq import (
+    country_aliases,
+    experience_level_aliases,
+    skills_examples,
+    title_aliases,
+    work_type_aliases,
+)
+from superlinked_app.value_resolver import ValueResolver
+
+# Result of a local parse: the superlinked params and how much of the query they explain
+ParsedQuery = namedtuple("ParsedQuery", ["params", "confidence", "unmatched"])
+
+# Job category implied by each canonical title (see 'job_categories_include' in the system prompt)
+title_categories = {
+    "Data Analyst": "data_analyst",
+    "Software Engineer": "software_engineer",
+    "Data Scientist": "data_scientist",
+    "Data Engineer": "data_engineer",
+}
+
+us_state_names = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA",
+    "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA",
+    "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO",
+    "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
+    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "district of columbia": "DC",
+}
+
+# Words that carry no search intent of their own
+filler_words = {
+    "a", "an", "the", "and", "or", "in", "at", "on", "of", "for", "to", "with", "as", "from",
+    "near", "based", "around", "within", "any", "some", "all", "my", "me", "i", "im", "i'm",
+    "am", "is", "are", "be", "looking", "look", "want", "wanted", "need", "find", "show", "search",
+    "searching", "get", "like", "would", "please", "job", "jobs", "role", "roles", "position",
+    "positions", "opening", "openings", "opportunity", "opportunities", "vacancy", "vacancies",
+    "career", "careers", "work", "working", "experience", "skills", "skill", "skilled", "knowledge",
+    "background", "using", "who", "knows", "know", "good", "strong", "level", "type", "kind",
+    "possible", "if", "live", "living", "preferably", "ideally", "also", "either", "both", "country",
+}
+
+# Queries with these words need include/exclude reasoning, salary or preference weighting
+llm_only_words = {
+    "not", "no", "except", "excluding", "exclude", "without", "but", "outside", "avoid", "other",
+    "than", "salary", "pay", "paid", "paying", "compensation", "benefits", "$", "k", "startup",
+    "company", "companies", "firm", "more", "less", "prefer", "priority",
+}
+
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:[.\-'/][a-z0-9+#]+)*", re.IGNORECASE)
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text)
+
+
+class RuleBasedParser:
+    """Phrase matcher built from the nlq.py alias tables, the filters list, categories.json and the value index."""
+
+    def __init__(self, value_resolver: ValueResolver | None = None) -> None:
+        self._include_param_by_field = {
+            item.field_name: item.param_name for item in filters if item.param_name.endswith("_include")
+        }
+        self._options_by_param = {item.param_name: set(item.options) for item in filters}
+        self._phrases: dict[tuple[str, ...], set[tuple[str, str]]] = {}
+        # Short codes like 'US', 'IN' or 'OR' are also common words, so they only count when upper case
+        self._codes: dict[str, set[tuple[str, str]]] = {}
+
+        for title, variations in title_aliases.items():
+            for phrase in [title, *variations]:
+                self._add(phrase, "title", title)
+        for country in job_categories.get("search_country", []):
+            self._add(country, "search_country", country)
+        for country, variations in country_aliases.items():
+            for phrase in variations:
+                self._add(phrase, "search_country", country)
+        for level, variations in experience_level_aliases.items():
+            for phrase in [level, *variations]:
+                self._add(phrase, "job_level", level)
+        for work_type, variations in work_type_aliases.items():
+            for phrase in [work_type, *variations]:
+                self._add(phrase, "job_type", work_type)
+        for name, state in us_state_names.items():
+            self._add(name, "state", state)
+        for state in job_categories.get("state", us_state_names.values()):
+            self._add(state, "state", state)
+        skills = set(job_categories.get("skills_list", []))
+        for skill in skills_examples:
+            # The first spelling wins, e.g. 'Machine Learning' over 'Machine learning'
+            if (not skills or skill in skills) and tuple(tokenize(skill.lower())) not in self._phrases:
+                self._add(skill, "skills", skill)
+        cities = job_categories.get("search_city", [])
+        city_index = value_resolver.indexes.get("search_city") if value_resolver is not None else None
+        if city_index is not None:
+            # Every counted city, by its most frequent spelling; the gateway expands it to all of them.
+            # Cities named like a filler word or a title, level, work type or skill would take over
+            # common queries, only the other place names are left ambiguous
+            taken = {
+                phrase
+                for phrase, targets in self._phrases.items()
+                if {target for target, _ in targets} - {"state", "search_country"}
+            }
+            cities = [
+                spellings[0]
+                for key, spellings in city_index.values.items()
+                if key not in filler_words and tuple(tokenize(key)) not in taken
+            ]
+        for city in cities:
+            self._add(city, "search_city", city)
+        self._max_phrase_length = max(len(phrase) for phrase in self._phrases)
+
+    def _add(self, phrase: str, target: str, value: str) -> None:
+        if target != "skills" and phrase.isupper() and len(phrase) <= 2:
+            self._codes.setdefault(phrase, set()).add((target, value))
+            return
+        tokens = tuple(token.lower() for token in tokenize(phrase))
+        if tokens:
+            self._phrases.setdefault(tokens, set()).add((target, value))
+
+    def parse(self, natural_query: str) -> ParsedQuery:
+        original_tokens = tokenize(natural_query)
+        tokens = [token.lower() for token in original_tokens]
+        if any(token in llm_only_words for token in tokens) or "$" in natural_query:
+            return ParsedQuery({}, 0.0, tokens)
+
+        matches: dict[str, list[str]] = {}
+        unmatched: list[str] = []
+        content_tokens = 0
+        matched_tokens = 0
+        i = 0
+        while i < len(tokens):
+            for length in range(min(self._max_phrase_length, len(tokens) - i), 0, -1):
+                targets = self._phrases.get(tuple(tokens[i : i + length]))
+                if targets:
+                    break
+            else:
+                length = 1
+                targets = self._codes.get(original_tokens[i])
+
+            if targets is None:
+                if tokens[i] not in filler_words:
+                    content_tokens += 1
+                    unmatched.append(tokens[i])
+            elif len({target for target, _ in targets}) > 1:
+                # e.g. 'new york' is both a state and a search city - let the LLM decide
+                content_tokens += length
+                unmatched.extend(tokens[i : i + length])
+            else:
+                content_tokens += length
+                matched_tokens += length
+                for target, value in targets:
+                    values = matches.setdefault(target, [])
+                    if value not in values:
+                        values.append(value)
+            i += length
+
+        if not matched_tokens:
+            return ParsedQuery({}, 0.0, unmatched)
+        return ParsedQuery(self._to_params(matches), matched_tokens / content_tokens, unmatched)
+
+    def _to_params(self, matches: dict[str, list[str]]) -> dict:
+        params: dict = {}
+        titles = matches.pop("title", [])
+        skills = matches.pop("skills", [])
+        if titles:
+            params["title"] = titles[0]
+            matches.setdefault("job_category", []).extend(
+                title_categories[title] for title in titles if title in title_categories
+            )
+        if skills:
+            params["skills"] = skills
+
+        for field_name, values in matches.items():
+            param_name = self._include_param_by_field.get(field_name)
+            if param_name is None:
+                continue
+            options = self._options_by_param.get(param_name)
+            values = [value for value in values if not options or value in options]
+            if values:
+                params[param_name] = values
+
+        # Mirror the LLM's habit of writing a short description from title and skills
+        description = titles[0] if titles else ""
+        if skills:
+            description = f"{description or 'Role'} with {' and '.join(skills)} experience"
+        params["description"] = f"{description}." if description else ""
+        return params
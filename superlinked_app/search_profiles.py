@@ -0,0 +1,329 @@
+"""Named search quality/latency profiles, and the sweep that measures them on labeled queries.
+
+The space weights of query.py (0.8 / 1.0 / 0.9, set both as space weights and as the
+`similar_*_weight` params of the `job` query) and the result limit are the query params that
+trade quality for latency. A profile is a named set of defaults for them, registered in
+SEARCH_PROFILES_PATH and selected per request through the gateway:
+
+    POST /api/v1/search/job {"natural_query": "...", "profile": "fast"}
+
+The params of the request still win over the profile. `similar-jobs` requests only take the
+limit of a profile, so they are still answered from the precomputed neighbor lists. Requests without a profile use
+SEARCH_PROFILE_DEFAULT (empty = the defaults of query.py), for example to switch the whole
+gateway to a cheaper profile under load. `GET /api/v1/profiles` lists the profiles and the
+metrics they were registered with.
+
+The profiles are measured on labeled queries (one JSON object per line with the `query`, its
+`payload` and the `relevant` posting ids with their grade, see `benchmark generate`):
+
+    python -m superlinked_app.search_profiles evaluate [--url URL] [--weights 0.5 0.8 1.0] [--limits 10 20]
+        [--ef 32 64 128] [--k 10]
+    python -m superlinked_app.search_profiles register fast RESULT.json [--config N]
+
+`evaluate` searches every labeled query with every combination of the space weights (the same
+value for a space weight and its `similar_*_weight`) and limit, one request at a time, and
+reports recall@k, NDCG@k and p50/p95 latency per configuration, with the most accurate one and
+the fastest one within --tolerance of its NDCG as the suggested `accurate` and `fast` profiles.
+The HNSW search effort is not a query param of the Superlinked server, it is the collection's
+`ef` (QDRANT_HNSW_EF_CONSTRUCT, see storage_profile.py), so `--ef` values are measured by
+searching Qdrant directly with the query vectors of the default configuration, without the
+hard filters, against exact search. `register` stores a configuration of a result as a profile.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+
+import numpy as np
+import requests
+from qdrant_client import QdrantClient, models
+
+from superlinked_app.benchmark import percentiles, save_result
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.filter_planner import ENTITY_ID_PAYLOAD_FIELD
+
+PROFILE_PARAM = "profile"
+PROFILE_HEADER = "x-search-profile"
+SPACES = ("description", "title", "skills")
+# Space weights of query.py, the ef sweep searches with the query vectors of these weights
+DEFAULT_WEIGHTS = {"description": 0.8, "title": 1.0, "skills": 0.9}
+# Profile params each query accepts, the others are left out of its requests. The weights are
+# measured on `job` queries; similar-jobs keeps the weights of its precomputed neighbor lists.
+QUERY_PARAMS = {
+    "job": [f"{space}_weight" for space in SPACES] + [f"similar_{space}_weight" for space in SPACES] + ["limit"],
+    "similar-jobs": ["limit"],
+}
+
+
+class SearchProfiles:
+    """The registered profiles, as defaults for the params of the searches."""
+
+    def __init__(self, path: str) -> None:
+        self.profiles: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.profiles = json.load(f)["profiles"]
+
+    def params(self, name: str, query_name: str) -> dict | None:
+        """Defaults of a profile for one query, None for an unknown profile."""
+        if name not in self.profiles:
+            return None
+        accepted = QUERY_PARAMS.get(query_name, [])
+        return {param: value for param, value in self.profiles[name]["params"].items() if param in accepted}
+
+    def apply(self, query_name: str, payload: dict) -> tuple[dict, str | None]:
+        """The payload with the defaults of its profile, and the profile name; KeyError for an unknown one."""
+        payload = dict(payload)
+        name = payload.pop(PROFILE_PARAM, None) or settings.search_profile_default
+        if not name:
+            return payload, None
+        defaults = self.params(name, query_name)
+        if defaults is None:
+            raise KeyError(name)
+        return defaults | payload, name
+
+
+def recall_at_k(found: list[str], relevant: dict[str, int], k: int) -> float:
+    """Share of the relevant postings in the top k, out of at most k."""
+    if not relevant:
+        return 0.0
+    return len(set(found[:k]) & set(relevant)) / min(len(relevant), k)
+
+
+def ndcg_at_k(found: list[str], relevant: dict[str, int], k: int) -> float:
+    """Normalized discounted cumulative gain of the graded postings in the top k."""
+    dcg = sum((2 ** relevant.get(id_, 0) - 1) / math.log2(rank + 2) for rank, id_ in enumerate(found[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2**grade - 1) / math.log2(rank + 2) for rank, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def read_labeled_queries(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+    for query in queries:
+        relevant = query["relevant"]
+        # A plain list of ids is graded 1
+        query["relevant"] = {str(id_): 1 for id_ in relevant} if isinstance(relevant, list) else relevant
+    return queries
+
+
+def configurations(weights: list[float], limits: list[int]) -> list[dict]:
+    """Params of every combination of a weight per space and a limit."""
+    configs = []
+    for space_weights in itertools.product(weights, repeat=len(SPACES)):
+        for limit in limits:
+            params = {f"{space}_weight": weight for space, weight in zip(SPACES, space_weights)}
+            params |= {f"similar_{space}_weight": weight for space, weight in zip(SPACES, space_weights)}
+            configs.append(params | {"limit": limit})
+    return configs
+
+
+def evaluate_config(
+    session: requests.Session, url: str, queries: list[dict], params: dict, k: int
+) -> tuple[dict, list]:
+    """Quality and latency of one configuration, with the query vectors the server searched with."""
+    recalls, ndcgs, latencies, vectors, errors = [], [], [], [], 0
+    for query in queries:
+        query_name = query.get("query", "job")
+        accepted = QUERY_PARAMS.get(query_name, [])
+        payload = query["payload"] | {param: value for param, value in params.items() if param in accepted}
+        started = time.perf_counter()
+        response = session.post(
+            f"{url}/api/v1/search/{query_name}",
+            json=payload,
+            headers={"x-include-metadata": "true"},
+            timeout=settings.gateway_request_timeout_seconds,
+        )
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            errors += 1
+            vectors.append(None)
+            continue
+        body = response.json()
+        found = [str(entry["id"]) for entry in body.get("entries", [])]
+        latencies.append(elapsed)
+        recalls.append(recall_at_k(found, query["relevant"], k))
+        ndcgs.append(ndcg_at_k(found, query["relevant"], k))
+        vectors.append((body.get("metadata") or {}).get("search_vector"))
+    return {
+        "params": params,
+        f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else 0.0,
+        f"ndcg@{k}": round(float(np.mean(ndcgs)), 4) if ndcgs else 0.0,
+        "errors": errors,
+    } | percentiles(latencies), vectors
+
+
+def p95_ms(result: dict) -> float:
+    return math.inf if result["p95_ms"] is None else result["p95_ms"]
+
+
+def suggest(results: list[dict], k: int, tolerance: float) -> dict:
+    """Index of the most accurate configuration, and of the fastest one within `tolerance` of its NDCG."""
+    ndcg = f"ndcg@{k}"
+    accurate = max(range(len(results)), key=lambda i: (results[i][ndcg], -p95_ms(results[i])))
+    floor = results[accurate][ndcg] * (1 - tolerance)
+    fast = min((i for i in range(len(results)) if results[i][ndcg] >= floor), key=lambda i: p95_ms(results[i]))
+    return {"accurate": accurate, "fast": fast}
+
+
+def latency(value: float | None) -> str:
+    return "-" if value is None else str(value)
+
+
+def evaluate_ef(queries: list[dict], vectors: list, k: int, ef_values: list[int]) -> list[dict]:
+    """Label and exact search recall of HNSW searches in Qdrant with every `ef`, without the hard filters."""
+    client = QdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key or None)
+    name = next(iter(client.get_collection(settings.qdrant_collection).config.params.vectors))
+    searched = [(query, vector) for query, vector in zip(queries, vectors) if vector]
+
+    def run(search_params: models.SearchParams) -> tuple[list[list[str]], list[float]]:
+        results, latencies = [], []
+        for _, vector in searched:
+            started = time.perf_counter()
+            response = client.query_points(
+                settings.qdrant_collection,
+                query=vector,
+                using=name,
+                limit=k,
+                search_params=search_params,
+                with_payload=[ENTITY_ID_PAYLOAD_FIELD],
+            )
+            latencies.append(time.perf_counter() - started)
+            # Entity ids are "<schema>:<id>"
+            results.append([point.payload[ENTITY_ID_PAYLOAD_FIELD].split(":", 1)[1] for point in response.points])
+        return results, latencies
+
+    exact, _ = run(models.SearchParams(exact=True))
+    rows = []
+    for ef in ef_values:
+        found, latencies = run(models.SearchParams(hnsw_ef=ef))
+        recalls = [recall_at_k(ids, query["relevant"], k) for ids, (query, _) in zip(found, searched)]
+        exact_recalls = [len(set(ids) & set(truth)) / max(len(truth), 1) for ids, truth in zip(found, exact)]
+        rows.append(
+            {
+                "ef": ef,
+                f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else 0.0,
+                f"exact_recall@{k}": round(float(np.mean(exact_recalls)), 4) if exact_recalls else 0.0,
+            }
+            | percentiles(latencies)
+        )
+    client.close()
+    return rows
+
+
+def evaluate(
+    url: str, queries_path: str, weights: list[float], limits: list[int], ef_values: list[int], k: int, tolerance: float
+) -> None:
+    queries = read_labeled_queries(queries_path)
+    configs = configurations(weights, limits)
+    # Configuration closest to the query.py defaults, with the largest limit
+    vector_config = min(
+        range(len(configs)),
+        key=lambda i: (
+            sum(abs(configs[i][f"{space}_weight"] - DEFAULT_WEIGHTS[space]) for space in SPACES),
+            -configs[i]["limit"],
+        ),
+    )
+    print(f"{len(queries)} labeled queries, {len(configs)} configurations against {url}\n")
+    results, vectors = [], []
+    with requests.Session() as session:
+        # Warm the embedding caches, so the first configuration is not slower for it
+        evaluate_config(session, url, queries[:20], configs[0], k)
+        for i, params in enumerate(configs):
+            result, config_vectors = evaluate_config(session, url, queries, params, k)
+            results.append(result)
+            if i == vector_config:
+                vectors = config_vectors
+    suggestions = suggest(results, k, tolerance)
+
+    print(
+        f"{'#':>4s} {'desc':>5s} {'title':>5s} {'skills':>6s} {'limit':>5s}"
+        f" {'recall@' + str(k):>9s} {'ndcg@' + str(k):>8s} {'p50 ms':>8s} {'p95 ms':>8s}"
+    )
+    for index, result in enumerate(results):
+        params = result["params"]
+        marks = " ".join(name for name, suggested in suggestions.items() if suggested == index)
+        print(
+            f"{index:4d} {params['description_weight']:5.2f} {params['title_weight']:5.2f}"
+            f" {params['skills_weight']:6.2f} {params['limit']:5d}"
+            f" {result[f'recall@{k}']:9.3f} {result[f'ndcg@{k}']:8.3f}"
+            f" {latency(result['p50_ms']):>8} {latency(result['p95_ms']):>8} {marks}"
+        )
+
+    ef_rows = []
+    if ef_values:
+        ef_rows = evaluate_ef(queries, vectors, k, ef_values)
+        print(f"\n{'hnsw ef':>7s} {'recall@' + str(k):>9s} {'vs exact':>9s} {'p50 ms':>8s} {'p95 ms':>8s}")
+        for row in ef_rows:
+            print(
+                f"{row['ef']:7d} {row[f'recall@{k}']:9.3f} {row[f'exact_recall@{k}']:9.3f}"
+                f" {latency(row['p50_ms']):>8} {latency(row['p95_ms']):>8}"
+            )
+    result = {"url": url, "queries": len(queries), "k": k, "configs": results, "suggested": suggestions, "ef": ef_rows}
+    print(f"\nSuggested profiles: {suggestions}\nSaved to {save_result('profiles', result)}")
+
+
+def register(name: str, result_path: str, index: int | None) -> None:
+    """Store a configuration of an `evaluate` result as profile `name`."""
+    with open(result_path, encoding="utf-8") as f:
+        result = json.load(f)
+    if index is None:
+        if name not in result["suggested"]:
+            raise SystemExit(f"No suggested {name!r} configuration in {result_path}, pass --config")
+        index = result["suggested"][name]
+    config = result["configs"][index]
+    path = get_data_file_path(settings.search_profiles_path)
+    registry = {"profiles": {}}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            registry = json.load(f)
+    registry["profiles"][name] = {
+        "params": config["params"],
+        "metrics": {key: value for key, value in config.items() if key != "params"},
+        "source": os.path.basename(result_path),
+        "registered_at": time.time(),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp_path, path)
+    print(f"Registered profile {name!r}: {config['params']}, restart the gateway to serve it")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure and register search quality/latency profiles.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    evaluate_parser = commands.add_parser("evaluate", help="Sweep weights, limits and ef on labeled queries.")
+    evaluate_parser.add_argument("--url", default=settings.gateway_upstream_url, help="Superlinked server or gateway.")
+    evaluate_parser.add_argument("--queries", default=settings.benchmark_labeled_queries_path, help="Labeled queries.")
+    evaluate_parser.add_argument("--weights", type=float, nargs="+", default=[0.5, 0.8, 1.0], help="Weights per space.")
+    evaluate_parser.add_argument("--limits", type=int, nargs="+", default=[10], help="Result limits.")
+    evaluate_parser.add_argument("--ef", type=int, nargs="*", default=[], help="hnsw_ef values to search Qdrant with.")
+    evaluate_parser.add_argument("--k", type=int, default=10, help="Rank the recall and NDCG are measured at.")
+    evaluate_parser.add_argument("--tolerance", type=float, default=0.02, help="NDCG loss allowed for 'fast'.")
+    register_parser = commands.add_parser("register", help="Register a configuration of a result as a profile.")
+    register_parser.add_argument("name")
+    register_parser.add_argument("result", help="Result file written by evaluate.")
+    register_parser.add_argument("--config", type=int, help="Configuration number, the suggested `name` if unset.")
+    args = parser.parse_args()
+
+    if args.command == "evaluate":
+        evaluate(
+            args.url.rstrip("/"),
+            get_data_file_path(args.queries),
+            args.weights,
+            args.limits,
+            args.ef,
+            args.k,
+            args.tolerance,
+        )
+    else:
+        register(args.name, args.result, args.config)
+
+
+if __name__ == "__main__":
+    main()
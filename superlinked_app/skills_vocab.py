@@ -0,0 +1,170 @@
+"""Skills vocabulary of `skills_space`: normalized, alias merged and pruned to the top-K skills.
+
+Every skill in the vocabulary is one dimension of the categorical skills space, and every
+skill outside of it lands in the single 'other' dimension Superlinked adds. Skills are
+compared by a normalized key (case, whitespace, hyphens, the aliases below), so
+'Machine learning' and 'machine-learning' hit the 'Machine Learning' dimension.
+
+`python -m superlinked_app.build_categories` writes the vocabulary to categories.json
+(`skills_list`, SKILLS_VOCAB_SIZE most frequent skills). The report compares vocabulary sizes:
+
+    python -m superlinked_app.skills_vocab [--dataset PATH] [--sizes 50 100 200 500]
+"""
+
+import argparse
+import random
+from collections import Counter
+
+import numpy as np
+
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.preprocess import SKILLS_COLUMN, read_chunks, split_skills
+
+# Column of the skills outside of the vocabulary in the report
+OTHER_SKILLS = "\x00other"
+
+# Canonical skill -> spellings seen in the postings
+skill_aliases = {
+    "Machine Learning": ["ml"],
+    "JavaScript": ["js", "java script"],
+    "Node.js": ["nodejs", "node"],
+    "PostgreSQL": ["postgres", "postgre sql"],
+    "Kubernetes": ["k8s"],
+    "AWS": ["amazon web services", "amazon web services (aws)"],
+    "GCP": ["google cloud platform", "google cloud platform (gcp)", "google cloud"],
+    "Azure": ["microsoft azure"],
+    "Excel": ["microsoft excel", "ms excel"],
+    "Power BI": ["powerbi", "microsoft power bi"],
+    "CI/CD": ["ci cd", "cicd"],
+    "Data Visualization": ["data visualisation"],
+    "Problem Solving": ["problemsolving"],
+    "Communication": ["communication skills"],
+    "Teamwork": ["team work"],
+}
+
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(skill.replace("-", " ").replace("_", " ").split()).strip(" .,;:").casefold()
+
+
+alias_keys = {
+    normalize_skill(alias): normalize_skill(skill)
+    for skill, aliases in skill_aliases.items()
+    for alias in aliases + [skill]
+}
+canonical_names = {normalize_skill(skill): skill for skill in skill_aliases}
+
+
+def skill_key(skill: str) -> str:
+    key = normalize_skill(skill)
+    return alias_keys.get(key, key)
+
+
+def merge_skill_counts(counts: dict[str, int]) -> Counter:
+    """Merge the counts of spellings with the same key under their most frequent spelling."""
+    merged, spellings = Counter(), {}
+    for skill, count in counts.items():
+        key = skill_key(skill)
+        if not key:
+            continue
+        merged[key] += count
+        spellings.setdefault(key, Counter())[skill] += count
+    return Counter(
+        {canonical_names.get(key) or spellings[key].most_common(1)[0][0]: count for key, count in merged.items()}
+    )
+
+
+class SkillVocabulary:
+    """Canonical spelling of the skills in `skills_list`, used on both the ingest and the query side."""
+
+    def __init__(self, skills: list[str]) -> None:
+        self._by_key: dict[str, str] = {}
+        for skill in skills:
+            self._by_key.setdefault(skill_key(skill), skill)
+        # One dimension per key, the first (most frequent) spelling wins
+        self.skills = list(self._by_key.values())
+
+    def canonicalize(self, skills) -> list[str] | None:
+        """Split a comma separated skills cell if needed and map every skill to its vocabulary spelling."""
+        if isinstance(skills, str):
+            skills = split_skills(skills)
+        if skills is None:
+            return None
+        canonical = (self._by_key.get(skill_key(skill), skill.strip()) for skill in skills)
+        return list(dict.fromkeys(skill for skill in canonical if skill))
+
+
+def read_skill_keys(dataset_path: str) -> tuple[Counter, list[list[str]]]:
+    """Raw skill counts and the skill keys of every posting."""
+    counts, postings = Counter(), []
+    for chunk in read_chunks(dataset_path, [SKILLS_COLUMN]):
+        for skills in chunk[SKILLS_COLUMN]:
+            if not isinstance(skills, list):
+                skills = split_skills(skills) or []
+            counts.update(skills)
+            postings.append(list(dict.fromkeys(skill_key(skill) for skill in skills)))
+    return counts, postings
+
+
+def skills_matrix(postings: list[list[str]], vocabulary: set[str] | None) -> np.ndarray:
+    """L2 normalized n-hot skills vectors, with the skills outside of `vocabulary` in one 'other' column."""
+    columns = {}
+    rows = []
+    for keys in postings:
+        mapped = {key if vocabulary is None or key in vocabulary else OTHER_SKILLS for key in keys}
+        rows.append([columns.setdefault(key, len(columns)) for key in mapped])
+    matrix = np.zeros((len(postings), len(columns)), dtype=np.float32)
+    for i, indices in enumerate(rows):
+        matrix[i, indices] = 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def neighbours(matrix: np.ndarray, k: int) -> np.ndarray:
+    scores = matrix @ matrix.T
+    np.fill_diagonal(scores, -1)
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def report(dataset_path: str, sizes: list[int], sample_size: int, k: int, text_dimensions: int) -> None:
+    raw_counts, postings = read_skill_keys(dataset_path)
+    merged = merge_skill_counts(raw_counts)
+    ranked_keys = [skill_key(skill) for skill, _ in merged.most_common()]
+    mentions = sum(merged.values())
+    print(f"{len(postings)} postings, {len(raw_counts)} distinct skill strings, {len(merged)} after merging aliases")
+
+    # Skills-only neighbours with the full, unpruned vocabulary are the reference
+    sample = random.Random(0).sample(postings, min(sample_size, len(postings)))
+    reference = neighbours(skills_matrix(sample, None), k)
+
+    print(
+        f"\n{'skills':>7s} {'width':>6s} {'bytes/point':>12s} {'mentions':>9s} {'postings':>9s} {'recall@' + str(k):>9s}"
+    )
+    for size in sorted(sizes) + [len(ranked_keys)]:
+        vocabulary = set(ranked_keys[:size])
+        width = 2 * text_dimensions + len(vocabulary) + 1
+        covered_mentions = sum(count for skill, count in merged.most_common(size)) / max(mentions, 1)
+        covered_postings = np.mean([any(key in vocabulary for key in keys) for keys in postings]) if postings else 0.0
+        found = neighbours(skills_matrix(sample, vocabulary), k)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, reference)]) if len(sample) > k else 1.0
+        print(
+            f"{len(vocabulary):7d} {width:6d} {width * 4:12d} {covered_mentions:9.1%} {covered_postings:9.1%} {recall:9.3f}"
+        )
+    print("\nwidth: vector dimensions (title + description + skills + other), stored as float32")
+    print("mentions/postings: share of skill mentions / postings with a skill inside the vocabulary")
+    print(f"recall@{k}: overlap of the skills-only neighbours with the ones of the full vocabulary")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare skills vocabulary sizes for the skills space.")
+    parser.add_argument("--dataset", default=settings.path_dataset, help="CSV or Parquet dataset.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 500], help="Vocabulary sizes.")
+    parser.add_argument("--sample", type=int, default=2000, help="Postings sampled for the recall estimate.")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours the recall is measured at.")
+    parser.add_argument("--text-dimensions", type=int, default=768, help="Dimensions of one text embedding.")
+    args = parser.parse_args()
+    report(get_data_file_path(args.dataset), args.sizes, args.sample, args.k, args.text_dimensions)
+
+
+if __name__ == "__main__":
+    main()
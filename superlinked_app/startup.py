@@ -0,0 +1,83 @@
+"""Startup phases and readiness of the gateway.
+
+The containers answer `/health` long before the first search can be served quickly: the
+Superlinked server still has to come up, the Qdrant collection to exist, and the first query
+pays for the model load and the kernel warm-up. The gateway goes through these phases in the
+background and only reports ready once they are done:
+- `load`: the local state (categories, NLQ cache, value index, checkpoints),
+- `upstream`: waiting for the Superlinked server `/health`,
+- `collection`: waiting for the Qdrant collection and its payload indexes,
+- `warmup`: STARTUP_WARMUP_ROUNDS rounds of synthetic searches through every query,
+- `embedding_cache`: replaying the most frequent query texts (after the gateway is ready).
+
+    GET /ready   # 200 once ready, 503 with the current phase before
+
+The phase durations are exported as `roleradar_startup_phase_seconds` and appended to
+STARTUP_TIMINGS_PATH once the gateway is ready, to track startup regressions.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Gauge
+
+from superlinked_app.config import get_data_file_path, settings
+
+logger = logging.getLogger(__name__)
+
+phase_seconds = Gauge("roleradar_startup_phase_seconds", "Duration of the gateway startup phases.", ["phase"])
+ready_gauge = Gauge("roleradar_ready", "1 once the gateway has warmed up and serves searches.")
+
+
+class StartupTimer:
+    """Durations of the startup phases, and whether the gateway is ready."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.current: str | None = None
+        self.ready = False
+        self.ready_seconds: float | None = None
+
+    @contextmanager
+    def phase(self, name: str):
+        self.current = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+            phase_seconds.labels(name).set(self.phases[name])
+            self.current = None
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.ready_seconds = time.perf_counter() - self.started
+        ready_gauge.set(1)
+        logger.info("Gateway ready in %.1fs: %s", self.ready_seconds, self.phases_ms())
+        log_startup(
+            {"time": time.time(), "ready_ms": round(self.ready_seconds * 1000, 1), "phases_ms": self.phases_ms()}
+        )
+
+    def phases_ms(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()}
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "phase": self.current,
+            "ready_ms": round(self.ready_seconds * 1000, 1) if self.ready_seconds is not None else None,
+            "phases_ms": self.phases_ms(),
+        }
+
+
+def log_startup(record: dict) -> None:
+    if not settings.startup_timings_path:
+        return
+    try:
+        with open(get_data_file_path(settings.startup_timings_path), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        logger.warning("Could not write the startup timings: %s", e)
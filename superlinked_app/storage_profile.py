@@ -0,0 +1,171 @@
+"""Storage profile of the Qdrant collection and a recall vs latency report against exact search.
+
+The Superlinked connector creates the collection with plain named vectors and only chooses
+between exact (`flat`) and HNSW search per query. Everything else is collection level
+configuration that Qdrant applies in the background, so it is set here on the existing
+collection instead:
+- HNSW graph parameters (`m`, `ef_construct`); searches without an explicit `hnsw_ef`
+  use `ef_construct` as the beam size, so it is also the search time `ef`,
+- the `full_scan_threshold` below which filtered searches skip the graph and score the
+  matching points only (see filter_planner.py),
+- scalar (int8), product or binary quantization, with the quantized vectors kept in RAM,
+- original vectors on disk (memory mapped), used only to rescore the quantized candidates.
+The HNSW parameters, the threshold and the quantization only change the searches with
+QDRANT_SEARCH_ALGORITHM=hnsw: the default `flat` makes every search exact over the original
+vectors, so set it together with the profile.
+The originals are moved to disk with the `on_disk` flag of the named vector. Superlinked compares
+the vector params of an existing collection with the ones it would create when the server starts,
+and refuses to start once the flag was set (even back to false), so with QDRANT_VECTORS_ON_DISK=true
+a server restart needs a freshly created collection and a re-ingestion.
+The flag is only sent when it is enabled or was set before.
+
+Run it with:
+    python -m superlinked_app.storage_profile apply
+    python -m superlinked_app.storage_profile report [--queries 100] [--k 10] [--ef 32 64 128 256]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from superlinked_app.config import settings
+
+# Bytes per dimension of the vectors Qdrant keeps for each storage mode
+BYTES_PER_DIMENSION = {
+    "float32": 4.0,
+    "scalar": 1.0,
+    "product": 4.0 / int(settings.qdrant_product_compression.lstrip("x")),
+    "binary": 1.0 / 8,
+}
+
+ORIGINALS = models.QuantizationSearchParams(ignore=True)
+QUANTIZED = models.QuantizationSearchParams(rescore=False)
+RESCORED = models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+
+
+def quantization_config():
+    always_ram = settings.qdrant_quantization_always_ram
+    if settings.qdrant_quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=always_ram)
+        )
+    if settings.qdrant_quantization == "product":
+        return models.ProductQuantization(
+            product=models.ProductQuantizationConfig(
+                compression=models.CompressionRatio(settings.qdrant_product_compression), always_ram=always_ram
+            )
+        )
+    if settings.qdrant_quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+    return models.Disabled.DISABLED
+
+
+def apply_profile(client: QdrantClient) -> None:
+    name, size = vector_name(client)
+    on_disk = client.get_collection(settings.qdrant_collection).config.params.vectors[name].on_disk
+    # Qdrant compares the estimated filter matches with this threshold in kB of vectors
+    full_scan_threshold = -(-settings.qdrant_prefilter_max_matches * size * 4 // 1024)
+    client.update_collection(
+        settings.qdrant_collection,
+        hnsw_config=models.HnswConfigDiff(
+            m=settings.qdrant_hnsw_m,
+            ef_construct=settings.qdrant_hnsw_ef_construct,
+            full_scan_threshold=full_scan_threshold,
+        ),
+        quantization_config=quantization_config(),
+        vectors_config=(
+            {name: models.VectorParamsDiff(on_disk=settings.qdrant_vectors_on_disk)}
+            if settings.qdrant_vectors_on_disk or on_disk is not None
+            else None
+        ),
+    )
+
+
+def vector_name(client: QdrantClient) -> tuple[str, int]:
+    vectors = client.get_collection(settings.qdrant_collection).config.params.vectors
+    name, params = next(iter(vectors.items()))
+    return name, params.size
+
+
+def sample_queries(client: QdrantClient, name: str, count: int) -> list[list[float]]:
+    """Stored index vectors, used as queries (they have the same shape as the query vectors)."""
+    points, _ = client.scroll(settings.qdrant_collection, limit=count, with_vectors=[name], with_payload=False)
+    return [point.vector[name] for point in points]
+
+
+def run_searches(client, name, queries, k, search_params) -> tuple[list[list], list[float]]:
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        response = client.query_points(
+            settings.qdrant_collection, query=query, using=name, limit=k, search_params=search_params
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([point.id for point in response.points])
+    return results, latencies
+
+
+def search_variants(ef_values: list[int], quantized: bool) -> list[tuple[str, models.SearchParams]]:
+    variants = []
+    for ef in ef_values:
+        if not quantized:
+            variants.append((f"hnsw ef={ef}", models.SearchParams(hnsw_ef=ef)))
+            continue
+        variants += [
+            (f"hnsw ef={ef} originals", models.SearchParams(hnsw_ef=ef, quantization=ORIGINALS)),
+            (f"hnsw ef={ef} quantized", models.SearchParams(hnsw_ef=ef, quantization=QUANTIZED)),
+            (f"hnsw ef={ef} quantized+rescore x2", models.SearchParams(hnsw_ef=ef, quantization=RESCORED)),
+        ]
+    return variants
+
+
+def report(client: QdrantClient, query_count: int, k: int, ef_values: list[int]) -> None:
+    info = client.get_collection(settings.qdrant_collection)
+    name, size = vector_name(client)
+    on_disk = client.get_collection(settings.qdrant_collection).config.params.vectors[name].on_disk
+    points = info.points_count or 0
+    quantized = info.config.quantization_config is not None
+
+    print(f"collection '{settings.qdrant_collection}': {points} points, vector '{name}' of {size} dimensions")
+    hnsw = info.config.hnsw_config
+    print(f"hnsw m={hnsw.m} ef_construct={hnsw.ef_construct}, quantization: {info.config.quantization_config}")
+    for mode, bytes_per_dimension in BYTES_PER_DIMENSION.items():
+        print(f"  {mode:8s} vectors: {points * size * bytes_per_dimension / 2**20:10.1f} MiB")
+
+    queries = sample_queries(client, name, query_count)
+    exact, _ = run_searches(client, name, queries, k, models.SearchParams(exact=True, quantization=ORIGINALS))
+    print(f"\n{'search':36s} {'recall@' + str(k):>9s} {'p50 ms':>8s} {'p95 ms':>8s}")
+    variants = [("exact (flat)", models.SearchParams(exact=True, quantization=ORIGINALS))]
+    for label, search_params in variants + search_variants(ef_values, quantized):
+        results, latencies = run_searches(client, name, queries, k, search_params)
+        recall = np.mean([len(set(found) & set(truth)) / max(len(truth), 1) for found, truth in zip(results, exact)])
+        print(f"{label:36s} {recall:9.3f} {np.percentile(latencies, 50):8.2f} {np.percentile(latencies, 95):8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply the Qdrant storage profile or report recall vs latency.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("apply", help="Apply the QDRANT_* storage settings to the collection.")
+    report_parser = subparsers.add_parser("report", help="Compare HNSW/quantized search with exact search.")
+    report_parser.add_argument("--queries", type=int, default=100, help="Number of sampled query vectors.")
+    report_parser.add_argument("--k", type=int, default=10, help="Result limit the recall is measured at.")
+    report_parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128, 256], help="hnsw_ef values to try.")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key or None)
+    if args.command == "apply":
+        apply_profile(client)
+        print(f"applied storage profile to '{settings.qdrant_collection}', Qdrant rebuilds segments in the background")
+        if settings.qdrant_search_algorithm.lower() != "hnsw":
+            print(
+                f"QDRANT_SEARCH_ALGORITHM={settings.qdrant_search_algorithm}: searches stay exact and ignore the HNSW"
+                " and quantization settings, set QDRANT_SEARCH_ALGORITHM=hnsw and restart the server to use them"
+            )
+    else:
+        report(client, args.queries, args.k, args.ef)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Streaming ingestion of new, updated and expired postings from a drop directory.
+
+Instead of regenerating the dataset and running the full ingestion again, a producer (a scraper,
+an export of the job board) writes the changes to files in STREAM_INGEST_DIR, and this process
+applies them to the index as they arrive:
+- `*.jsonl` files are tailed: every complete line is one record, and the lines appended later
+  are picked up by the next poll,
+- `*.csv` files, with the dataset columns, are read once and whole, so write them elsewhere and
+  move them into the directory when they are complete.
+The files are read in name order. A record is either a posting (its `id` and JobPosting fields),
+which is inserted or updated, or the delete of an expired posting: `{"op": "delete", "id": "123"}`
+(an `op` column in CSV files). The optional `event_time` (epoch seconds) of a record is when the
+change happened, for the lag metrics; it defaults to the time the record was read.
+
+Records are collected into micro-batches of STREAM_INGEST_BATCH_SIZE records, sent at the latest
+STREAM_INGEST_BATCH_WAIT_SECONDS after their first record was read. The last record of an id in a
+batch wins. Postings already ingested with the same content are skipped, the others are sent to
+the ingest endpoint of the Superlinked server, which embeds and upserts them, and the deleted
+postings are removed from Qdrant. The precomputed similar jobs of the deleted and changed postings,
+and every precomputed list they appear in, are deleted; the gateway searches them live until
+`python -m superlinked_app.neighbors` computes them again. The batch is committed to
+the ingestion checkpoint together with the file offsets, so a restarted process resumes after the
+last applied record, and a batch that failed is retried at the next poll.
+
+Run it with: python -m superlinked_app.stream_ingest [--once]
+The lag (event to index time of the last batch), the bytes not read yet and the totals are
+written to STREAM_INGEST_STATUS_PATH, served by the gateway at /ingest/stream and exported on its
+/metrics as `roleradar_stream_ingest_*` gauges.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from collections import namedtuple
+
+import pandas as pd
+import requests
+from prometheus_client import Gauge
+from qdrant_client import QdrantClient, models
+
+from superlinked_app.config import get_data_file_path, settings
+from superlinked_app.filter_planner import ENTITY_ID_PAYLOAD_FIELD
+from superlinked_app.index import job_schema, skills_vocabulary
+from superlinked_app.ingest import INGEST_PATH, IngestCheckpoint, row_hashes, schema_columns, to_records
+from superlinked_app.neighbors import NeighborStore
+
+STREAM_SUFFIXES = (".jsonl", ".csv")
+UPSERT_OP = "upsert"
+DELETE_OP = "delete"
+
+logger = logging.getLogger(__name__)
+
+lag_gauge = Gauge(
+    "roleradar_stream_ingest_lag_seconds", "Event to index delay of the oldest record of the last streamed batch."
+)
+backlog_gauge = Gauge("roleradar_stream_ingest_backlog_bytes", "Bytes of the drop directory not ingested yet.")
+idle_gauge = Gauge("roleradar_stream_ingest_idle_seconds", "Seconds since the streaming ingestion last polled.")
+
+# One change read from the drop directory; `row` holds the posting fields of an upsert
+StreamRecord = namedtuple("StreamRecord", ["op", "id", "row", "event_time"])
+
+
+def event_time(value, read_at: float) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return read_at
+    return value if math.isfinite(value) else read_at
+
+
+def parse_record(row: dict, read_at: float) -> StreamRecord:
+    """A stream record from a JSON object or CSV row, ValueError if it is not one."""
+    row = dict(row)
+    op = row.pop("op", None)
+    op = op if isinstance(op, str) and op else UPSERT_OP
+    id_ = row.get(job_schema.id.name)
+    if op not in (UPSERT_OP, DELETE_OP):
+        raise ValueError(f"Unknown op {op!r}")
+    if id_ is None or (isinstance(id_, float) and math.isnan(id_)) or str(id_) == "":
+        raise ValueError("Record without an id")
+    return StreamRecord(op, str(id_), row, event_time(row.pop("event_time", None), read_at))
+
+
+def canonical_skills(skills) -> list[str] | None:
+    """Vocabulary spelling of a skills list or comma separated cell, missing skills stay None."""
+    return skills_vocabulary.canonicalize(skills) if isinstance(skills, (str, list)) else None
+
+
+def read_jsonl(path: str, offset: int, max_records: int) -> tuple[list[StreamRecord], int, int]:
+    """Records of the complete lines after `offset`, the new offset and the count of rejected lines."""
+    records, rejected = [], 0
+    read_at = time.time()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # Still being written, read again by the next poll
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                records.append(parse_record(json.loads(line), read_at))
+            except (ValueError, TypeError) as e:
+                rejected += 1
+                logger.warning("Rejected record at byte %d of %s: %s", offset - len(line), path, e)
+            if len(records) >= max_records:
+                break
+    return records, offset, rejected
+
+
+def read_csv(path: str) -> tuple[list[StreamRecord], int]:
+    """Records of a whole CSV file and the count of rejected rows."""
+    records, rejected = [], 0
+    read_at = time.time()
+    for row in pd.read_csv(path, dtype=str).to_dict(orient="records"):
+        try:
+            records.append(parse_record(row, read_at))
+        except ValueError as e:
+            rejected += 1
+            logger.warning("Rejected row of %s: %s", path, e)
+    return records, rejected
+
+
+def delete_postings(client: QdrantClient, ids: list[str]) -> None:
+    """Remove the points of the postings from the Qdrant collection, by their entity id."""
+    client.delete(
+        settings.qdrant_collection,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key=ENTITY_ID_PAYLOAD_FIELD,
+                        match=models.MatchAny(any=[f"{job_schema._schema_name}:{id_}" for id_ in ids]),
+                    )
+                ]
+            )
+        ),
+        wait=True,
+    )
+
+
+class StreamIngester:
+    """Tails the drop directory and applies its records in micro-batches."""
+
+    def __init__(
+        self, directory: str, checkpoint: IngestCheckpoint, qdrant: QdrantClient, neighbor_store: NeighborStore | None
+    ) -> None:
+        self.directory = directory
+        self.checkpoint = checkpoint
+        self.qdrant = qdrant
+        self.neighbor_store = neighbor_store
+        # File name -> (offset, records) read so far; committed with the batch they belong to
+        self.offsets = checkpoint.stream_offsets()
+        self.pending: dict[str, StreamRecord] = {}
+        self.buffered = 0
+        self.first_read_at: float | None = None
+        self.oldest_event: float | None = None
+        self.status_path = get_data_file_path(settings.stream_ingest_status_path)
+        self.status = {
+            "status": "running",
+            "directory": directory,
+            "files": 0,
+            "backlog_bytes": 0,
+            "pending_records": 0,
+            "records_read": 0,
+            "rejected_records": 0,
+            "upserted_rows": 0,
+            "unchanged_rows": 0,
+            "deleted_rows": 0,
+            "batches": 0,
+            "lag_seconds": None,
+            "last_batch": None,
+            "started_at": time.time(),
+            "updated_at": time.time(),
+            "error": None,
+        }
+
+    def files(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(STREAM_SUFFIXES))
+
+    def add(self, records: list[StreamRecord], rejected: int) -> None:
+        for record in records:
+            # Re-inserted so the batch keeps the order of the last change of every id
+            self.pending.pop(record.id, None)
+            self.pending[record.id] = record
+            self.oldest_event = min(self.oldest_event or record.event_time, record.event_time)
+        if records and self.first_read_at is None:
+            self.first_read_at = time.time()
+        self.buffered += len(records)
+        self.status["records_read"] += len(records)
+        self.status["rejected_records"] += rejected
+
+    def poll(self) -> None:
+        """Read the new records of every file, sending a batch whenever one is full."""
+        batch_size = settings.stream_ingest_batch_size
+        for name in self.files():
+            path = os.path.join(self.directory, name)
+            offset, count = self.offsets.get(name, (0, 0))
+            size = os.path.getsize(path)
+            if name.endswith(".csv"):
+                if offset == 0 and size > 0:
+                    records, rejected = read_csv(path)
+                    self.add(records, rejected)
+                    self.offsets[name] = (size, len(records) + rejected)
+            else:
+                while offset < size:
+                    if self.buffered >= batch_size and not self.flush():
+                        return
+                    records, new_offset, rejected = read_jsonl(path, offset, batch_size - self.buffered)
+                    if new_offset == offset:
+                        break
+                    self.add(records, rejected)
+                    offset, count = new_offset, count + len(records) + rejected
+                    self.offsets[name] = (offset, count)
+            if self.buffered >= batch_size and not self.flush():
+                return
+        if self.pending and time.time() - self.first_read_at >= settings.stream_ingest_batch_wait_seconds:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Apply the pending records and commit them with the file offsets, False if it failed."""
+        if not self.pending and not self.buffered:
+            self.checkpoint.commit_stream(self.offsets, [], [], [])
+            return True
+        started = time.perf_counter()
+        upserts = [record for record in self.pending.values() if record.op == UPSERT_OP]
+        deleted_ids = [record.id for record in self.pending.values() if record.op == DELETE_OP]
+        ids, hashes, changed_ids = [], [], []
+        try:
+            if upserts:
+                rows = pd.DataFrame([record.row for record in upserts]).reindex(columns=schema_columns())
+                rows[job_schema.id.name] = [record.id for record in upserts]
+                if job_schema.job_skills.name in rows.columns:
+                    rows[job_schema.job_skills.name] = rows[job_schema.job_skills.name].map(canonical_skills)
+                ids, hashes = rows[job_schema.id.name].tolist(), row_hashes(rows).tolist()
+                changed = rows[self.checkpoint.changed_rows(ids, hashes)]
+                changed_ids = changed[job_schema.id.name].tolist()
+                url = f"{settings.gateway_upstream_url}{INGEST_PATH}"
+                for start in range(0, len(changed), settings.stream_ingest_batch_size):
+                    response = requests.post(
+                        url,
+                        json=to_records(changed.iloc[start : start + settings.stream_ingest_batch_size]),
+                        timeout=settings.ingest_request_timeout_seconds,
+                    )
+                    response.raise_for_status()
+            if deleted_ids:
+                delete_postings(self.qdrant, deleted_ids)
+            if self.neighbor_store is not None and (changed_ids or deleted_ids):
+                self.neighbor_store.invalidate(changed_ids + deleted_ids)
+        except Exception as e:  # the server or Qdrant is down: keep the batch and retry it
+            logger.exception("Streamed batch of %d records failed, retrying at the next poll", len(self.pending))
+            self.status["error"] = repr(e)
+            self.write_status()
+            return False
+        self.checkpoint.commit_stream(self.offsets, ids, hashes, deleted_ids)
+        changed_count = len(changed_ids)
+
+        now = time.time()
+        lag = now - self.oldest_event if self.oldest_event is not None else 0.0
+        self.status["last_batch"] = {
+            "records": self.buffered,
+            "upserted_rows": changed_count,
+            "unchanged_rows": len(upserts) - changed_count,
+            "deleted_rows": len(deleted_ids),
+            "seconds": round(time.perf_counter() - started, 3),
+            "lag_seconds": round(lag, 3),
+            "indexed_at": now,
+        }
+        self.status["lag_seconds"] = round(lag, 3)
+        self.status["upserted_rows"] += changed_count
+        self.status["unchanged_rows"] += len(upserts) - changed_count
+        self.status["deleted_rows"] += len(deleted_ids)
+        self.status["batches"] += 1
+        self.status["error"] = None
+        logger.info(
+            "streamed batch: %d upserted, %d unchanged, %d deleted, lag %.1fs",
+            changed_count,
+            len(upserts) - changed_count,
+            len(deleted_ids),
+            lag,
+        )
+        self.pending.clear()
+        self.buffered = 0
+        self.first_read_at = self.oldest_event = None
+        return True
+
+    def backlog_bytes(self) -> tuple[int, int]:
+        """Files in the directory and the bytes of them not read yet."""
+        names = self.files()
+        backlog = 0
+        for name in names:
+            size = os.path.getsize(os.path.join(self.directory, name))
+            backlog += max(0, size - self.offsets.get(name, (0, 0))[0])
+        return len(names), backlog
+
+    def write_status(self) -> None:
+        self.status["files"], self.status["backlog_bytes"] = self.backlog_bytes()
+        self.status["pending_records"] = self.buffered
+        self.status["updated_at"] = time.time()
+        tmp_path = f"{self.status_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.status, f)
+        os.replace(tmp_path, self.status_path)
+
+
+def read_stream_status() -> dict:
+    path = get_data_file_path(settings.stream_ingest_status_path)
+    if not os.path.exists(path):
+        return {"status": "idle"}
+    with open(path, encoding="utf-8") as f:
+        status = json.load(f)
+    status["idle_seconds"] = round(time.time() - status["updated_at"], 1)
+    return status
+
+
+def export_gauges() -> None:
+    """Export the lag of the streaming ingestion process on the metrics of this process (the gateway)."""
+    lag_gauge.set_function(lambda: read_stream_status().get("lag_seconds") or 0.0)
+    backlog_gauge.set_function(lambda: read_stream_status().get("backlog_bytes", 0))
+    idle_gauge.set_function(lambda: read_stream_status().get("idle_seconds", 0.0))
+
+
+def stream(once: bool = False) -> dict:
+    directory = get_data_file_path(settings.stream_ingest_dir)
+    os.makedirs(directory, exist_ok=True)
+    checkpoint = IngestCheckpoint(get_data_file_path(settings.ingest_checkpoint_path))
+    qdrant = QdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key or None)
+    neighbor_store = None
+    if settings.similar_jobs_precomputed_enabled:
+        neighbor_store = NeighborStore(get_data_file_path(settings.similar_jobs_precomputed_path))
+    ingester = StreamIngester(directory, checkpoint, qdrant, neighbor_store)
+    logger.info("Streaming ingestion from %s", directory)
+    try:
+        while True:
+            ingester.poll()
+            if once:
+                # Everything that is in the directory now, without waiting for a full batch
+                if ingester.flush():
+                    ingester.status["status"] = "done"
+                    break
+            ingester.write_status()
+            time.sleep(settings.stream_ingest_poll_seconds)
+    except KeyboardInterrupt:
+        ingester.status["status"] = "stopped"
+    except BaseException as e:
+        ingester.status.update(status="failed", error=repr(e))
+        raise
+    finally:
+        ingester.write_status()
+        checkpoint.close()
+        if neighbor_store is not None:
+            neighbor_store.close()
+        qdrant.close()
+    return ingester.status
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Streaming ingestion of the postings dropped into a directory.")
+    parser.add_argument("--once", action="store_true", help="Apply the files as they are now and exit.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    state = stream(once=args.once)
+    logger.info(
+        "streaming ingestion %s: %d upserted, %d unchanged, %d deleted, %d rejected",
+        state["status"],
+        state["upserted_rows"],
+        state["unchanged_rows"],
+        state["deleted_rows"],
+        state["rejected_records"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Local resolution of free-text filter values to the values stored in the postings.
+
+Company, city and location names have far too many values to be listed in the natural query
+prompt (see `prompt_options` in filters.py), so the LLM writes them as they appear in the
+query: "google", "Google Inc." or "new york". The gateway maps them to the dataset spellings
+("Google LLC", "New York") with an in-memory index per filter field, built from the value
+counts of `build_categories` (the values as stored in the payload):
+- an exact lookup of the normalized key: case, punctuation, whitespace and legal suffixes are
+  ignored, and every stored spelling of the key ends up in the filter ("Austin", " Austin"),
+- a trigram index for misspellings ("Gogle"), accepted above VALUE_RESOLVER_MIN_SIMILARITY,
+- a sorted list of the keys and their word suffixes for typeahead completions ("san fr",
+  "york"), served by the gateway without the LLM or the vector database:
+
+    GET /api/v1/values/<field>?prefix=goo&limit=10
+
+Values without a match are kept as is. The same resolution applies to the params of the
+rule-based parser, the cache and structured requests.
+"""
+
+import json
+import os
+import re
+from bisect import bisect_left
+from collections import Counter
+
+from superlinked_app.config import settings
+from superlinked_app.filters import filters
+
+LEGAL_SUFFIXES = {"inc", "llc", "ltd", "limited", "corp", "corporation", "co", "company", "plc", "gmbh", "lp", "llp"}
+# Trigrams shared by more keys than this are skipped when collecting fuzzy candidates
+COMMON_TRIGRAM_KEYS = 1000
+
+
+def value_key(value: str) -> str:
+    words = re.sub(r"[^\w\s]", " ", value.casefold()).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class ValueIndex:
+    """Normalized exact, prefix and trigram index of the distinct values of one field."""
+
+    def __init__(self, counts: dict[str, int]) -> None:
+        # Normalized key -> stored spellings, most frequent first, and the postings of all of them
+        self.values: dict[str, list[str]] = {}
+        self.counts: Counter = Counter()
+        for value, count in sorted(counts.items(), key=lambda item: -item[1]):
+            key = value_key(value)
+            if key:
+                self.values.setdefault(key, []).append(value)
+                self.counts[key] += count
+        self.keys = list(self.values)
+        # (key or word suffix of a key, key index), sorted for prefix lookups
+        self.completions = sorted(
+            (" ".join(words[i:]), key_id)
+            for key_id, words in enumerate(key.split() for key in self.keys)
+            for i in range(len(words))
+        )
+        self.key_trigrams = [trigrams(key) for key in self.keys]
+        self.trigram_keys: dict[str, list[int]] = {}
+        for key_id, grams in enumerate(self.key_trigrams):
+            for gram in grams:
+                self.trigram_keys.setdefault(gram, []).append(key_id)
+
+    def resolve(self, value: str) -> list[str] | None:
+        """The dataset spellings of `value`, None without an exact or close enough match."""
+        key = value_key(value)
+        if key in self.values:
+            return self.values[key]
+        match = self.closest(key)
+        return self.values[match] if match is not None else None
+
+    def closest(self, key: str) -> str | None:
+        """The most similar key by trigram Dice coefficient, the most frequent one on ties."""
+        grams = trigrams(key)
+        postings = [self.trigram_keys[gram] for gram in grams if gram in self.trigram_keys]
+        rare = [key_ids for key_ids in postings if len(key_ids) <= COMMON_TRIGRAM_KEYS] or postings
+        best, best_score = None, settings.value_resolver_min_similarity
+        for key_id in {key_id for key_ids in rare for key_id in key_ids}:
+            candidate = self.key_trigrams[key_id]
+            score = 2 * len(grams & candidate) / (len(grams) + len(candidate))
+            if score > best_score or (
+                score == best_score and best is not None and self.counts[self.keys[key_id]] > self.counts[best]
+            ):
+                best, best_score = self.keys[key_id], score
+        return best
+
+    def complete(self, prefix: str, limit: int) -> list[dict]:
+        """Values with a word starting with `prefix`, most frequent first."""
+        key = value_key(prefix)
+        if not key:
+            return []
+        matches = set()
+        for suffix, key_id in self.completions[bisect_left(self.completions, (key,)) :]:
+            if not suffix.startswith(key):
+                break
+            matches.add(key_id)
+        keys = sorted((self.keys[key_id] for key_id in matches), key=lambda k: (-self.counts[k], k))[:limit]
+        if not keys and len(key) >= 3:
+            closest = self.closest(key)
+            keys = [closest] if closest is not None else []
+        return [{"value": self.values[k][0], "count": self.counts[k]} for k in keys]
+
+
+class ValueResolver:
+    """Value index per filter field, and the resolution of the filter params."""
+
+    def __init__(self, counts_path: str) -> None:
+        counts: dict[str, dict[str, int]] = {}
+        if os.path.exists(counts_path):
+            with open(counts_path, encoding="utf-8") as f:
+                counts = json.load(f)["counts"]
+        self.param_fields = {item.param_name: item.field_name for item in filters if counts.get(item.field_name)}
+        self.indexes = {field_name: ValueIndex(counts[field_name]) for field_name in set(self.param_fields.values())}
+
+    def resolve_value(self, field_name: str, value: str) -> list[str]:
+        return self.indexes[field_name].resolve(value) or [value]
+
+    def resolve(self, params: dict) -> dict:
+        """The params with the free-text filter values replaced by all their dataset spellings."""
+        resolved = dict(params)
+        for param_name, field_name in self.param_fields.items():
+            values = params.get(param_name)
+            if isinstance(values, str):
+                spellings = self.resolve_value(field_name, values)
+                resolved[param_name] = spellings[0] if len(spellings) == 1 else spellings
+            elif isinstance(values, list):
+                resolved[param_name] = list(
+                    dict.fromkeys(
+                        spelling
+                        for value in values
+                        if isinstance(value, str)
+                        for spelling in self.resolve_value(field_name, value)
+                    )
+                )
+        return resolved
+
+    def complete(self, field_name: str, prefix: str, limit: int) -> list[dict] | None:
+        """Typeahead values of a filter field, None for a field without an index."""
+        index = self.indexes.get(field_name)
+        return index.complete(prefix, limit) if index is not None else None
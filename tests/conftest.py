@@ -0,0 +1,4 @@
+import os
+
+# superlinked_app.index reads categories.json when it is imported, point it at the small one of the tests
+os.environ.setdefault("PATH_CATEGORIES", os.path.join(os.path.dirname(__file__), "categories.json"))
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("superlinked")
+
+from superlinked_app.embedding_service import EmbeddingService, frame, read_frame  # noqa: E402
+
+ENGINE_PARAMS = {"model": "sentence-transformers/all-mpnet-base-v2", "cache_dir": "", "precision": "FLOAT16"}
+
+
+class FakeEngine:
+    """Embeds a text as [length, query flag], and records the texts of every call."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def embed(self, texts, is_query_context):
+        self.calls.append((list(texts), is_query_context))
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        return [[float(len(text)), float(is_query_context)] for text in texts]
+
+    def is_query_prompt_supported(self) -> bool:
+        return False
+
+
+def service_with_fake_engine(cache_size: int = 0) -> tuple[EmbeddingService, FakeEngine]:
+    service = EmbeddingService(batch_wait_ms=50, max_batch=8, cache_size=cache_size)
+    engine = FakeEngine()
+    service.engines[(ENGINE_PARAMS["model"], ENGINE_PARAMS["cache_dir"], ENGINE_PARAMS["precision"])] = engine
+    return service, engine
+
+
+def embed_request(texts: list[str], query: bool) -> dict:
+    return ENGINE_PARAMS | {"op": "embed", "query": query, "texts": texts}
+
+
+def test_frames_round_trip():
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(frame(b'{"op": "stats"}') + frame(b""))
+        return await read_frame(reader), await read_frame(reader)
+
+    assert asyncio.run(run()) == (b'{"op": "stats"}', b"")
+
+
+def test_concurrent_requests_share_a_batch_per_context():
+    service, engine = service_with_fake_engine()
+
+    async def run():
+        batches = asyncio.create_task(service.run_batches())
+        answers = await asyncio.gather(
+            service.answer(embed_request(["a", "bb"], query=False)),
+            service.answer(embed_request(["ccc"], query=False)),
+            service.answer(embed_request(["dddd"], query=True)),
+        )
+        batches.cancel()
+        return answers
+
+    answers = asyncio.run(run())
+    assert sorted(engine.calls) == [(["a", "bb", "ccc"], False), (["dddd"], True)]
+    assert [header for header, _ in answers] == [{"shape": [2, 2]}, {"shape": [1, 2]}, {"shape": [1, 2]}]
+    assert service.stats()["batches"] == 2
+    assert service.stats()["texts"] == 4
+
+
+def test_a_failed_batch_fails_its_requests():
+    service, _ = service_with_fake_engine()
+
+    async def run():
+        batches = asyncio.create_task(service.run_batches())
+        try:
+            with pytest.raises(RuntimeError, match="model failed"):
+                await service.answer(embed_request(["boom"], query=True))
+            # The batch loop keeps serving after the failure
+            return await service.answer(embed_request(["ok"], query=True))
+        finally:
+            batches.cancel()
+
+    assert asyncio.run(run())[0] == {"shape": [1, 2]}
+
+
+def test_query_embeddings_are_shared_through_the_cache():
+    service, engine = service_with_fake_engine(cache_size=2)
+
+    async def run():
+        batches = asyncio.create_task(service.run_batches())
+        try:
+            await service.answer(embed_request(["data analyst", "data  analyst ", "sql"], query=True))
+            # Another worker asks for a known text in another spelling, and for a document
+            header, data = await service.answer(embed_request(["data analyst", "python"], query=True))
+            await service.answer(embed_request(["data analyst"], query=False))
+            return header, data
+        finally:
+            batches.cancel()
+
+    header, data = asyncio.run(run())
+    assert header == {"shape": [2, 2]}
+    assert engine.calls == [(["data analyst", "sql"], True), (["python"], True), (["data analyst"], False)]
+    # "sql" is the least recently used entry
+    assert [text for _, text in service.cache] == ["data analyst", "python"]
+    assert (service.cache_hits, service.cache_misses) == (2, 3)
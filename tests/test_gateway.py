@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("superlinked")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from superlinked_app import gateway  # noqa: E402
+from superlinked_app.config import settings  # noqa: E402
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    """The gateway with its stores in tmp_path and the Superlinked server replaced by `calls`."""
+    for name, file_name in [
+        ("nlq_cache_path", "nlq_cache.sqlite3"),
+        ("ingest_checkpoint_path", "checkpoint.sqlite3"),
+        ("path_category_counts", "category_counts.json"),
+        ("search_profiles_path", "search_profiles.json"),
+    ]:
+        monkeypatch.setattr(settings, name, str(tmp_path / file_name))
+    for name in [
+        "nlq_rule_parser_enabled",
+        "browse_enabled",
+        "embedding_warmup_enabled",
+        "similar_jobs_cache_enabled",
+        "similar_jobs_precomputed_enabled",
+    ]:
+        monkeypatch.setattr(settings, name, False)
+    calls = []
+
+    async def forward(query_name, payload, include_metadata):
+        calls.append(dict(payload))
+        search_params = dict(payload)
+        if "natural_query" in payload:
+            # What the LLM extraction of the server fills in
+            search_params.update(title="Data Analyst", states_include=["CA"])
+        body = {"entries": [{"id": "1", "fields": {}, "metadata": {"score": 1.0}}]}
+        if include_metadata:
+            body["metadata"] = {"search_params": search_params}
+        return 200, body
+
+    monkeypatch.setattr(gateway, "forward", forward)
+    return calls
+
+
+def test_cached_extraction_skips_the_llm(upstream):
+    with TestClient(gateway.app) as client:
+        response = client.post("/api/v1/search/job", json={"natural_query": "Data analyst in California!"})
+        assert response.headers["x-nlq-path"] == "llm"
+        assert upstream[-1] == {"natural_query": "Data analyst in California!"}
+
+        response = client.post("/api/v1/search/job", json={"natural_query": "data analyst in california", "limit": 5})
+        assert response.status_code == 200
+        assert response.headers["x-nlq-path"] == "cache"
+        assert response.json()["entries"][0]["id"] == "1"
+        # Searched with the cached params, so the server does not call the LLM again
+        assert upstream[-1] == {"title": "Data Analyst", "states_include": ["CA"], "limit": 5}
+
+        stats = client.get("/nlq/stats").json()
+        assert stats["paths"]["cache"]["requests"] == 1
+        assert stats["paths"]["llm"]["requests"] == 1
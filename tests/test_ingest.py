@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("superlinked")
+
+from superlinked_app.ingest import (  # noqa: E402
+    DuplicateTextStats,
+    IngestCheckpoint,
+    IngestProgress,
+    PendingChunk,
+    commit_chunk,
+)
+from superlinked_app.neighbors import NeighborStore  # noqa: E402
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    checkpoint = IngestCheckpoint(str(tmp_path / "checkpoint.sqlite3"))
+    yield checkpoint
+    checkpoint.close()
+
+
+def test_stream_offsets_start_empty(checkpoint):
+    assert checkpoint.stream_offsets() == {}
+
+
+def test_commit_stream_records_rows_and_offsets(checkpoint):
+    checkpoint.commit_stream({"a.jsonl": (120, 3)}, ["1", "2"], ["hash-1", "hash-2"], [])
+    assert checkpoint.stream_offsets() == {"a.jsonl": (120, 3)}
+    assert checkpoint.row_hash("1") == "hash-1"
+    assert checkpoint.changed_rows(["1", "2", "3"], ["hash-1", "changed", "hash-3"]) == [False, True, True]
+
+    checkpoint.commit_stream({"a.jsonl": (200, 5), "b.csv": (50, 1)}, ["2"], ["hash-2b"], ["1"])
+    assert checkpoint.stream_offsets() == {"a.jsonl": (200, 5), "b.csv": (50, 1)}
+    assert checkpoint.row_hash("1") is None
+    assert checkpoint.row_hash("2") == "hash-2b"
+    assert sorted(checkpoint.ingested_rows()) == [("2", "hash-2b")]
+
+
+def test_commit_stream_without_records_only_moves_the_offsets(checkpoint):
+    checkpoint.commit_stream({"a.jsonl": (10, 0)}, [], [], [])
+    assert checkpoint.stream_offsets() == {"a.jsonl": (10, 0)}
+    assert checkpoint.ingested_rows() == []
+
+
+def test_offsets_survive_a_restart(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite3")
+    checkpoint = IngestCheckpoint(path)
+    checkpoint.commit_stream({"a.jsonl": (42, 2)}, ["1"], ["hash-1"], [])
+    checkpoint.close()
+    checkpoint = IngestCheckpoint(path)
+    assert checkpoint.stream_offsets() == {"a.jsonl": (42, 2)}
+    assert checkpoint.row_hash("1") == "hash-1"
+    checkpoint.close()
+
+
+def test_reset_forgets_the_stream_offsets(checkpoint):
+    checkpoint.commit_stream({"a.jsonl": (42, 2)}, ["1"], ["hash-1"], [])
+    checkpoint.reset()
+    assert checkpoint.stream_offsets() == {}
+    assert checkpoint.row_hash("1") is None
+
+
+def test_duplicate_texts_are_counted_within_each_chunk():
+    stats = DuplicateTextStats()
+    stats.add(pd.DataFrame({"job_title": ["A", "A", "B", None], "job_summary": ["s", "s", "s", "t"]}))
+    stats.add(pd.DataFrame({"job_title": ["A"], "job_summary": ["u"]}))
+    assert stats.report() == {
+        "job_summary": {"texts": 5, "duplicates": 2, "duplicate_ratio": 0.4},
+        "job_title": {"texts": 4, "duplicates": 1, "duplicate_ratio": 0.25},
+    }
+
+
+def test_commit_chunk_invalidates_the_neighbor_lists_of_reingested_rows(tmp_path, checkpoint):
+    store = NeighborStore(str(tmp_path / "neighbors.sqlite3"))
+    neighbors = {"entries": [{"id": "2", "fields": {}, "metadata": {}}], "metadata": {}}
+    store.put("1", "hash-1", 1, neighbors)
+    store.put("3", "hash-3", 1, {"entries": [], "metadata": {}})
+    progress = IngestProgress(str(tmp_path / "progress.json"), "postings.csv", 3)
+    # Row 2 changed, 1 and 3 are unchanged
+    pending = PendingChunk(0, 0, "chunk-hash", ["1", "2", "3"], ["h1", "h2", "h3"], pd.DataFrame({"id": [2]}))
+    commit_chunk(checkpoint, store, progress, pending)
+    assert store.computed_hashes() == {"3": "hash-3"}
+    assert store.version() == 1
+    assert checkpoint.row_hash("2") == "h2"
+    store.close()
@@ -0,0 +1,121 @@
+import pytest
+
+from superlinked_app import neighbors
+from superlinked_app.neighbors import NeighborCache, NeighborStore, is_precomputed_request
+
+
+def result(*ids: str) -> dict:
+    return {
+        "entries": [{"id": id_, "fields": {}, "metadata": {"score": 1.0, "vector_parts": [[0.1, 0.2]]}} for id_ in ids],
+        "metadata": {"search_vector": [0.1, 0.2], "search_params": {"limit": len(ids)}},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NeighborStore(str(tmp_path / "neighbors.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_precomputed_requests():
+    assert is_precomputed_request({"id": "1"})
+    assert is_precomputed_request({"id": "1", "limit": 5})
+    assert is_precomputed_request({"id": "1", "limit": 5, "title_weight": 1.0, "skills_weight": 0.9})
+    assert not is_precomputed_request({"id": "1", "title_weight": 0.5})
+    assert not is_precomputed_request({"id": "1", "limit": "5"})
+    assert not is_precomputed_request({"id": "1", "job_levels_include": ["Associate"]})
+
+
+def test_cache_hit_miss_and_invalidation():
+    cache = NeighborCache(max_entries=10, ttl_seconds=60)
+    assert cache.get("a", "hash-1") is None
+    cache.put("a", "hash-1", {"entries": []})
+    assert cache.get("a", "hash-1") == {"entries": []}
+    # The posting was re-ingested with another content
+    assert cache.get("a", "hash-2") is None
+    assert cache.get("a", "hash-1") is None
+    assert cache.stats() | {"hit_ratio": None} == {
+        "size": 0,
+        "max_entries": 10,
+        "ttl_seconds": 60,
+        "hits": 1,
+        "misses": 3,
+        "hit_ratio": None,
+        "evictions": 0,
+        "invalidations": 1,
+    }
+
+
+def test_cache_evicts_the_least_recently_used(monkeypatch):
+    cache = NeighborCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", None, {"a": 1})
+    cache.put("b", None, {"b": 1})
+    cache.get("a", None)
+    cache.put("c", None, {"c": 1})
+    assert cache.get("b", None) is None
+    assert cache.get("a", None) == {"a": 1}
+    assert cache.evictions == 1
+
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(neighbors.time, "time", lambda: now[0])
+    cache = NeighborCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", None, {"a": 1})
+    now[0] += 61
+    assert cache.get("a", None) is None
+
+
+def test_store_round_trip_without_vectors(store):
+    store.put("1", "hash-1", 3, result("2", "3", "4"))
+    body = store.get("1", "hash-1", 2)
+    assert [entry["id"] for entry in body["entries"]] == ["2", "3", "4"]
+    assert body["metadata"]["search_vector"] == []
+    assert all(entry["metadata"]["vector_parts"] == [] for entry in body["entries"])
+    assert store.computed_hashes() == {"1": "hash-1"}
+    assert store.stats() == {"size": 1, "hits": 1, "stale": 0, "version": 0}
+
+
+def test_store_misses_longer_limits_and_changed_postings(store):
+    store.put("1", "hash-1", 3, result("2", "3", "4"))
+    assert store.get("1", "hash-1", 5) is None
+    assert store.get("1", "hash-2", 3) is None
+    assert store.get("2", None, 3) is None
+    assert store.stale == 1
+
+
+def test_invalidate_drops_the_lists_a_posting_appears_in(store):
+    store.put("1", "hash-1", 2, result("2", "3"))
+    store.put("2", "hash-2", 2, result("1", "4"))
+    store.put("5", "hash-5", 2, result("6", "7"))
+    assert store.invalidate(["3"]) == 1
+    assert store.computed_hashes() == {"2": "hash-2", "5": "hash-5"}
+    assert store.invalidate(["2", "6"]) == 2
+    assert store.computed_hashes() == {}
+    # Only invalidations that deleted lists bump the version
+    assert store.invalidate(["8"]) == 0
+    assert store.version() == 2
+
+
+def test_cache_drops_entries_of_an_older_store_version():
+    cache = NeighborCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", "hash-1", {"entries": []}, store_version=3)
+    assert cache.get("a", "hash-1", store_version=3) == {"entries": []}
+    # An ingestion invalidated precomputed lists, the cached result may list a changed posting
+    assert cache.get("a", "hash-1", store_version=4) is None
+    assert cache.invalidations == 1
+
+
+def test_neighbor_entries_are_backfilled(tmp_path):
+    path = str(tmp_path / "neighbors.sqlite3")
+    store = NeighborStore(path)
+    store.put("1", "hash-1", 2, result("2", "3"))
+    # A store written before the neighbor_entries table existed
+    store._conn.execute("DROP TABLE neighbor_entries")
+    store._conn.commit()
+    store.close()
+    store = NeighborStore(path)
+    assert store.invalidate(["3"]) == 1
+    assert store.computed_hashes() == {}
+    store.close()
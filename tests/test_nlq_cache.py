@@ -0,0 +1,70 @@
+import pytest
+
+from superlinked_app import nlq_cache
+from superlinked_app.nlq_cache import NLQCache, compute_fingerprint, normalize_query
+
+
+@pytest.fixture
+def now(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(nlq_cache.time, "time", lambda: now[0])
+    return now
+
+
+def open_cache(tmp_path, fingerprint="fp-1", max_entries=10, ttl_seconds=60) -> NLQCache:
+    return NLQCache(str(tmp_path / "nlq_cache.sqlite3"), fingerprint, max_entries, ttl_seconds)
+
+
+def test_normalize_query():
+    assert normalize_query("  Data   Analyst jobs in California!") == "data analyst jobs in california"
+    assert normalize_query("ＳＱＬ jobs?") == "sql jobs"
+
+
+def test_fingerprint_depends_on_every_part():
+    assert compute_fingerprint("prompt", "options") == compute_fingerprint("prompt", b"options")
+    assert compute_fingerprint("prompt", "options") != compute_fingerprint("prompt", "other options")
+    assert compute_fingerprint("ab", "c") != compute_fingerprint("a", "bc")
+
+
+def test_hit_for_a_normalized_spelling(tmp_path, now):
+    cache = open_cache(tmp_path)
+    assert cache.get("Data analyst in California") is None
+    cache.put("Data analyst in California", {"title": "Data Analyst"})
+    assert cache.get("  data ANALYST in california.") == {"title": "Data Analyst"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(tmp_path, now):
+    cache = open_cache(tmp_path, ttl_seconds=60)
+    cache.put("data analyst", {"title": "Data Analyst"})
+    now[0] += 60
+    assert cache.get("data analyst") == {"title": "Data Analyst"}
+    # Reading an entry does not extend its lifetime
+    now[0] += 1
+    assert cache.get("data analyst") is None
+    assert cache.expirations == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, now):
+    cache = open_cache(tmp_path, max_entries=2)
+    cache.put("a", {"title": "A"})
+    now[0] += 1
+    cache.put("b", {"title": "B"})
+    now[0] += 1
+    cache.get("a")
+    now[0] += 1
+    cache.put("c", {"title": "C"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"title": "A"}
+    assert cache.get("c") == {"title": "C"}
+    assert cache.evictions == 1
+
+
+def test_a_new_fingerprint_invalidates_the_entries(tmp_path, now):
+    open_cache(tmp_path, fingerprint="fp-1").put("data analyst", {"title": "Data Analyst"})
+    assert open_cache(tmp_path, fingerprint="fp-1").get("data analyst") == {"title": "Data Analyst"}
+
+    cache = open_cache(tmp_path, fingerprint="fp-2")
+    assert cache.invalidated == 1
+    assert cache.get("data analyst") is None
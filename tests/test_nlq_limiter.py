@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from superlinked_app.nlq_limiter import ExtractionLimiter, TokenBucket
+
+
+def test_burst_is_available_at_once():
+    bucket = TokenBucket(rate=0.001, burst=3)
+
+    async def run():
+        for _ in range(3):
+            await asyncio.wait_for(bucket.acquire(), 0.05)
+        # The fourth call waits for a token, about 1000s at this rate
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(bucket.acquire(), 0.05)
+
+    asyncio.run(run())
+
+
+def test_tokens_refill_at_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+
+    async def run():
+        await bucket.acquire()
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.015
+
+
+def test_pause_empties_the_bucket_and_refills_from_its_end():
+    bucket = TokenBucket(rate=100, burst=10)
+    bucket.pause(0.1)
+    assert bucket.tokens == 0.0
+    assert bucket.updated == bucket.paused_until
+
+    async def run():
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.09
+    # The pause itself is not refill time, so no burst is let through right after it
+    assert bucket.tokens < 2
+
+
+def test_pause_keeps_the_longest_pause():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.pause(10.0)
+    paused_until = bucket.paused_until
+    bucket.pause(1.0)
+    assert bucket.paused_until == paused_until
+
+
+def test_failed_extractions_resolve_to_none_for_every_waiter():
+    limiter = ExtractionLimiter(concurrency=2, rate=100, burst=10, max_retries=1, backoff_seconds=0.0)
+
+    async def fail() -> tuple:
+        await asyncio.sleep(0.01)
+        raise ConnectionError("server unreachable")
+
+    async def run():
+        task, started_here = limiter.run("data analyst", fail)
+        coalesced, coalesced_started_here = limiter.run("data analyst", fail)
+        assert (started_here, coalesced_started_here) == (True, False)
+        return await task, await coalesced
+
+    assert asyncio.run(run()) == (None, None)
+    assert limiter.stats()["errors"] == 1
+    assert limiter.stats()["in_flight"] == 0
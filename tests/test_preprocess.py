@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from superlinked_app.preprocess import count_rows
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 1 << 24])
+def test_count_rows_ignores_line_breaks_in_quoted_fields(tmp_path, block_size):
+    path = tmp_path / "postings.csv"
+    descriptions = ["plain", 'two\nlines with "quotes"', "a, b", 'x""y', "", "crlf\r\nline"]
+    pd.DataFrame({"id": range(12), "description": descriptions * 2}).to_csv(path, index=False)
+    assert count_rows(str(path), block_size) == len(pd.read_csv(path)) == 12
+
+
+def test_count_rows_without_a_final_line_break(tmp_path):
+    path = tmp_path / "postings.csv"
+    path.write_bytes(b'id,description\n1,"a\nb"\n2,c')
+    assert count_rows(str(path)) == 2
+
+
+def test_count_rows_of_a_header_only_file(tmp_path):
+    path = tmp_path / "postings.csv"
+    path.write_bytes(b"id,description\n")
+    assert count_rows(str(path)) == 0
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+pytest.importorskip("superlinked")
+
+from superlinked_app import query_parser  # noqa: E402
+from superlinked_app.query_parser import RuleBasedParser  # noqa: E402
+from superlinked_app.value_resolver import ValueResolver  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def parser() -> RuleBasedParser:
+    return RuleBasedParser()
+
+
+def test_simple_query_is_fully_parsed(parser):
+    parsed = parser.parse("remote junior data analyst jobs in the UK with SQL")
+    assert parsed.confidence == 1.0
+    assert parsed.unmatched == []
+    assert parsed.params == {
+        "title": "Data Analyst",
+        "skills": ["SQL"],
+        "job_types_include": ["Remote"],
+        "job_levels_include": ["Associate"],
+        "search_countries_include": ["United Kingdom"],
+        "job_categories_include": ["data_analyst"],
+        "description": "Data Analyst with SQL experience.",
+    }
+
+
+def test_title_aliases_and_cities(parser):
+    parsed = parser.parse("senior python developer in Austin")
+    assert parsed.confidence == 1.0
+    assert parsed.params["title"] == "Software Engineer"
+    assert parsed.params["skills"] == ["Python"]
+    assert parsed.params["job_levels_include"] == ["Mid Senior"]
+    assert parsed.params["search_cities_include"] == ["Austin"]
+
+
+def test_cities_come_from_the_value_index(tmp_path, monkeypatch):
+    # categories.json no longer lists the cities, build_categories only counts them
+    monkeypatch.setitem(query_parser.job_categories, "search_city", [])
+    path = tmp_path / "category_counts.json"
+    path.write_text(json.dumps({"counts": {"search_city": {"Austin": 3, " Austin": 1, "Boston": 2, "Remote": 1}}}))
+    parser = RuleBasedParser(ValueResolver(str(path)))
+    parsed = parser.parse("data engineer in Austin")
+    assert parsed.confidence == 1.0
+    assert parsed.params["title"] == "Data Engineer"
+    assert parsed.params["search_cities_include"] == ["Austin"]
+    assert "search_cities_include" not in RuleBasedParser().parse("data engineer in Austin").params
+    # A city named like a work type does not take over the remote queries
+    assert parser.parse("remote data engineer").params["job_types_include"] == ["Remote"]
+
+
+def test_short_codes_only_count_in_upper_case(parser):
+    assert parser.parse("US data scientist jobs").params["search_countries_include"] == ["United States"]
+    assert "search_countries_include" not in parser.parse("data scientist jobs for us").params
+
+
+def test_ambiguous_phrases_are_left_to_the_llm(parser):
+    # 'new york' is both a state and a search city
+    parsed = parser.parse("data analyst in New York")
+    assert parsed.confidence == 0.5
+    assert parsed.unmatched == ["new", "york"]
+    assert "search_cities_include" not in parsed.params
+
+
+@pytest.mark.parametrize(
+    "query", ["software engineer not in London", "data analyst jobs paying $100k", "data analyst except Amazon"]
+)
+def test_exclusions_and_salaries_go_to_the_llm(parser, query):
+    assert parser.parse(query).params == {}
+    assert parser.parse(query).confidence == 0.0
+
+
+def test_unknown_words_lower_the_confidence(parser):
+    parsed = parser.parse("underwater basket weaving")
+    assert parsed.params == {}
+    assert parsed.confidence == 0.0
+    assert parsed.unmatched == ["underwater", "basket", "weaving"]
@@ -0,0 +1,26 @@
+from superlinked_app.skills_vocab import SkillVocabulary
+
+
+def vocabulary() -> SkillVocabulary:
+    return SkillVocabulary(["Machine Learning", "Machine learning", "SQL", "Power BI", "JavaScript"])
+
+
+def test_spellings_share_one_dimension():
+    assert vocabulary().skills == ["Machine Learning", "SQL", "Power BI", "JavaScript"]
+
+
+def test_canonicalize_splits_comma_separated_cells():
+    assert vocabulary().canonicalize("ml, sql , PowerBI, Rust") == ["Machine Learning", "SQL", "Power BI", "Rust"]
+
+
+def test_canonicalize_merges_spellings_of_a_list():
+    skills = ["SQL", "sql", "machine-learning", "Machine  Learning", "js", "Java Script"]
+    assert vocabulary().canonicalize(skills) == ["SQL", "Machine Learning", "JavaScript"]
+
+
+def test_canonicalize_keeps_unknown_skills_and_drops_empty_ones():
+    assert vocabulary().canonicalize([" Rust ", "", "SQL"]) == ["Rust", "SQL"]
+
+
+def test_canonicalize_of_a_missing_cell():
+    assert vocabulary().canonicalize(None) is None
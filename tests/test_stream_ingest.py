@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+pytest.importorskip("superlinked")
+
+from superlinked_app.stream_ingest import DELETE_OP, UPSERT_OP, StreamRecord, parse_record, read_jsonl  # noqa: E402
+
+
+def write_lines(path, *lines: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(lines))
+
+
+def test_parse_upsert():
+    record = parse_record({"id": 7, "job_title": "Data Analyst", "event_time": "100.5"}, read_at=200.0)
+    assert record == StreamRecord(UPSERT_OP, "7", {"id": 7, "job_title": "Data Analyst"}, 100.5)
+
+
+def test_parse_delete():
+    record = parse_record({"op": "delete", "id": "7"}, read_at=200.0)
+    assert (record.op, record.id, record.event_time) == (DELETE_OP, "7", 200.0)
+
+
+@pytest.mark.parametrize("event_time", [None, "soon", float("nan"), float("inf")])
+def test_invalid_event_times_default_to_the_read_time(event_time):
+    assert parse_record({"id": "7", "event_time": event_time}, read_at=200.0).event_time == 200.0
+
+
+def test_empty_op_is_an_upsert():
+    assert parse_record({"op": "", "id": "7"}, read_at=0.0).op == UPSERT_OP
+
+
+@pytest.mark.parametrize("row", [{"op": "update", "id": "7"}, {"job_title": "x"}, {"id": ""}, {"id": float("nan")}])
+def test_invalid_records_are_rejected(row):
+    with pytest.raises(ValueError):
+        parse_record(row, read_at=0.0)
+
+
+def test_read_jsonl_stops_at_an_incomplete_line(tmp_path):
+    path = tmp_path / "postings.jsonl"
+    write_lines(path, json.dumps({"id": "1"}) + "\n", "\n", json.dumps({"op": "delete", "id": "2"}) + "\n", '{"id": "3"')
+    records, offset, rejected = read_jsonl(str(path), 0, 100)
+    assert [(record.op, record.id) for record in records] == [(UPSERT_OP, "1"), (DELETE_OP, "2")]
+    assert rejected == 0
+    assert offset == path.stat().st_size - len('{"id": "3"')
+
+    # The writer finishes the line, the next poll reads it from the offset
+    write_lines(path, "}\n")
+    records, new_offset, rejected = read_jsonl(str(path), offset, 100)
+    assert [record.id for record in records] == ["3"]
+    assert new_offset == path.stat().st_size
+
+
+def test_read_jsonl_counts_rejected_lines(tmp_path):
+    path = tmp_path / "postings.jsonl"
+    write_lines(path, "not json\n", json.dumps({"op": "expire", "id": "1"}) + "\n", json.dumps({"id": "2"}) + "\n")
+    records, offset, rejected = read_jsonl(str(path), 0, 100)
+    assert [record.id for record in records] == ["2"]
+    assert rejected == 2
+    assert offset == path.stat().st_size
+
+
+def test_read_jsonl_returns_at_most_max_records(tmp_path):
+    path = tmp_path / "postings.jsonl"
+    write_lines(path, *(json.dumps({"id": str(i)}) + "\n" for i in range(5)))
+    records, offset, _ = read_jsonl(str(path), 0, 2)
+    assert [record.id for record in records] == ["0", "1"]
+    records, offset, _ = read_jsonl(str(path), offset, 10)
+    assert [record.id for record in records] == ["2", "3", "4"]
+    assert offset == path.stat().st_size
@@ -0,0 +1,39 @@
+from collections import Counter
+
+import pytest
+
+from superlinked_app.build_categories import top_values
+
+pytest.importorskip("superlinked")
+
+from superlinked_app.value_resolver import ValueIndex  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def companies() -> ValueIndex:
+    return ValueIndex({"Google LLC": 5, "google": 1, "Amazon.com, Inc.": 3, "Amazon Web Services": 4})
+
+
+def test_exact_keys_resolve_to_every_stored_spelling(companies):
+    assert companies.resolve("Google Inc.") == ["Google LLC", "google"]
+    assert companies.resolve("amazon com") == ["Amazon.com, Inc."]
+
+
+def test_misspellings_resolve_to_the_closest_key(companies):
+    assert companies.resolve("Gogle") == ["Google LLC", "google"]
+    assert companies.resolve("Meta") is None
+
+
+def test_completions_show_the_most_frequent_spelling(companies):
+    assert companies.complete("goo", 10) == [{"value": "Google LLC", "count": 6}]
+    assert [match["value"] for match in companies.complete("amazon", 10)] == ["Amazon Web Services", "Amazon.com, Inc."]
+
+
+def test_raw_city_spellings_are_kept_for_the_filter():
+    cities = ValueIndex({"Austin": 3, " Austin ": 2, "austin": 1})
+    assert cities.resolve("austin") == ["Austin", " Austin ", "austin"]
+
+
+def test_exported_values_group_the_stored_spellings():
+    counts = Counter({" TX": 3, "TX": 2, "CA": 4, "tx ": 1})
+    assert top_values("state", counts) == ["TX", "CA"]